@@ -6,9 +6,14 @@ Added CORS support and proper routing
 
 import logging
 import threading
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
-from typing import Optional
+from typing import Optional, Tuple
+
+from sebas.api.event_bridge import json_safe
+from sebas.api.swagger import register_swagger_routes
+from sebas.api.websocket import init_websocket_manager, get_websocket_manager
+from sebas.services.tracing import get_tracer
 
 
 class APIServer:
@@ -42,37 +47,165 @@ class APIServer:
         })
         
         self._register_routes()
+        
+        # Real-time channel (live transcripts etc.) - needs flask-socketio
+        init_websocket_manager(self.app)
+        self.ws_manager = get_websocket_manager()
+        if self.ws_manager and self.sebas and hasattr(self.sebas, 'events'):
+            self.ws_manager.bind_event_bus(self.sebas.events)
+        
         logging.info(f"API Server initialized on {host}:{port}")
 
+    # ------------------------------------------------------------
+    # Route logic - shared by the Flask routes below and AsyncAPIServer
+    # ------------------------------------------------------------
+    def root_info(self) -> dict:
+        return {
+            "status": "online",
+            "service": "sebas-api",
+            "version": "1.0-stage1"
+        }
+
+    def health_info(self) -> dict:
+        return {
+            "status": "ok",
+            "service": "sebas-api",
+        }
+
+    def version_info(self) -> dict:
+        skill_count = 0
+        if self.sebas and hasattr(self.sebas, 'skill_registry'):
+            skill_count = len(self.sebas.skill_registry.skills)
+
+        return {
+            "api_version": "1.0.0-stage1",
+            "nlu": bool(self.nlu),
+            "skills_loaded": skill_count,
+        }
+
+    def handle_parse(self, data: Optional[dict]) -> Tuple[dict, int]:
+        """Run one text command through SEBAS (blocking: NLU, skill, TTS queueing)."""
+        try:
+            if not data:
+                return {"error": "No JSON data received"}, 400
+
+            text = str(data.get("text", "")).strip()
+
+            if not text:
+                return {"error": "empty_command", "message": "No text provided"}, 400
+
+            if not self.sebas:
+                return {"error": "sebas_not_ready", "message": "SEBAS not initialized"}, 503
+
+            logging.info(f"📨 API received command: {text}")
+
+            # Execute command directly through Sebas - one NLU pass, structured result
+            result = self.sebas.parse_and_execute(text, source='api')
+
+            body = json_safe(result.to_dict()) if hasattr(result, 'to_dict') else {"text": text}
+            body.update({
+                "ok": True,
+                "response": str(result),
+            })
+            return body, 200
+
+        except Exception as ex:
+            logging.exception("API parse_command error")
+            return {
+                "ok": False,
+                "error": "exception",
+                "message": str(ex)
+            }, 500
+
+    def status_info(self) -> Tuple[dict, int]:
+        try:
+            if not self.sebas:
+                return {"status": "not_initialized"}, 503
+
+            return {
+                "status": "online",
+                "is_processing": getattr(self.sebas, 'is_processing', False),
+                "skills_loaded": len(self.sebas.skill_registry.skills) if hasattr(self.sebas, 'skill_registry') else 0,
+                "current_language": self.sebas.language_manager.get_current_language() if hasattr(self.sebas, 'language_manager') else "unknown"
+            }, 200
+        except Exception as ex:
+            logging.exception("Status endpoint error")
+            return {"error": str(ex)}, 500
+
+    def open_tts(self, text: str, audio_format: str):
+        """
+        Validate a TTS request and start synthesis (blocking until the voice is ready).
+
+        Returns:
+            (error body, status) or (chunk iterator, headers)
+        """
+        if not text:
+            return {"error": "empty_text", "message": "No text provided"}, 400
+        if audio_format not in ("wav", "pcm"):
+            return {"error": "bad_format", "message": "format must be wav or pcm"}, 400
+
+        engine = getattr(getattr(self.sebas, 'tts', None), 'engine', None)
+        if engine is None or not engine.wait_until_ready(timeout=10):
+            return {"error": "tts_not_ready", "message": "TTS voice not available"}, 503
+
+        chunks = engine.iter_synthesis(text, audio_format)
+        sample_rate = engine.sample_rate
+        return chunks, {
+            "Content-Type": "audio/wav" if audio_format == "wav" else f"audio/L16; rate={sample_rate}; channels=1",
+            "X-Sample-Rate": str(sample_rate),
+            "Cache-Control": "no-store",
+        }
+
+    def latency_info(self, limit: int = 5) -> dict:
+        tracer = get_tracer()
+        return {
+            "enabled": tracer.enabled,
+            "stages": tracer.get_stats(),
+            "recent": tracer.get_recent(limit),
+        }
+
+    def event_stats(self) -> Tuple[dict, int]:
+        events = getattr(self.sebas, 'events', None)
+        if events is None or not hasattr(events, 'get_stats'):
+            return {"error": "event_bus_not_available"}, 503
+        ws_manager = getattr(self, 'ws_manager', None)
+        return {
+            "events": events.get_stats(),
+            "websocket": ws_manager.get_stats() if ws_manager else None,
+        }, 200
+
+    def event_history(self, topics=None, since=None, until=None, source=None, limit=100) -> Tuple[dict, int]:
+        events = getattr(self.sebas, 'events', None)
+        history = getattr(events, 'history', None)
+        if history is None:
+            return {"error": "event_history_not_available"}, 503
+
+        records = history.query(topic=topics, since=since, until=until, source=source, limit=limit)
+        return {
+            "stats": history.get_stats(),
+            "events": [
+                {"type": e.topic, "source": e.source, "ts": e.ts, "data": json_safe(e.data)}
+                for e in records
+            ],
+        }, 200
+
+    # ------------------------------------------------------------
+    # Flask routes
+    # ------------------------------------------------------------
     def _register_routes(self):
         """Register all API routes."""
 
         @self.app.route("/")
         def root():
-            return jsonify({
-                "status": "online",
-                "service": "sebas-api",
-                "version": "1.0-stage1"
-            })
+            return jsonify(self.root_info())
 
         @self.app.route("/api/v1/health")
         def health():
-            return jsonify({
-                "status": "ok",
-                "service": "sebas-api",
-            })
+            return jsonify(self.health_info())
 
         @self.app.route("/api/v1/version")
         def version():
-            skill_count = 0
-            if self.sebas and hasattr(self.sebas, 'skill_registry'):
-                skill_count = len(self.sebas.skill_registry.skills)
-            
-            return jsonify({
-                "api_version": "1.0.0-stage1",
-                "nlu": bool(self.nlu),
-                "skills_loaded": skill_count,
-            })
+            return jsonify(self.version_info())
 
         @self.app.route("/api/v1/parse", methods=["POST", "OPTIONS"])
         def parse_command():
@@ -83,65 +216,74 @@ class APIServer:
             if request.method == "OPTIONS":
                 return "", 200
 
-            try:
-                data = request.get_json()
-                if not data:
-                    return jsonify({"error": "No JSON data received"}), 400
-
-                text = str(data.get("text", "")).strip()
-                
-                if not text:
-                    return jsonify({"error": "empty_command", "message": "No text provided"}), 400
-
-                if not self.sebas:
-                    return jsonify({"error": "sebas_not_ready", "message": "SEBAS not initialized"}), 503
-
-                logging.info(f"📨 API received command: {text}")
-
-                # Execute command directly through Sebas
-                result = self.sebas.parse_and_execute(text)
-
-                # Extract intent info if available
-                intent_name = None
-                confidence = None
-                if self.nlu:
-                    intent, _ = self.nlu.get_intent_with_confidence(text)
-                    if intent:
-                        intent_name = intent.name
-                        confidence = intent.confidence
-
-                return jsonify({
-                    "ok": True,
-                    "response": result,
-                    "intent": intent_name,
-                    "confidence": confidence,
-                    "text": text
-                })
-
-            except Exception as ex:
-                logging.exception("API parse_command error")
-                return jsonify({
-                    "ok": False,
-                    "error": "exception",
-                    "message": str(ex)
-                }), 500
+            body, status_code = self.handle_parse(request.get_json(silent=True))
+            return jsonify(body), status_code
 
         @self.app.route("/api/v1/status")
         def status():
             """Get SEBAS status."""
-            try:
-                if not self.sebas:
-                    return jsonify({"status": "not_initialized"}), 503
-
-                return jsonify({
-                    "status": "online",
-                    "is_processing": getattr(self.sebas, 'is_processing', False),
-                    "skills_loaded": len(self.sebas.skill_registry.skills) if hasattr(self.sebas, 'skill_registry') else 0,
-                    "current_language": self.sebas.language_manager.get_current_language() if hasattr(self.sebas, 'language_manager') else "unknown"
-                })
-            except Exception as ex:
-                logging.exception("Status endpoint error")
-                return jsonify({"error": str(ex)}), 500
+            body, status_code = self.status_info()
+            return jsonify(body), status_code
+
+        @self.app.route("/api/v1/tts", methods=["GET", "POST", "OPTIONS"])
+        def tts():
+            """
+            Stream SEBAS's voice for a text as chunked WAV or raw PCM.
+            
+            Params (JSON body or query): text, format = wav (default) | pcm.
+            PCM is int16 mono at the rate in the X-Sample-Rate header.
+            Cached phrases are served without synthesis.
+            """
+            if request.method == "OPTIONS":
+                return "", 200
+
+            data = request.get_json(silent=True) or {}
+            text = str(data.get("text") or request.args.get("text", "")).strip()
+            audio_format = str(data.get("format") or request.args.get("format", "wav")).lower()
+
+            chunks, headers = self.open_tts(text, audio_format)
+            if isinstance(chunks, dict):
+                return jsonify(chunks), headers
+
+            response = Response(stream_with_context(chunks), mimetype=headers.pop("Content-Type"))
+            response.headers.update(headers)
+            return response
+
+        @self.app.route("/api/v1/latency")
+        def latency():
+            """Per-stage latency histograms of voice commands (wake word -> first audio)."""
+            return jsonify(self.latency_info(request.args.get("recent", default=5, type=int)))
+
+        @self.app.route("/api/v1/events")
+        def event_stats():
+            """EventBus metrics (emits, listener timing, queue depth) and WebSocket bridge metrics."""
+            body, status_code = self.event_stats()
+            return jsonify(body), status_code
+
+        @self.app.route("/api/v1/events/history")
+        def event_history():
+            """
+            Recent events from the shared history.
+            
+            Query: topic (repeatable), since / until (unix time), source, limit.
+            """
+            body, status_code = self.event_history(
+                topics=request.args.getlist("topic") or None,
+                since=request.args.get("since", type=float),
+                until=request.args.get("until", type=float),
+                source=request.args.get("source"),
+                limit=request.args.get("limit", default=100, type=int),
+            )
+            return jsonify(body), status_code
+
+        @self.app.route("/api/v1/latency/trace")
+        def latency_trace():
+            """Recent traces as Chrome trace JSON (load in chrome://tracing or Perfetto)."""
+            response = jsonify(get_tracer().export_chrome_trace())
+            response.headers["Content-Disposition"] = "attachment; filename=sebas_trace.json"
+            return response
+
+        register_swagger_routes(self.app)
 
     def start(self):
         """Start API server in background thread."""
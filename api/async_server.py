@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio API Server - Stage 2
+Event-loop HTTP front-end for the SEBAS REST API.
+
+The Flask development server behind APIServer.start() handles each
+request on its own thread, so a /api/v1/parse that sits in a 30 second
+skill holds a thread for 30 seconds. This server keeps every connection
+on one asyncio loop (stdlib only, HTTP/1.1 keep-alive) and hands only
+the blocking work - command execution, TTS synthesis, status reads -
+to a bounded executor. Idle and waiting clients cost a coroutine, not
+a thread.
+
+Routes are the same as APIServer's (the route logic is shared, see
+APIServer.handle_parse etc.) plus the Swagger UI and spec. The
+Socket.IO channel needs the Flask app and is not served here.
+
+Enable with env SEBAS_API_ASYNC=1 (main.py), or:
+
+    server = AsyncAPIServer(APIServer(sebas_instance=sebas, nlu=nlu))
+    server.start()
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from sebas.api.swagger import SWAGGER_UI_HTML, create_swagger_spec
+from sebas.services.tracing import get_tracer
+
+_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+_EOF = object()  # end of a streamed body (next() without StopIteration crossing threads)
+
+
+class HTTPError(Exception):
+    """Rejects a request before it reaches a route."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    """Parsed HTTP request."""
+
+    __slots__ = ("method", "path", "query", "headers", "body", "version")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes,
+                 version: str = "HTTP/1.1"):
+        parts = urlsplit(target)
+        self.method = method
+        self.version = version
+        self.path = parts.path or "/"
+        self.query: Dict[str, List[str]] = parse_qs(parts.query)
+        self.headers = headers
+        self.body = body
+
+    def arg(self, name: str, default=None, type: Callable = str):
+        """First query value converted with ``type`` (default on missing / invalid)."""
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return type(values[0])
+        except (TypeError, ValueError):
+            return default
+
+    def args(self, name: str) -> List[str]:
+        return self.query.get(name, [])
+
+    def json(self) -> Optional[Any]:
+        """Body as JSON, or None when empty / not JSON."""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class Response:
+    """Response with a byte body or a blocking chunk iterator (sent chunked)."""
+
+    __slots__ = ("status", "body", "headers", "stream")
+
+    def __init__(self, status: int = 200, body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+                 stream=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.stream = stream
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> "Response":
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        return cls(status, body, {"Content-Type": "application/json"})
+
+    @classmethod
+    def html(cls, text: str) -> "Response":
+        return cls(200, text.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+
+
+class AsyncAPIServer:
+    """Serves APIServer's routes from a single asyncio event loop."""
+
+    def __init__(self, api, host: Optional[str] = None, port: Optional[int] = None,
+                 workers: Optional[int] = None, max_body: int = 1024 * 1024,
+                 keepalive_s: float = 15.0):
+        """
+        Args:
+            api: APIServer whose route logic is served
+            host: Bind address (default: api.host)
+            port: Bind port (default: api.port)
+            workers: Executor threads for blocking work (env SEBAS_API_WORKERS, default 8)
+            max_body: Largest accepted request body in bytes
+            keepalive_s: Idle time before a keep-alive connection is closed
+        """
+        if workers is None:
+            workers = int(os.environ.get("SEBAS_API_WORKERS", 8))
+
+        self.api = api
+        self.host = host or api.host
+        self.port = port if port is not None else api.port
+        self.workers = max(1, workers)
+        self.max_body = max_body
+        self.keepalive_s = keepalive_s
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self.running = False
+
+        self._routes: Dict[str, Tuple[Tuple[str, ...], Callable]] = {}
+        self._register_routes()
+
+        # Metrics
+        self.connections = 0
+        self.open_connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+        self.route_counts: Dict[str, int] = {}
+
+    # ------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------
+    def route(self, path: str, methods: Tuple[str, ...] = ("GET",)):
+        def decorator(handler):
+            self._routes[path] = (methods, handler)
+            return handler
+        return decorator
+
+    async def run_blocking(self, fn: Callable, *args):
+        """Run ``fn(*args)`` on the executor without blocking the loop."""
+        return await self.loop.run_in_executor(self.executor, fn, *args)
+
+    def _register_routes(self):
+        api = self.api
+
+        @self.route("/")
+        async def root(request):
+            return Response.json(api.root_info())
+
+        @self.route("/api/v1/health")
+        async def health(request):
+            return Response.json(api.health_info())
+
+        @self.route("/api/v1/version")
+        async def version(request):
+            return Response.json(api.version_info())
+
+        @self.route("/api/v1/parse", ("POST",))
+        async def parse_command(request):
+            body, status = await self.run_blocking(api.handle_parse, request.json())
+            return Response.json(body, status)
+
+        @self.route("/api/v1/status")
+        async def status(request):
+            body, status_code = await self.run_blocking(api.status_info)
+            return Response.json(body, status_code)
+
+        @self.route("/api/v1/tts", ("GET", "POST"))
+        async def tts(request):
+            data = request.json() if request.method == "POST" else None
+            data = data if isinstance(data, dict) else {}
+            text = str(data.get("text") or request.arg("text", "")).strip()
+            audio_format = str(data.get("format") or request.arg("format", "wav")).lower()
+
+            chunks, headers = await self.run_blocking(api.open_tts, text, audio_format)
+            if isinstance(chunks, dict):
+                return Response.json(chunks, headers)
+            return Response(200, headers=headers, stream=chunks)
+
+        @self.route("/api/v1/latency")
+        async def latency(request):
+            return Response.json(api.latency_info(request.arg("recent", 5, int)))
+
+        @self.route("/api/v1/latency/trace")
+        async def latency_trace(request):
+            response = Response.json(get_tracer().export_chrome_trace())
+            response.headers["Content-Disposition"] = "attachment; filename=sebas_trace.json"
+            return response
+
+        @self.route("/api/v1/events")
+        async def event_stats(request):
+            body, status = api.event_stats()
+            body["server"] = self.get_stats()
+            return Response.json(body, status)
+
+        @self.route("/api/v1/events/history")
+        async def event_history(request):
+            body, status = api.event_history(
+                topics=request.args("topic") or None,
+                since=request.arg("since", type=float),
+                until=request.arg("until", type=float),
+                source=request.arg("source"),
+                limit=request.arg("limit", 100, int),
+            )
+            return Response.json(body, status)
+
+        @self.route("/api/docs")
+        async def swagger_ui(request):
+            return Response.html(SWAGGER_UI_HTML)
+
+        @self.route("/api/swagger.json")
+        async def swagger_json(request):
+            return Response.json(create_swagger_spec())
+
+        self._routes["/api/openapi.json"] = self._routes["/api/swagger.json"]
+
+    # ------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_s)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Chunked request bodies are not supported")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length")
+        if length > self.max_body:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, headers, body, version.strip().upper())
+
+    async def _dispatch(self, request: Request) -> Response:
+        if request.method == "OPTIONS":
+            return Response(200)  # CORS preflight (headers are added to every response)
+
+        entry = self._routes.get(request.path.rstrip("/") or "/")
+        if entry is None:
+            return Response.json({"error": "not_found", "path": request.path}, 404)
+        methods, handler = entry
+        if request.method not in methods and not (request.method == "HEAD" and "GET" in methods):
+            return Response.json({"error": "method_not_allowed"}, 405)
+
+        self.route_counts[request.path] = self.route_counts.get(request.path, 0) + 1
+        try:
+            return await handler(request)
+        except Exception as ex:
+            self.errors += 1
+            logging.exception(f"[AsyncAPI] {request.method} {request.path} failed")
+            return Response.json({"ok": False, "error": "exception", "message": str(ex)}, 500)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, request: Optional[Request],
+                              response: Response, keep_alive: bool):
+        try:
+            reason = HTTPStatus(response.status).phrase
+        except ValueError:
+            reason = ""
+        headers = dict(_CORS_HEADERS)
+        headers.update(response.headers)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        if response.stream is not None:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(len(response.body))
+
+        head = f"HTTP/1.1 {response.status} {reason}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+
+        if request is not None and request.method == "HEAD":
+            await writer.drain()
+            return
+        if response.stream is None:
+            writer.write(response.body)
+            await writer.drain()
+            return
+
+        # Blocking generator (e.g. TTS synthesis): pull each chunk on the executor
+        chunks = response.stream
+        try:
+            while True:
+                chunk = await self.run_blocking(next, chunks, _EOF)
+                if chunk is _EOF:
+                    break
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()  # slow client -> stop pulling chunks
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                await self.run_blocking(close)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.open_connections += 1
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as err:
+                    await self._write_response(writer, None, Response.json({"error": str(err)}, err.status), False)
+                    break
+                if request is None:
+                    break
+
+                self.requests += 1
+                self.in_flight += 1
+                started = time.perf_counter()
+                try:
+                    response = await self._dispatch(request)
+                    keep_alive = request.keep_alive
+                    await self._write_response(writer, request, response, keep_alive)
+                finally:
+                    self.in_flight -= 1
+                logging.debug(f"[AsyncAPI] {request.method} {request.path} -> {response.status} "
+                              f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        except asyncio.CancelledError:
+            pass  # Server stopping (swallowed: 3.11 streams log cancelled handler tasks as errors)
+        except Exception:
+            logging.exception("[AsyncAPI] connection error")
+        finally:
+            self.open_connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------
+    # Lifetime
+    # ------------------------------------------------------------
+    async def serve(self):
+        """Serve on the running loop until cancelled."""
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="SebasAPIWorker")
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # port=0 -> the one picked
+        self.running = True
+        self._ready.set()
+        logging.info(f"[AsyncAPI] Serving on http://{self.host}:{self.port} ({self.workers} workers)")
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self.running = False
+            self.executor.shutdown(wait=False)
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """Run the server loop on a background thread; True once listening."""
+        if self._thread and self._thread.is_alive():
+            logging.warning("[AsyncAPI] already running")
+            return True
+
+        def _run():
+            try:
+                asyncio.run(self.serve())
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logging.exception("[AsyncAPI] server error")
+            finally:
+                self._ready.set()
+
+        self._ready.clear()
+        self._thread = threading.Thread(target=_run, daemon=True, name="SebasAsyncAPI")
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self.running
+
+    def stop(self, timeout: float = 2.0):
+        if self.loop is None or self._task is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._task.cancel)  # asyncio.run() then cancels the connections
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        return {
+            'running': self.running,
+            'workers': self.workers,
+            'connections': self.connections,
+            'open_connections': self.open_connections,
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'errors': self.errors,
+            'routes': dict(self.route_counts),
+        }
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+EventBus -> WebSocket Bridge - Stage 2
+Coalesces bursty bus events into per-client frames.
+
+    * Routes: a bus topic or pattern ("stt.partial_transcript", "metrics.**")
+      is forwarded to a room. Route callbacks only append to the room's
+      pending batch, so the emitting thread (STT, audio) never touches a
+      socket.
+    * Frames: every ``frame_ms`` the flusher drains each room batch once
+      and merges it into the backlog of every member client; each client
+      then gets at most one 'frame' message per tick carrying all its
+      events, oldest first.
+    * Latest-wins: for topics routed with ``latest_wins`` only the newest
+      pending value is kept (partial transcripts, levels, gauges); a newer
+      value replaces the older one instead of queueing behind it. A route
+      may also ``supersede`` another key (a final transcript drops the
+      pending partial).
+    * Send buffers: frames are sent with an ack callback and each client
+      may have at most ``max_inflight`` unacknowledged frames. While a
+      slow browser is out of credit, its events wait in a backlog capped
+      at ``max_client_events`` (oldest dropped, counted in the next frame),
+      so server memory per client stays bounded. Frames not acked within
+      ``ack_timeout_ms`` are written off (clients that never ack still get
+      updates, just slower).
+
+Frame payload:
+    {"seq": 12, "dropped": 0, "events": [{"type": ..., "data": ..., "ts": ...}]}
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sebas.events.event_bus import DELIVERY_INLINE
+
+ROOM_ALL = "*"  # every connected client
+
+
+def json_safe(value):
+    """
+    Event payloads can be arbitrary objects (intents etc.): objects with a
+    to_dict() (CommandResult, traces) keep their structure, others fall back to str().
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if callable(getattr(value, "to_dict", None)):
+        try:
+            return json_safe(value.to_dict())
+        except Exception:
+            return str(value)
+    if isinstance(value, dict):
+        return {str(k): json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return str(value)
+
+
+class _Batch:
+    """Ordered pending events with latest-wins replacement."""
+
+    __slots__ = ("events", "latest", "live", "dropped", "limit")
+
+    def __init__(self, limit: int):
+        self.events: deque = deque()   # [key, supersedes, event]; event None = replaced
+        self.latest: Dict[str, list] = {}
+        self.live = 0
+        self.dropped = 0
+        self.limit = limit
+
+    def add(self, key: Optional[str], event: Any, supersedes: Optional[str] = None):
+        for old_key in (key, supersedes):
+            if old_key is not None:
+                old = self.latest.pop(old_key, None)
+                if old is not None:
+                    old[2] = None
+                    self.live -= 1
+
+        entry = [key, supersedes, event]
+        self.events.append(entry)
+        self.live += 1
+        if key is not None:
+            self.latest[key] = entry
+
+        while self.events and (self.events[0][2] is None or self.live > self.limit):
+            old = self.events.popleft()
+            if old[2] is not None:  # over the limit: oldest live event goes
+                self.live -= 1
+                self.dropped += 1
+                if self.latest.get(old[0]) is old:
+                    del self.latest[old[0]]
+
+    def take(self) -> List[tuple]:
+        """Drain as (key, supersedes, event) tuples."""
+        drained = [tuple(entry) for entry in self.events if entry[2] is not None]
+        self.events.clear()
+        self.latest.clear()
+        self.live = 0
+        return drained
+
+
+class _Client:
+    __slots__ = ("sid", "rooms", "backlog", "inflight", "seq", "frames", "events", "timeouts")
+
+    def __init__(self, sid: str, limit: int):
+        self.sid = sid
+        self.rooms: Set[str] = {ROOM_ALL}
+        self.backlog = _Batch(limit)
+        self.inflight: Dict[int, float] = {}  # seq -> send time of unacknowledged frames
+        self.seq = 0
+        self.frames = 0
+        self.events = 0
+        self.timeouts = 0
+
+
+class WebSocketBridge:
+    """Batches EventBus events into bounded per-client frames."""
+
+    def __init__(self, send: Callable[[str, dict, Callable], None],
+                 frame_ms: Optional[float] = None,
+                 max_client_events: Optional[int] = None,
+                 max_inflight: int = 4,
+                 ack_timeout_ms: Optional[float] = None):
+        """
+        Args:
+            send: Transport, ``send(sid, frame, ack_callback)``
+            frame_ms: Flush interval (env SEBAS_WS_FRAME_MS, default 50)
+            max_client_events: Backlog cap per client and per room batch
+                (env SEBAS_WS_CLIENT_BUFFER, default 500)
+            max_inflight: Unacknowledged frames allowed per client
+            ack_timeout_ms: When an unacked frame is written off
+                (env SEBAS_WS_ACK_TIMEOUT_MS, default 1000)
+        """
+        if frame_ms is None:
+            frame_ms = float(os.environ.get("SEBAS_WS_FRAME_MS", 50))
+        if max_client_events is None:
+            max_client_events = int(os.environ.get("SEBAS_WS_CLIENT_BUFFER", 500))
+        if ack_timeout_ms is None:
+            ack_timeout_ms = float(os.environ.get("SEBAS_WS_ACK_TIMEOUT_MS", 1000))
+
+        self.send = send
+        self.frame_s = max(1.0, frame_ms) / 1000.0
+        self.max_client_events = max(1, max_client_events)
+        self.max_inflight = max(1, max_inflight)
+        self.ack_timeout_s = max(0.0, ack_timeout_ms) / 1000.0
+
+        self._lock = threading.Lock()
+        self._rooms: Dict[str, _Batch] = {}
+        self._clients: Dict[str, _Client] = {}
+        self._routes: list = []  # (bus, Subscription, room)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Metrics
+        self.published = 0
+        self.frames_sent = 0
+        self.events_sent = 0
+        self.send_errors = 0
+
+    # ------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------
+    def route(self, event_bus, pattern: str, room: str = ROOM_ALL, name: Optional[str] = None,
+              latest_wins: bool = False, supersedes: Optional[str] = None):
+        """
+        Forward bus events matching ``pattern`` to ``room``.
+
+        Args:
+            event_bus: Core EventBus
+            pattern: Topic or wildcard pattern
+            room: Target room (ROOM_ALL = every client)
+            name: Event type sent to clients (default: the bus topic)
+            latest_wins: Keep only the newest pending value per type
+            supersedes: Type whose pending value this event discards
+        """
+        def forward(topic, data):
+            self.publish(room, name or topic, data, latest_wins, supersedes)
+
+        forward.__qualname__ = f"WebSocketBridge[{pattern}->{room}]"
+        subscription = event_bus.subscribe(pattern, forward, mode=DELIVERY_INLINE, with_topic=True)
+        with self._lock:
+            self._routes.append((event_bus, subscription, room))
+        self.start()
+        return subscription
+
+    def has_route(self, room: str) -> bool:
+        with self._lock:
+            return any(r == room for _, _, r in self._routes)
+
+    def unroute(self, room: str) -> int:
+        """Remove every route into ``room`` and its pending batch; returns routes removed."""
+        with self._lock:
+            removed = [(bus, sub) for bus, sub, r in self._routes if r == room]
+            self._routes = [entry for entry in self._routes if entry[2] != room]
+            self._rooms.pop(room, None)
+        for bus, subscription in removed:
+            bus.unsubscribe(subscription)
+        return len(removed)
+
+    def publish(self, room: str, event_type: str, data: Any, latest_wins: bool = False,
+                supersedes: Optional[str] = None):
+        """Queue one event for the room's next frame (cheap, any thread)."""
+        event = (event_type, data, time.time())
+        with self._lock:
+            batch = self._rooms.get(room)
+            if batch is None:
+                batch = self._rooms[room] = _Batch(self.max_client_events)
+            batch.add(event_type if latest_wins else None, event, supersedes)
+            self.published += 1
+
+    # ------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------
+    def add_client(self, sid: str):
+        with self._lock:
+            self._clients.setdefault(sid, _Client(sid, self.max_client_events))
+
+    def remove_client(self, sid: str):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def join(self, sid: str, room: str):
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                client = self._clients[sid] = _Client(sid, self.max_client_events)
+            client.rooms.add(room)
+
+    def leave(self, sid: str, room: str):
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is not None and room != ROOM_ALL:
+                client.rooms.discard(room)
+
+    # ------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="WebSocketBridge")
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.frame_s):
+            try:
+                self.flush()
+            except Exception:
+                logging.exception("[WebSocketBridge] flush failed")
+
+    def flush(self):
+        """Fan room batches out to client backlogs and send what credit allows."""
+        now = time.time()
+        outgoing = []
+        with self._lock:
+            drained = {room: batch.take() for room, batch in self._rooms.items() if batch.live}
+            room_dropped = {room: batch.dropped for room, batch in self._rooms.items() if batch.dropped}
+            for room in room_dropped:
+                self._rooms[room].dropped = 0
+
+        # Payload conversion happens once per event (not per client) and outside the lock
+        for room, entries in drained.items():
+            drained[room] = [(key, supersedes, {"type": e[0], "data": json_safe(e[1]), "ts": e[2]})
+                             for key, supersedes, e in entries]
+
+        with self._lock:
+            for client in self._clients.values():
+                for room in client.rooms:
+                    for key, supersedes, event in drained.get(room, ()):
+                        client.backlog.add(key, event, supersedes)
+                    client.backlog.dropped += room_dropped.get(room, 0)
+
+                for seq, sent_at in list(client.inflight.items()):  # oldest first
+                    if now - sent_at <= self.ack_timeout_s:
+                        break
+                    del client.inflight[seq]  # a late ack for it is ignored
+                    client.timeouts += 1
+                if not (client.backlog.live or client.backlog.dropped) \
+                        or len(client.inflight) >= self.max_inflight:
+                    continue
+
+                dropped = client.backlog.dropped
+                client.backlog.dropped = 0
+                events = [event for _, _, event in client.backlog.take()]
+                events.sort(key=lambda e: e["ts"])  # rooms were merged one after another
+                client.seq += 1
+                client.inflight[client.seq] = now
+                client.frames += 1
+                client.events += len(events)
+                outgoing.append((client.sid, {"seq": client.seq, "dropped": dropped, "events": events}))
+
+        for sid, frame in outgoing:
+            try:
+                self.send(sid, frame, self._ack_callback(sid, frame["seq"]))
+                self.frames_sent += 1
+                self.events_sent += len(frame["events"])
+            except Exception:
+                self.send_errors += 1
+                self._ack(sid, frame["seq"])
+                logging.exception(f"[WebSocketBridge] send to {sid} failed")
+
+    def _ack_callback(self, sid: str, seq: int) -> Callable:
+        return lambda *args: self._ack(sid, seq)
+
+    def _ack(self, sid: str, seq: int):
+        """Release the credit of frame ``seq`` (no-op if it already timed out)."""
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is not None:
+                client.inflight.pop(seq, None)
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        with self._lock:
+            routes, self._routes = self._routes, []
+        for bus, subscription, _ in routes:
+            bus.unsubscribe(subscription)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            clients = {
+                sid: {
+                    'rooms': sorted(c.rooms),
+                    'backlog': c.backlog.live,
+                    'inflight': len(c.inflight),
+                    'frames': c.frames,
+                    'events': c.events,
+                    'ack_timeouts': c.timeouts,
+                }
+                for sid, c in self._clients.items()
+            }
+            routes = [f"{sub.event_name}->{room}" for _, sub, room in self._routes]
+        return {
+            'frame_ms': round(self.frame_s * 1000, 1),
+            'routes': routes,
+            'published': self.published,
+            'frames_sent': self.frames_sent,
+            'events_sent': self.events_sent,
+            'send_errors': self.send_errors,
+            'clients': clients,
+        }
@@ -3,36 +3,76 @@
 Rate Limiting Framework
 """
 
+import math
+import os
+import threading
 import time
 import logging
+from collections import OrderedDict
 from typing import Dict, Tuple, Optional
-from sebas.collections import defaultdict
 from sebas.functools import wraps
 from sebas.flask import request, jsonify, g
 
 
+class _WindowCounter:
+    """Sliding-window-counter state of one identifier (constant size)."""
+
+    __slots__ = ("window", "window_start", "current", "previous", "last_seen")
+
+    def __init__(self, window: float, now: float):
+        self.window = window
+        self.window_start = now - now % window
+        self.current = 0
+        self.previous = 0
+        self.last_seen = now
+
+
 class RateLimiter:
     """
-    Rate limiter using token bucket algorithm.
+    Sliding-window-counter rate limiter.
     Supports per-IP and per-API-key limiting.
+    
+    Each identifier keeps two counters - requests in the current fixed
+    window and in the previous one - and the count over the last
+    ``window`` seconds is estimated as
+    
+        previous * (1 - elapsed_fraction_of_current_window) + current
+    
+    so a check is O(1) in time and memory regardless of the limit.
+    Identifiers live in one LRU map per window length, so every map's
+    least recently seen entry is also the first to go idle: entries idle
+    for two of their windows carry no state worth keeping and are evicted
+    as new requests come in (a busy 1 h key cannot shield idle 60 s keys),
+    and all maps together never exceed ``max_identifiers``. Thread-safe.
     """
     
-    def __init__(self, default_rate: int = 100, default_window: int = 60):
+    def __init__(self, default_rate: int = 100, default_window: int = 60,
+                 max_identifiers: Optional[int] = None):
         """
         Initialize rate limiter.
         
         Args:
             default_rate: Default requests per window
             default_window: Default time window in seconds
+            max_identifiers: Tracked identifiers before the least recently
+                seen are dropped (env SEBAS_RATE_LIMIT_MAX_KEYS, default 100000)
         """
+        if max_identifiers is None:
+            max_identifiers = int(os.environ.get("SEBAS_RATE_LIMIT_MAX_KEYS", 100000))
+        
         self.default_rate = default_rate
         self.default_window = default_window
+        self.max_identifiers = max(1, max_identifiers)
         
-        # Store request counts: {identifier: [(timestamp, count), ...]}
-        self.requests: Dict[str, list] = defaultdict(list)
+        # Per window length, least recently seen first: {window: {key: _WindowCounter}}
+        self._by_window: "Dict[float, OrderedDict[str, _WindowCounter]]" = {}
+        self._tracked = 0
+        self._lock = threading.Lock()
         
         # Custom limits per identifier: {identifier: (rate, window)}
         self.custom_limits: Dict[str, Tuple[int, int]] = {}
+        
+        self.evicted = 0
     
     def set_limit(self, identifier: str, rate: int, window: int):
         """
@@ -56,22 +96,33 @@ class RateLimiter:
         # Fall back to IP address
         return f"ip:{request.remote_addr or 'unknown'}"
     
-    def _cleanup_old_requests(self, identifier: str, window: int):
-        """Remove requests outside the time window."""
-        current_time = time.time()
-        cutoff = current_time - window
+    def _evict_idle(self, now: float):
+        """Drop identifiers idle for two windows, then the least recently seen over the cap (lock held)."""
+        for window, counters in list(self._by_window.items()):
+            idle_before = now - 2 * window
+            while counters and next(iter(counters.values())).last_seen <= idle_before:
+                counters.popitem(last=False)  # Usually none - amortized O(1) per check
+                self._tracked -= 1
+                self.evicted += 1
+            if not counters:
+                del self._by_window[window]
         
-        self.requests[identifier] = [
-            (ts, count) for ts, count in self.requests[identifier]
-            if ts > cutoff
-        ]
+        while self._tracked > self.max_identifiers:
+            # Oldest head across the (few) window lengths
+            counters = min(self._by_window.values(), key=lambda c: next(iter(c.values())).last_seen)
+            counters.popitem(last=False)
+            self._tracked -= 1
+            self.evicted += 1
     
-    def check_rate_limit(self, identifier: Optional[str] = None) -> Tuple[bool, Dict[str, int]]:
+    def check_rate_limit(self, identifier: Optional[str] = None, rate: Optional[int] = None,
+                         window: Optional[int] = None) -> Tuple[bool, Dict[str, int]]:
         """
-        Check if request is within rate limit.
+        Check if request is within rate limit (and count it when it is).
         
         Args:
             identifier: Optional identifier (defaults to current request identifier)
+            rate: Override requests per window (default: custom or default limit)
+            window: Override window in seconds
             
         Returns:
             Tuple of (allowed, info_dict)
@@ -81,41 +132,76 @@ class RateLimiter:
             identifier = self._get_identifier()
         
         # Get limits for this identifier
-        rate, window = self.custom_limits.get(identifier, (self.default_rate, self.default_window))
-        
-        current_time = time.time()
-        
-        # Clean up old requests
-        self._cleanup_old_requests(identifier, window)
-        
-        # Count requests in current window
-        request_count = sum(count for _, count in self.requests[identifier])
+        custom_rate, custom_window = self.custom_limits.get(identifier, (self.default_rate, self.default_window))
+        rate = custom_rate if rate is None else rate
+        window = custom_window if window is None else window
         
-        # Check if limit exceeded
-        if request_count >= rate:
-            reset_time = int(self.requests[identifier][0][0] + window) if self.requests[identifier] else int(current_time + window)
-            return False, {
-                'remaining': 0,
-                'reset_time': reset_time,
-                'limit': rate
-            }
+        # An endpoint with its own window gets its own counter
+        key = identifier if window == custom_window else f"{identifier}@{window}s"
         
-        # Add current request
-        self.requests[identifier].append((current_time, 1))
-        
-        remaining = rate - request_count - 1
-        reset_time = int(current_time + window)
+        now = time.time()
+        with self._lock:
+            counters = self._by_window.get(window)
+            if counters is None:
+                counters = self._by_window[window] = OrderedDict()
+            counter = counters.get(key)
+            if counter is None:  # new (after set_limit() the old window's entry just idles out)
+                counter = counters[key] = _WindowCounter(window, now)
+                self._tracked += 1
+            counters.move_to_end(key)
+            
+            # Roll the fixed windows forward
+            elapsed_windows = int((now - counter.window_start) // window)
+            if elapsed_windows >= 1:
+                counter.previous = counter.current if elapsed_windows == 1 else 0
+                counter.current = 0
+                counter.window_start += elapsed_windows * window
+            counter.last_seen = now
+            
+            fraction = (now - counter.window_start) / window
+            estimate = counter.previous * (1.0 - fraction) + counter.current
+            allowed = estimate + 1 <= rate
+            if allowed:
+                counter.current += 1
+                estimate += 1
+            
+            reset_time = self._reset_time(counter, rate, window, now)
+            remaining = max(0, int(rate - estimate))
+            
+            self._evict_idle(now)
         
-        return True, {
+        return allowed, {
             'remaining': remaining,
             'reset_time': reset_time,
             'limit': rate
         }
     
+    @staticmethod
+    def _reset_time(counter: _WindowCounter, rate: int, window: int, now: float) -> int:
+        """Unix time at which the next request fits again (now when it already does)."""
+        start, previous, current = counter.window_start, counter.previous, counter.current
+        if current + 1 > rate:
+            # Only the next window helps; there this window becomes "previous"
+            start, previous, current = start + window, current, 0
+        if previous == 0:
+            return int(math.ceil(max(now, start)))
+        # previous * (1 - f) + current + 1 <= rate  ->  f >= 1 - (rate - current - 1) / previous
+        fraction = max(0.0, 1.0 - (rate - current - 1) / previous)
+        return int(math.ceil(max(now, start + fraction * window)))
+    
     def is_allowed(self, identifier: Optional[str] = None) -> bool:
         """Check if request is allowed (simplified version)."""
         allowed, _ = self.check_rate_limit(identifier)
         return allowed
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            tracked = self._tracked
+        return {
+            'tracked_identifiers': tracked,
+            'max_identifiers': self.max_identifiers,
+            'evicted': self.evicted,
+        }
 
 
 # Global rate limiter instance
@@ -156,10 +242,19 @@ def rate_limit(rate: int = 100, window: int = 60, per: str = 'ip'):
                 if api_key:
                     identifier = f"api_key:{api_key[:16]}"
             
-            allowed, info = limiter.check_rate_limit(identifier)
+            allowed, info = limiter.check_rate_limit(identifier, rate=rate, window=window)
             
-            # Add rate limit headers
-            response = func(*args, **kwargs)
+            # Rejected requests never reach the endpoint
+            if not allowed:
+                response = jsonify({
+                    'error': 'Rate limit exceeded',
+                    'message': f'Too many requests. Limit: {rate} per {window} seconds',
+                    'reset_time': info['reset_time']
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, info['reset_time'] - int(time.time())))
+            else:
+                response = func(*args, **kwargs)
             
             # Set rate limit headers (works for both regular responses and jsonify)
             if hasattr(response, 'headers'):
@@ -167,13 +262,6 @@ def rate_limit(rate: int = 100, window: int = 60, per: str = 'ip'):
                 response.headers['X-RateLimit-Remaining'] = str(info['remaining'])
                 response.headers['X-RateLimit-Reset'] = str(info['reset_time'])
             
-            if not allowed:
-                return jsonify({
-                    'error': 'Rate limit exceeded',
-                    'message': f'Too many requests. Limit: {rate} per {window} seconds',
-                    'reset_time': info['reset_time']
-                }), 429
-            
             return response
         return wrapper
     return decorator
@@ -7,6 +7,39 @@ Phase 1.3.6: API Documentation
 from sebas.flask import Blueprint, jsonify
 from typing import Dict, Any
 
+SWAGGER_UI_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>SEBAS API Documentation</title>
+    <link rel="stylesheet" type="text/css" href="https://unpkg.com/swagger-ui-dist@3.25.0/swagger-ui.css" />
+</head>
+<body>
+    <div id="swagger-ui"></div>
+    <script src="https://unpkg.com/swagger-ui-dist@3.25.0/swagger-ui-bundle.js"></script>
+    <script>
+        window.onload = function() {
+            SwaggerUIBundle({
+                url: "/api/swagger.json",
+                dom_id: '#swagger-ui'
+            });
+        };
+    </script>
+</body>
+</html>
+"""
+
+
+def _json_response(description: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "description": description,
+        "content": {
+            "application/json": {
+                "schema": {"type": "object", "properties": properties}
+            }
+        }
+    }
+
 
 def create_swagger_spec() -> Dict[str, Any]:
     """
@@ -27,7 +60,7 @@ def create_swagger_spec() -> Dict[str, Any]:
         },
         "servers": [
             {
-                "url": "http://127.0.0.1:5001",
+                "url": "http://127.0.0.1:5002",
                 "description": "Development server"
             }
         ],
@@ -55,6 +88,97 @@ def create_swagger_spec() -> Dict[str, Any]:
                     }
                 }
             },
+            "/api/v1/version": {
+                "get": {
+                    "summary": "API version",
+                    "responses": {
+                        "200": _json_response("Version information", {
+                            "api_version": {"type": "string"},
+                            "nlu": {"type": "boolean"},
+                            "skills_loaded": {"type": "integer"}
+                        })
+                    }
+                }
+            },
+            "/api/v1/parse": {
+                "post": {
+                    "summary": "Parse and execute a text command",
+                    "description": "Runs the text through NLU and the matching skill",
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "required": ["text"],
+                                    "properties": {
+                                        "text": {"type": "string", "example": "what time is it"}
+                                    }
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": _json_response("Command handled", {
+                            "ok": {"type": "boolean"},
+                            "response": {"type": "string"},
+                            "status": {"type": "string", "example": "handled"},
+                            "intent": {"type": "string"},
+                            "slots": {"type": "object"},
+                            "confidence": {"type": "number"},
+                            "spoken": {"type": "string"},
+                            "timings_ms": {"type": "object"},
+                            "skill_response": {"type": "object"},
+                            "text": {"type": "string"}
+                        }),
+                        "400": {"description": "Empty command"},
+                        "503": {"description": "SEBAS not initialized"}
+                    }
+                }
+            },
+            "/api/v1/tts": {
+                "get": {
+                    "summary": "Synthesize speech",
+                    "description": "Chunked WAV or raw int16 PCM (rate in X-Sample-Rate)",
+                    "parameters": [
+                        {"name": "text", "in": "query", "required": True, "schema": {"type": "string"}},
+                        {"name": "format", "in": "query", "schema": {"type": "string", "enum": ["wav", "pcm"]}}
+                    ],
+                    "responses": {
+                        "200": {"description": "Audio stream"},
+                        "400": {"description": "Empty text or bad format"},
+                        "503": {"description": "TTS voice not available"}
+                    }
+                }
+            },
+            "/api/v1/latency": {
+                "get": {
+                    "summary": "Voice pipeline latency histograms",
+                    "parameters": [
+                        {"name": "recent", "in": "query", "schema": {"type": "integer", "default": 5}}
+                    ],
+                    "responses": {"200": {"description": "Per-stage latency statistics"}}
+                }
+            },
+            "/api/v1/events": {
+                "get": {
+                    "summary": "EventBus and WebSocket bridge metrics",
+                    "responses": {"200": {"description": "Event metrics"}}
+                }
+            },
+            "/api/v1/events/history": {
+                "get": {
+                    "summary": "Recent events",
+                    "parameters": [
+                        {"name": "topic", "in": "query", "schema": {"type": "array", "items": {"type": "string"}}},
+                        {"name": "since", "in": "query", "schema": {"type": "number"}},
+                        {"name": "until", "in": "query", "schema": {"type": "number"}},
+                        {"name": "source", "in": "query", "schema": {"type": "string"}},
+                        {"name": "limit", "in": "query", "schema": {"type": "integer", "default": 100}}
+                    ],
+                    "responses": {"200": {"description": "Events, oldest first"}}
+                }
+            },
             "/api/v1/status": {
                 "get": {
                     "summary": "Get system status",
@@ -254,27 +378,7 @@ def register_swagger_routes(app):
     @app.route('/api/docs', methods=['GET'])
     def swagger_ui():
         """Swagger UI page."""
-        return """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>SEBAS API Documentation</title>
-    <link rel="stylesheet" type="text/css" href="https://unpkg.com/swagger-ui-dist@3.25.0/swagger-ui.css" />
-</head>
-<body>
-    <div id="swagger-ui"></div>
-    <script src="https://unpkg.com/swagger-ui-dist@3.25.0/swagger-ui-bundle.js"></script>
-    <script>
-        window.onload = function() {
-            SwaggerUIBundle({
-                url: "/api/swagger.json",
-                dom_id: '#swagger-ui'
-            });
-        };
-    </script>
-</body>
-</html>
-        """
+        return SWAGGER_UI_HTML
     
     @app.route('/api/swagger.json', methods=['GET'])
     def swagger_json():
@@ -7,13 +7,31 @@ Purpose:
         - POST /api/command
         - GET/POST /api/state
         - POST /api/level
+        - GET /api/stream  (server-sent events, replaces status polling)
+
+Push channel:
+    Each browser tab keeps one EventSource open on /api/stream instead of
+    polling. The stream sends
+        event: state   - only the keys that changed since the last frame
+                         (the first frame is the full state); clients merge
+        event: result  - a finished command (CommandResult.to_dict())
+    Frames go out only when something changed, at most one per
+    SEBAS_UI_PUSH_MS (default 50), so a burst of level updates collapses
+    into the latest value. An idle stream sends a comment every
+    SEBAS_UI_KEEPALIVE_S (default 15) so dead tabs are noticed.
 """
 
+import json
+import logging
 import os
 import sys
 import threading
-from typing import Callable, Optional
-from flask import Flask, send_from_directory, request, jsonify
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from flask import Flask, Response, send_from_directory, request, jsonify, stream_with_context
+
+from sebas.api.event_bridge import json_safe
 
 # ============================================================
 #                 GLOBAL STATE + COMMAND HANDLER
@@ -26,7 +44,90 @@ _state = {
     "level": 0.0,
 }
 
-_command_handler: Optional[Callable[[str], str]] = None
+_command_handler: Optional[Callable[..., Any]] = None  # (text, request_id=None) -> CommandResult
+
+
+class _StatePublisher:
+    """Versioned view of ``_state`` that SSE streams wait on."""
+
+    def __init__(self, state: Dict[str, Any], max_results: int = 20):
+        self._state = state
+        self._cond = threading.Condition()
+        self.version = 0
+        self.result_seq = 0
+        self._results: deque = deque(maxlen=max_results)  # (seq, payload)
+
+    def update(self, **changes) -> bool:
+        """Apply state changes; wakes the streams only if a value actually changed."""
+        with self._cond:
+            changed = False
+            for key, value in changes.items():
+                if self._state.get(key) != value:
+                    self._state[key] = value
+                    changed = True
+            if changed:
+                self.version += 1
+                self._cond.notify_all()
+            return changed
+
+    def publish_result(self, payload: Dict[str, Any]):
+        with self._cond:
+            self.result_seq += 1
+            self._results.append((self.result_seq, payload))
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._state)
+
+    def wait(self, version: int, result_seq: int, timeout: float):
+        """
+        Block until the state or the results move past what a stream has seen.
+
+        Returns:
+            (version, state copy, results newer than result_seq, result_seq)
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.version != version or self.result_seq != result_seq, timeout)
+            results = [(seq, payload) for seq, payload in self._results if seq > result_seq]
+            return self.version, dict(self._state), results, self.result_seq
+
+
+_publisher = _StatePublisher(_state)
+
+PUSH_INTERVAL_S = float(os.environ.get("SEBAS_UI_PUSH_MS", 50)) / 1000.0
+KEEPALIVE_S = float(os.environ.get("SEBAS_UI_KEEPALIVE_S", 15))
+
+
+def update_state(**changes) -> bool:
+    """Core-side state update (mic, processing, system, level); pushed to open tabs."""
+    return _publisher.update(**changes)
+
+
+def publish_result(result: Any):
+    """Push a finished command to open tabs."""
+    payload = json_safe(result.to_dict()) if hasattr(result, "to_dict") else {"message": str(result or "")}
+    _publisher.publish_result(payload)
+
+
+def bind_event_bus(event_bus):
+    """
+    Drive the UI state from core events instead of having the UI poll.
+
+    listen_start / listen_end -> mic, command_received -> processing,
+    command_completed -> processing off + a pushed result.
+    """
+    event_bus.subscribe("core.listen_start", lambda _: update_state(mic="listening"))
+    event_bus.subscribe("core.listen_end", lambda _: update_state(mic="idle", level=0.0))
+    event_bus.subscribe("core.command_received", lambda _: update_state(processing=True))
+
+    def completed(result):
+        update_state(processing=False)
+        publish_result(result)
+
+    event_bus.subscribe("core.command_completed", completed)
+    logging.info("[UI] State push bound to EventBus")
 
 
 # ============================================================
@@ -58,8 +159,13 @@ app = Flask(__name__)
 #                 COMMAND HANDLER REGISTRATION
 # ============================================================
 
-def set_command_handler(callback: Callable[[str], str]):
-    """Sebas core registers its parser here."""
+def set_command_handler(callback: Callable[..., Any]):
+    """
+    Sebas core registers its parser here.
+
+    Called as callback(text, request_id=...); the id must come back in the
+    result (CommandResult.request_id) so tabs can match pushed results.
+    """
     global _command_handler
     _command_handler = callback
 
@@ -80,32 +186,66 @@ def static_files(path):
 
 @app.route("/api/state", methods=["GET", "POST"])
 def api_state():
-    global _state
-
     if request.method == "POST":
         data = request.get_json() or {}
-        for key in ("mic", "processing", "system"):
-            if key in data:
-                _state[key] = data[key]
+        update_state(**{key: data[key] for key in ("mic", "processing", "system") if key in data})
         return jsonify({"ok": True})
 
-    return jsonify(_state)
+    return jsonify(_publisher.snapshot())
 
 
 @app.route("/api/level", methods=["POST"])
 def api_level():
-    global _state
     data = request.get_json() or {}
 
     try:
         lvl = float(data.get("level", 0.0))
-        _state["level"] = max(0.0, min(1.0, lvl))
+        # Two decimals: sensor noise below that would push a frame per post
+        update_state(level=round(max(0.0, min(1.0, lvl)), 2))
     except:
-        _state["level"] = 0.0
+        update_state(level=0.0)
 
     return jsonify({"ok": True})
 
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _stream_events():
+    """
+    One tab's SSE stream: full state first, then diffs and results as they happen.
+
+    A reconnecting EventSource starts over with the full state.
+    """
+    sent: Dict[str, Any] = {}
+    version = -1  # forces the initial full-state frame
+    result_seq = _publisher.result_seq  # no replay of commands from before the tab opened
+    yield "retry: 2000\n\n"
+    while True:
+        version, state, results, result_seq = _publisher.wait(version, result_seq, KEEPALIVE_S)
+        diff = {key: value for key, value in state.items() if key not in sent or sent[key] != value}
+        if not diff and not results:
+            yield ": keepalive\n\n"
+            continue
+
+        if diff:
+            sent.update(diff)
+            yield _sse("state", diff)
+        for _, payload in results:
+            yield _sse("result", payload)
+        time.sleep(PUSH_INTERVAL_S)  # coalesce bursts into the next frame
+
+
+@app.route("/api/stream")
+def api_stream():
+    """Server-sent events: state diffs and command results (see module docstring)."""
+    return Response(stream_with_context(_stream_events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
 @app.route("/api/command", methods=["POST"])
 def api_command():
     """Text -> Sebas Core Pipeline"""
@@ -116,13 +256,17 @@ def api_command():
 
     data = request.get_json() or {}
     text = str(data.get("text", "")).strip()
+    request_id = str(data["request_id"])[:64] if data.get("request_id") else None
 
     if not text:
         return jsonify({"ok": False, "error": "empty"}), 400
 
     try:
-        result = _command_handler(text)
-        return jsonify({"ok": True, "result": result or ""})
+        result = _command_handler(text, request_id=request_id)
+        # CommandResult: intent, spoken text, timings and the skill's display fields
+        payload = json_safe(result.to_dict()) if hasattr(result, "to_dict") else {"message": str(result or "")}
+        payload.update({"ok": True, "result": str(result or ""), "request_id": request_id})
+        return jsonify(payload)
     except Exception as ex:
         return jsonify({"ok": False, "error": "exception", "details": str(ex)}), 500
 
@@ -136,7 +280,8 @@ def start_ui_server(host="127.0.0.1", port=5000):
     Runs in background thread.
     """
     def _run():
-        app.run(host=host, port=port, debug=False, use_reloader=False)
+        # threaded: each open /api/stream holds a (mostly sleeping) thread
+        app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
 
     t = threading.Thread(target=_run, daemon=True)
     t.start()
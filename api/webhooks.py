@@ -1,12 +1,44 @@
 # -*- coding: utf-8 -*-
 """
 Webhook Management System
+
+Delivery engine (Stage 2):
+    * Scheduling: pending deliveries sit in a min-heap ordered by their
+      next attempt time. The scheduler thread sleeps on a condition
+      variable until the earliest one is due or a new delivery arrives;
+      nothing is scanned or polled.
+    * Concurrency: due deliveries run on a shared thread pool, each
+      endpoint using its own pooled requests.Session (keep-alive). At
+      most ``Webhook.concurrency`` requests are in flight per endpoint;
+      the rest wait in that endpoint's parked queue in due order.
+    * Retries: connection errors, timeouts, 408, 429 and 5xx are retried
+      with exponential backoff and jitter (Retry-After is honoured);
+      other 4xx answers are final.
+    * Limits: an endpoint holds at most ``Webhook.max_queue`` pending
+      events; new ones beyond that are dropped and counted.
+    * Batching (opt-in, ``Webhook.batch_size`` > 1): events for the
+      endpoint are collected for up to ``batch_size`` items or
+      ``batch_ms`` and POSTed as one signed JSON array (header
+      X-Sebas-Batch: <count>). Batches go out one at a time in order. A
+      2xx answer may carry {"failed": [indices]}; only those events are
+      retried, still in their original order and ahead of later batches.
+
+The signed body is exactly the bytes that are sent (X-Sebas-Signature:
+sha256=HMAC(secret, body)), so receivers can verify the raw request.
 """
 
+import hashlib
+import heapq
+import hmac
+import itertools
 import json
 import logging
+import os
+import random
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from sebas.datetime import datetime
 from sebas.dataclasses import dataclass
@@ -39,8 +71,71 @@ class Webhook:
     secret: Optional[str] = None
     enabled: bool = True
     timeout: int = 5
-    retry_count: int = 3
-    retry_delay: int = 1
+    retry_count: int = 3          # attempts in total
+    retry_delay: int = 1          # first backoff step in seconds
+    max_retry_delay: int = 60     # backoff cap in seconds
+    concurrency: int = 2          # requests in flight to this endpoint
+    max_queue: int = 1000         # pending events before new ones are dropped
+    batch_size: int = 0           # > 1: send events as arrays of up to this many
+    batch_ms: int = 200           # oldest event in a batch waits at most this long
+
+
+class _Delivery:
+    """
+    One payload on its way to one webhook.
+    
+    ``batch`` deliveries carry a list of event payloads; a delivery with
+    payload None is the timer that seals a partly filled batch.
+    """
+
+    __slots__ = ("webhook_id", "webhook", "payload", "batch", "count", "attempts", "next_retry", "created")
+
+    def __init__(self, webhook_id: str, webhook: Webhook, payload: Any, batch: bool = False):
+        self.webhook_id = webhook_id
+        self.webhook = webhook
+        self.payload = payload
+        self.batch = batch
+        self.count = len(payload) if batch else 1  # events still owed
+        self.attempts = 0
+        self.created = time.time()
+        self.next_retry = self.created
+
+
+class _Endpoint:
+    """Per-webhook delivery state: pooled session, concurrency slots, metrics."""
+
+    def __init__(self, webhook_id: str, pool_size: int):
+        self.webhook_id = webhook_id
+        self.pool_size = pool_size
+        self.session = None
+        self.in_flight = 0
+        self.pending = 0  # events in the heap, parked, in flight or being batched
+        self.parked: deque = deque()  # due, waiting for a free slot
+
+        # Batching: collecting -> sealed batches in outbox (head is the only one scheduled)
+        self.collecting: List[Any] = []
+        self.seal_timer: Optional[_Delivery] = None
+        self.outbox: deque = deque()
+        self.batches = 0
+
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.total_ms = 0.0
+
+    def get_session(self):
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        return self.session
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
 
 
 class WebhookManager:
@@ -48,10 +143,25 @@ class WebhookManager:
     Manages webhook subscriptions and delivery.
     """
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Delivery threads shared by all endpoints
+                (env SEBAS_WEBHOOK_WORKERS, default 4)
+        """
+        if workers is None:
+            workers = int(os.environ.get("SEBAS_WEBHOOK_WORKERS", 4))
+        
         self.webhooks: Dict[str, Webhook] = {}
-        self.delivery_queue: List[Dict] = []
-        self.queue_lock = threading.Lock()
+        self.workers = max(1, workers)
+        
+        # Min-heap of (next_retry, seq, delivery)
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
         self.worker_thread: Optional[threading.Thread] = None
         self.running = False
     
@@ -117,18 +227,60 @@ class WebhookManager:
         for webhook_id, webhook in matching_webhooks:
             self._queue_delivery(webhook_id, webhook, payload)
     
-    def _queue_delivery(self, webhook_id: str, webhook: Webhook, payload: Dict):
-        """Queue a webhook delivery."""
-        delivery = {
-            'webhook_id': webhook_id,
-            'webhook': webhook,
-            'payload': payload,
-            'attempts': 0,
-            'next_retry': time.time()
-        }
-        
-        with self.queue_lock:
-            self.delivery_queue.append(delivery)
+    # ------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------
+    def _endpoint(self, webhook_id: str, webhook: Webhook) -> _Endpoint:
+        """Endpoint state (lock held)."""
+        endpoint = self._endpoints.get(webhook_id)
+        if endpoint is None:
+            endpoint = self._endpoints[webhook_id] = _Endpoint(webhook_id, max(1, webhook.concurrency))
+        return endpoint
+    
+    def _queue_delivery(self, webhook_id: str, webhook: Webhook, payload: Any) -> bool:
+        """Queue a webhook delivery; False when the endpoint's queue is full."""
+        with self._cond:
+            endpoint = self._endpoint(webhook_id, webhook)
+            if endpoint.pending >= webhook.max_queue:
+                endpoint.dropped += 1
+                if endpoint.dropped == 1 or endpoint.dropped % 100 == 0:
+                    logging.warning(f"Webhook {webhook_id} queue full ({webhook.max_queue}), "
+                                    f"dropped {endpoint.dropped} deliveries so far")
+                return False
+            endpoint.pending += 1
+            if webhook.batch_size > 1:
+                self._collect(endpoint, webhook, payload)
+            else:
+                self._push(_Delivery(webhook_id, webhook, payload))
+        return True
+    
+    def _collect(self, endpoint: _Endpoint, webhook: Webhook, payload: Any):
+        """Add an event to the endpoint's open batch (lock held)."""
+        endpoint.collecting.append(payload)
+        if len(endpoint.collecting) >= webhook.batch_size:
+            self._seal(endpoint, webhook)
+        elif endpoint.seal_timer is None:
+            timer = _Delivery(endpoint.webhook_id, webhook, None)
+            timer.next_retry = time.time() + webhook.batch_ms / 1000.0
+            endpoint.seal_timer = timer
+            self._push(timer)
+    
+    def _seal(self, endpoint: _Endpoint, webhook: Webhook):
+        """Close the open batch and queue it behind earlier batches (lock held)."""
+        endpoint.seal_timer = None  # a timer still in the heap is now stale
+        if not endpoint.collecting:
+            return
+        delivery = _Delivery(endpoint.webhook_id, webhook, endpoint.collecting, batch=True)
+        endpoint.collecting = []
+        endpoint.outbox.append(delivery)
+        if len(endpoint.outbox) == 1:
+            self._push(delivery)  # nothing ahead of it
+    
+    def _push(self, delivery: _Delivery):
+        """Schedule a delivery (lock held); wakes the scheduler if it is now the earliest."""
+        heapq.heappush(self._heap, (delivery.next_retry, next(self._seq), delivery))
+        if self._heap[0][2] is delivery:
+            self._cond.notify_all()  # flush() may be waiting on the same condition
     
     def _start_worker(self):
         """Start the webhook delivery worker thread."""
@@ -136,88 +288,218 @@ class WebhookManager:
             return
         
         self.running = True
-        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="WebhookDelivery")
+        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True, name="WebhookScheduler")
         self.worker_thread.start()
         logging.info("Webhook delivery worker started")
     
     def _worker_loop(self):
-        """Worker thread loop for delivering webhooks."""
-        while self.running:
-            try:
-                # Process deliveries
-                with self.queue_lock:
-                    ready_deliveries = [
-                        d for d in self.delivery_queue
-                        if d['attempts'] == 0 or time.time() >= d['next_retry']
-                    ]
-                    self.delivery_queue = [
-                        d for d in self.delivery_queue
-                        if d not in ready_deliveries
-                    ]
-                
-                for delivery in ready_deliveries:
-                    self._deliver_webhook(delivery)
+        """Scheduler: sleep until the earliest delivery is due, then dispatch it."""
+        while True:
+            with self._cond:
+                while self.running:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.time()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if not self.running:
+                    return
                 
-                time.sleep(0.1)  # Small delay to prevent busy waiting
-            except Exception:
-                logging.exception("Error in webhook worker loop")
+                _, _, delivery = heapq.heappop(self._heap)
+                endpoint = self._endpoint(delivery.webhook_id, delivery.webhook)
+                if delivery.payload is None:
+                    if delivery is endpoint.seal_timer:
+                        self._seal(endpoint, delivery.webhook)
+                    continue
+                if endpoint.in_flight >= max(1, delivery.webhook.concurrency):
+                    endpoint.parked.append(delivery)  # released by _finish
+                    continue
+                endpoint.in_flight += 1
+            
+            self._submit(delivery)
+    
+    def _submit(self, delivery: _Delivery):
+        try:
+            self._executor.submit(self._run_delivery, delivery)
+        except RuntimeError:
+            pass  # Executor shut down (stop())
+    
+    def _run_delivery(self, delivery: _Delivery):
+        retry_after = None
+        try:
+            retry_after = self._deliver_webhook(delivery)
+        except Exception:
+            logging.exception(f"Webhook {delivery.webhook_id} delivery crashed")
+        finally:
+            self._finish(delivery, retry_after)
+    
+    def _finish(self, delivery: _Delivery, retry_after: Optional[float]):
+        """
+        Release the endpoint slot and reschedule or retire the delivery.
+        
+        Args:
+            retry_after: None when done (delivered or given up), else the
+                delay before the next attempt
+        """
+        next_delivery = None
+        with self._cond:
+            endpoint = self._endpoint(delivery.webhook_id, delivery.webhook)
+            endpoint.in_flight -= 1
+            remaining = 0 if retry_after is None else (len(delivery.payload) if delivery.batch else 1)
+            endpoint.pending -= delivery.count - remaining  # delivered or given up
+            delivery.count = remaining
+            if retry_after is None:
+                if delivery.batch:
+                    endpoint.outbox.popleft()
+                    if endpoint.outbox:
+                        self._push(endpoint.outbox[0])  # next batch, in order
+                if endpoint.pending == 0:
+                    self._cond.notify_all()  # flush() waiters
+            else:
+                endpoint.retries += 1
+                delivery.next_retry = time.time() + retry_after
+                self._push(delivery)
+            if endpoint.parked and endpoint.in_flight < max(1, delivery.webhook.concurrency):
+                next_delivery = endpoint.parked.popleft()
+                endpoint.in_flight += 1
+        if next_delivery is not None:
+            self._submit(next_delivery)
+    
+    # ------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------
+    @staticmethod
+    def _backoff(webhook: Webhook, attempts: int) -> float:
+        """Exponential backoff with equal jitter: half fixed, half random."""
+        delay = min(webhook.max_retry_delay, webhook.retry_delay * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
     
-    def _deliver_webhook(self, delivery: Dict):
-        """Deliver a webhook."""
+    def _sign(self, webhook: Webhook, body: bytes) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if webhook.secret:
+            signature = hmac.new(webhook.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Sebas-Signature'] = f"sha256={signature}"
+        return headers
+    
+    def _deliver_webhook(self, delivery: _Delivery) -> Optional[float]:
+        """
+        Deliver a webhook.
+        
+        Returns:
+            None when finished (delivered or given up), else seconds until the retry
+        """
         if not REQUESTS_AVAILABLE:
             logging.warning("Webhook delivery skipped: requests library not available")
-            return
+            return None
         
-        webhook_id = delivery['webhook_id']
-        webhook = delivery['webhook']
-        payload = delivery['payload']
-        attempts = delivery['attempts']
+        webhook_id = delivery.webhook_id
+        webhook = delivery.webhook
+        endpoint = self._endpoints[webhook_id]
+        delivery.attempts += 1
         
+        body = json.dumps(delivery.payload, sort_keys=True, default=str).encode('utf-8')
+        headers = self._sign(webhook, body)  # one signature per batch, not per event
+        headers['X-Sebas-Attempt'] = str(delivery.attempts)
+        if delivery.batch:
+            headers['X-Sebas-Batch'] = str(len(delivery.payload))
+        
+        retryable = True
+        retry_after = None
+        started = time.perf_counter()
         try:
-            # Add signature if secret is configured
-            headers = {'Content-Type': 'application/json'}
-            if webhook.secret:
-                import hmac
-                import hashlib
-                payload_str = json.dumps(payload, sort_keys=True)
-                signature = hmac.new(
-                    webhook.secret.encode(),
-                    payload_str.encode(),
-                    hashlib.sha256
-                ).hexdigest()
-                headers['X-Sebas-Signature'] = f"sha256={signature}"
-            
-            # Send webhook
-            response = requests.post(
-                webhook.url,
-                json=payload,
-                headers=headers,
-                timeout=webhook.timeout
-            )
-            
+            response = endpoint.get_session().post(webhook.url, data=body, headers=headers,
+                                                   timeout=webhook.timeout)
             if response.status_code < 400:
-                logging.debug(f"Webhook {webhook_id} delivered successfully")
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
+                endpoint.total_ms += (time.perf_counter() - started) * 1000
+                if not delivery.batch:
+                    endpoint.delivered += 1
+                    logging.debug(f"Webhook {webhook_id} delivered successfully")
+                    return None
+                
+                endpoint.batches += 1
+                failed = self._failed_indices(response, len(delivery.payload))
+                endpoint.delivered += len(delivery.payload) - len(failed)
+                if not failed:
+                    logging.debug(f"Webhook {webhook_id} batch of {len(delivery.payload)} delivered")
+                    return None
+                # Partial failure: keep only the rejected events, in order
+                delivery.payload = [delivery.payload[i] for i in failed]
+                raise Exception(f"receiver rejected {len(failed)} of the batch")
             
+            retryable = response.status_code in (408, 429) or response.status_code >= 500
+            header = response.headers.get('Retry-After')
+            if header and header.isdigit():
+                retry_after = float(header)
+            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+        
         except Exception as e:
-            logging.warning(f"Webhook {webhook_id} delivery failed: {e}")
-            attempts += 1
+            logging.warning(f"Webhook {webhook_id} delivery failed (attempt {delivery.attempts}): {e}")
             
             # Retry if attempts remaining
-            if attempts < webhook.retry_count:
-                delivery['attempts'] = attempts
-                delivery['next_retry'] = time.time() + (webhook.retry_delay * attempts)
-                with self.queue_lock:
-                    self.delivery_queue.append(delivery)
-            else:
-                logging.error(f"Webhook {webhook_id} failed after {attempts} attempts")
+            if retryable and delivery.attempts < webhook.retry_count:
+                backoff = self._backoff(webhook, delivery.attempts)
+                return max(backoff, retry_after or 0.0)
+            
+            endpoint.failed += len(delivery.payload) if delivery.batch else 1
+            logging.error(f"Webhook {webhook_id} failed after {delivery.attempts} attempts")
+            return None
+    
+    @staticmethod
+    def _failed_indices(response, size: int) -> List[int]:
+        """Indices a batch receiver reported as failed ({"failed": [...]}) - none when absent."""
+        try:
+            failed = response.json().get('failed') or []
+        except (ValueError, AttributeError):
+            return []
+        return sorted({int(i) for i in failed if isinstance(i, int) and 0 <= i < size})
+    
+    # ------------------------------------------------------------
+    # Lifetime / metrics
+    # ------------------------------------------------------------
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until nothing is pending (delivered or given up); False on timeout."""
+        with self._cond:
+            for endpoint in self._endpoints.values():
+                if endpoint.seal_timer is not None:  # open batch: send it now
+                    self._seal(endpoint, endpoint.seal_timer.webhook)
+            return self._cond.wait_for(
+                lambda: all(e.pending == 0 for e in self._endpoints.values()), timeout)
     
     def stop(self):
         """Stop the webhook manager."""
-        self.running = False
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
         if self.worker_thread:
             self.worker_thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        for endpoint in self._endpoints.values():
+            endpoint.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'scheduled': len(self._heap),
+                'endpoints': {
+                    webhook_id: {
+                        'pending': e.pending,
+                        'in_flight': e.in_flight,
+                        'parked': len(e.parked),
+                        'batching': len(e.collecting),
+                        'batches': e.batches,
+                        'delivered': e.delivered,
+                        'failed': e.failed,
+                        'retries': e.retries,
+                        'dropped': e.dropped,
+                        'avg_ms': round(e.total_ms / e.delivered, 2) if e.delivered else 0.0,
+                    }
+                    for webhook_id, e in self._endpoints.items()
+                },
+            }
 
 
 # Global webhook manager instance
@@ -4,11 +4,13 @@ WebSocket Support for Real-Time Updates
 Phase 1.3.5: Real-time communication
 """
 
-import json
 import logging
+import os
+import re
 import threading
 from typing import Dict, Set, Callable, Optional, Any
 from sebas.enum import Enum
+from sebas.api.event_bridge import WebSocketBridge
 
 # Optional WebSocket support
 try:
@@ -16,12 +18,15 @@ try:
     WEBSOCKET_AVAILABLE = True
 except ImportError:
     try:
-        from sebas.flask_socketio import SocketIO, emit, join_room, leave_room
+        from flask_socketio import SocketIO, emit, join_room, leave_room
         WEBSOCKET_AVAILABLE = True
     except ImportError:
         WEBSOCKET_AVAILABLE = False
         logging.warning("flask-socketio not available. WebSocket support will be disabled.")
 
+if WEBSOCKET_AVAILABLE:
+    from flask import request
+
 
 class WebSocketEvent(Enum):
     """WebSocket event types"""
@@ -30,6 +35,23 @@ class WebSocketEvent(Enum):
     SYSTEM_EVENT = "system.event"
     NOTIFICATION = "notification"
     ERROR = "error"
+    TRANSCRIPT_PARTIAL = "transcript.partial"
+    TRANSCRIPT_FINAL = "transcript.final"
+
+
+# Bus namespaces clients may 'subscribe' to (env SEBAS_WS_TOPICS, comma separated)
+SUBSCRIBABLE_NAMESPACES = tuple(
+    ns.strip() for ns in os.environ.get("SEBAS_WS_TOPICS", "core,stt").split(",") if ns.strip()
+)
+_TOPIC_SEGMENT = re.compile(r"^(?:[A-Za-z0-9_]+|\*|\*\*)$")
+
+
+def is_subscribable(pattern: str) -> bool:
+    """A topic/pattern in an allowed namespace: "core.*" yes, "**" or "secret.*" no."""
+    segments = pattern.split(".")
+    return (len(segments) >= 2
+            and segments[0] in SUBSCRIBABLE_NAMESPACES
+            and all(_TOPIC_SEGMENT.match(seg) for seg in segments))
 
 
 class WebSocketManager:
@@ -47,8 +69,13 @@ class WebSocketManager:
         self.app = flask_app
         self.socketio: Optional[Any] = None
         self.clients: Set[str] = set()  # Connected client IDs
-        self.rooms: Dict[str, Set[str]] = {}  # room -> set of client IDs
+        self.rooms: Dict[str, Set[str]] = {}  # room -> set of socket session IDs
         self.handlers: Dict[str, Callable] = {}
+        self.event_bus = None
+        self._rooms_lock = threading.Lock()  # rooms + subscription routes
+        
+        # EventBus events reach clients as coalesced 'frame' messages
+        self.bridge = WebSocketBridge(self._send_frame)
         
         if WEBSOCKET_AVAILABLE and flask_app:
             self._initialize_socketio()
@@ -87,6 +114,7 @@ class WebSocketManager:
                 return False
             
             self.clients.add(client_id)
+            self.bridge.add_client(request.sid)
             logging.info(f"WebSocket client connected: {client_id}")
             return True
         
@@ -94,8 +122,11 @@ class WebSocketManager:
         def handle_disconnect():
             """Handle client disconnection."""
             # Remove from all rooms
-            for room, clients in self.rooms.items():
-                clients.discard(str(id(self.socketio)))
+            with self._rooms_lock:
+                joined = [room for room, clients in self.rooms.items() if request.sid in clients]
+            for room in joined:
+                self._leave(request.sid, room)
+            self.bridge.remove_client(request.sid)
             
             logging.info("WebSocket client disconnected")
         
@@ -104,10 +135,8 @@ class WebSocketManager:
             """Handle room joining."""
             room = data.get('room')
             if room:
-                join_room(room)
-                if room not in self.rooms:
-                    self.rooms[room] = set()
-                self.rooms[room].add(str(id(self.socketio)))
+                with self._rooms_lock:
+                    self._join(room)
                 logging.debug(f"Client joined room: {room}")
         
         @self.socketio.on('leave_room')
@@ -116,22 +145,61 @@ class WebSocketManager:
             room = data.get('room')
             if room:
                 leave_room(room)
-                if room in self.rooms:
-                    self.rooms[room].discard(str(id(self.socketio)))
+                self._leave(request.sid, room)
                 logging.debug(f"Client left room: {room}")
         
         @self.socketio.on('subscribe')
         def handle_subscribe(data):
-            """Handle event subscription."""
-            event_type = data.get('event_type')
-            if event_type:
-                # Join room for this event type
-                room = f"event:{event_type}"
-                join_room(room)
-                if room not in self.rooms:
-                    self.rooms[room] = set()
-                self.rooms[room].add(str(id(self.socketio)))
-                logging.debug(f"Client subscribed to: {event_type}")
+            """
+            Handle event subscription.
+            
+            ``event_type`` is an EventBus topic or pattern ("core.*") in one
+            of SUBSCRIBABLE_NAMESPACES; its events arrive in 'frame'
+            messages. ``latest_wins`` keeps only the newest pending value
+            per topic (levels, gauges). Each (pattern, latest_wins) pair is
+            its own room and bus route, removed when its last client leaves
+            ('leave_room' with the returned room, or disconnect).
+            """
+            event_type = str(data.get('event_type') or '')
+            if not event_type:
+                return None
+            if not is_subscribable(event_type):
+                logging.warning(f"Rejected WebSocket subscription: {event_type!r}")
+                return {"ok": False, "error": "topic_not_allowed"}
+            
+            latest_wins = bool(data.get('latest_wins'))
+            room = f"event:{event_type}" + (":latest" if latest_wins else "")
+            with self._rooms_lock:
+                self._join(room)
+                if self.event_bus is not None and not self.bridge.has_route(room):
+                    self.bridge.route(self.event_bus, event_type, room=room, latest_wins=latest_wins)
+            logging.debug(f"Client subscribed to: {event_type}")
+            return {"ok": True, "room": room}
+    
+    def _join(self, room: str):
+        """Add the requesting client to a Socket.IO room and the bridge room."""
+        join_room(room)
+        if room not in self.rooms:
+            self.rooms[room] = set()
+        self.rooms[room].add(request.sid)
+        self.bridge.join(request.sid, room)
+    
+    def _leave(self, sid: str, room: str):
+        """Drop a client from a room; the last one out removes a subscription route."""
+        with self._rooms_lock:
+            clients = self.rooms.get(room)
+            if clients is not None:
+                clients.discard(sid)
+            self.bridge.leave(sid, room)
+            if room.startswith("event:") and not clients:
+                self.rooms.pop(room, None)
+                if self.bridge.unroute(room):
+                    logging.debug(f"Removed WebSocket subscription route: {room}")
+    
+    def _send_frame(self, sid: str, frame: Dict[str, Any], ack: Callable):
+        """Bridge transport: one 'frame' message to one client, acked by the client."""
+        if self.socketio:
+            self.socketio.emit('frame', frame, to=sid, callback=ack)
     
     def emit_event(self, event: WebSocketEvent, data: Dict[str, Any], room: Optional[str] = None):
         """
@@ -154,7 +222,8 @@ class WebSocketManager:
             if room:
                 self.socketio.emit('event', payload, room=room)
             else:
-                self.socketio.emit('event', payload, broadcast=True)
+                # Server-side emit without a room reaches every client
+                self.socketio.emit('event', payload)
         except Exception:
             logging.exception("Failed to emit WebSocket event")
     
@@ -191,6 +260,35 @@ class WebSocketManager:
         except Exception:
             logging.exception("Failed to broadcast WebSocket event")
     
+    # ------------------------------------------------------------
+    # EventBus -> clients
+    # ------------------------------------------------------------
+    def bind_event_bus(self, event_bus):
+        """
+        Forward core EventBus events to clients through the coalescing bridge.
+        
+        Partial transcripts are latest-wins: a client gets at most one per
+        frame, and a final transcript discards a pending partial. Clients
+        can add more topics with the 'subscribe' message.
+        
+        Args:
+            event_bus: Core EventBus instance
+        """
+        self.event_bus = event_bus
+        partial = WebSocketEvent.TRANSCRIPT_PARTIAL.value
+        self.bridge.route(event_bus, "stt.partial_transcript", name=partial, latest_wins=True)
+        self.bridge.route(event_bus, "stt.final_transcript", name=WebSocketEvent.TRANSCRIPT_FINAL.value,
+                          supersedes=partial)
+        logging.info(f"WebSocket event bridge enabled ({self.bridge.frame_s * 1000:g} ms frames)")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection and bridge metrics."""
+        return {
+            'clients': len(self.clients),
+            'rooms': {room: len(sids) for room, sids in self.rooms.items() if sids},
+            'bridge': self.bridge.get_stats(),
+        }
+    
     def get_connected_clients(self) -> int:
         """Get number of connected clients."""
         return len(self.clients)
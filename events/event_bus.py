@@ -1,33 +1,453 @@
 
+import itertools
+import os
 import threading
-from typing import Callable, Dict, List, Any
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 import logging
 
+from sebas.events.event_history import Event, EventHistory, get_event_history
+
+
+# Delivery modes (per subscription)
+DELIVERY_INLINE = "inline"   # called on the emitting thread (default)
+DELIVERY_POOL = "pool"       # shared thread pool, no ordering between events
+DELIVERY_QUEUE = "queue"     # dedicated thread, events in emit order
+
+# What a full queue does with a new event
+OVERFLOW_DROP_OLDEST = "drop_oldest"   # keep the newest events (status-like topics)
+OVERFLOW_DROP_NEWEST = "drop_newest"   # keep what is queued, discard the new event
+OVERFLOW_BLOCK = "block"               # backpressure: emitter waits, then drops
+
+DELIVERY_MODES = (DELIVERY_INLINE, DELIVERY_POOL, DELIVERY_QUEUE)
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+# Topic wildcards: "*" = exactly one segment, "**" = zero or more segments
+WILDCARD_ONE = "*"
+WILDCARD_ANY = "**"
+
+_subscription_ids = itertools.count()
+
+
+def is_pattern(event_name: str) -> bool:
+    """True if the name contains a wildcard segment."""
+    return any(seg in (WILDCARD_ONE, WILDCARD_ANY) for seg in event_name.split("."))
 
-class EventBus:
-    """Centralized global event dispatcher."""
+
+class _TopicNode:
+    """Trie node: one name segment, the subscriptions whose pattern ends here."""
+
+    __slots__ = ("children", "subscriptions")
 
     def __init__(self):
-        self._listeners: Dict[str, List[Callable]] = {}
+        self.children: Dict[str, "_TopicNode"] = {}
+        self.subscriptions: Tuple["Subscription", ...] = ()
+
+    def match(self, segments: List[str], i: int, out: list):
+        """Collect subscriptions of every pattern matching segments[i:]."""
+        if i == len(segments):
+            out.extend(self.subscriptions)
+        else:
+            child = self.children.get(segments[i])
+            if child is not None:
+                child.match(segments, i + 1, out)
+            child = self.children.get(WILDCARD_ONE)
+            if child is not None:
+                child.match(segments, i + 1, out)
+        child = self.children.get(WILDCARD_ANY)
+        if child is not None:
+            for j in range(i, len(segments) + 1):  # zero or more segments
+                child.match(segments, j, out)
+
+
+class Subscription:
+    """
+    One listener on one event name, with its delivery mode and metrics.
+
+    Returned by EventBus.subscribe(); pass it to unsubscribe().
+    """
+
+    def __init__(self, bus: "EventBus", event_name: str, callback: Callable,
+                 mode: str = DELIVERY_INLINE, max_queue: int = 1000,
+                 overflow: str = OVERFLOW_DROP_OLDEST, block_timeout: float = 1.0,
+                 with_topic: bool = False):
+        self.bus = bus
+        self.event_name = event_name  # exact name or wildcard pattern
+        self.callback = callback
+        self.with_topic = with_topic  # callback(topic, data) instead of callback(data)
+        self.id = next(_subscription_ids)  # delivery order = subscription order
+        self.mode = mode
+        self.max_queue = max(1, max_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.name = getattr(callback, "__qualname__", None) or repr(callback)
+        self.active = True
+
+        # Pending events for pool/queue delivery: (topic, data, enqueued_at)
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        # Metrics (delivery side under _metrics_lock: inline and pool calls run concurrently)
+        self._metrics_lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.max_depth = 0
+
+        if mode == DELIVERY_QUEUE:
+            self._thread = threading.Thread(
+                target=self._queue_worker, daemon=True,
+                name=f"EventBus-{event_name}-{self.name}"[:64]
+            )
+            self._thread.start()
+
+    # -------------------------------------------------------------
+    # Delivery
+    # -------------------------------------------------------------
+    def deliver(self, topic: str, data: Any):
+        """Hand one event to the listener according to the delivery mode."""
+        if not self.active:
+            return
+        if self.mode == DELIVERY_INLINE:
+            self._invoke(topic, data, None)
+            return
+        if not self._enqueue(topic, data):
+            return
+        if self.mode == DELIVERY_POOL:
+            self.bus._get_pool().submit(self._run_one)
+
+    def _enqueue(self, topic: str, data: Any) -> bool:
+        with self._cond:
+            if len(self._pending) >= self.max_queue:
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    self._pending.popleft()
+                    self.dropped += 1
+                elif self.overflow == OVERFLOW_BLOCK:
+                    if not self._cond.wait_for(
+                            lambda: len(self._pending) < self.max_queue or not self.active,
+                            self.block_timeout):
+                        self.dropped += 1
+                        logging.warning(f"[EventBus] {self.name} backpressure timeout, dropping '{topic}'")
+                        return False
+                else:
+                    self.dropped += 1
+                    return False
+            self._pending.append((topic, data, time.perf_counter()))
+            self.max_depth = max(self.max_depth, len(self._pending))
+            self._cond.notify_all()
+            return True
+
+    def _take(self) -> Optional[Tuple[str, Any, float]]:
+        with self._cond:
+            if not self._pending:
+                return None
+            item = self._pending.popleft()
+            self._cond.notify_all()  # Wake a blocked emitter
+            return item
+
+    def _run_one(self):
+        """Pool task: the oldest pending event (a dropped one leaves nothing to do)."""
+        item = self._take()
+        if item is not None and self.active:
+            self._invoke(*item)
+
+    def _queue_worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self.active)
+                if not self.active:
+                    return
+            item = self._take()
+            if item is not None:
+                self._invoke(*item)
+
+    def _invoke(self, topic: str, data: Any, enqueued_at: Optional[float]):
+        started = time.perf_counter()
+        try:
+            if self.with_topic:
+                self.callback(topic, data)
+            else:
+                self.callback(data)
+        except Exception:
+            failed = True
+            logging.exception(f"[EventBus] listener failed: {self.callback}")
+        else:
+            failed = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._metrics_lock:
+            self.calls += 1
+            self.errors += failed
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.max_ms:
+                self.max_ms = elapsed_ms
+            if enqueued_at is not None:
+                lag_ms = (started - enqueued_at) * 1000
+                if lag_ms > self.max_lag_ms:
+                    self.max_lag_ms = lag_ms
+
+    def close(self):
+        """Stop delivery; events still queued are discarded."""
+        with self._cond:
+            self.active = False
+            self.dropped += len(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+
+    # -------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def get_stats(self) -> dict:
+        with self._metrics_lock:
+            calls, errors, total_ms = self.calls, self.errors, self.total_ms
+            max_ms, max_lag_ms = self.max_ms, self.max_lag_ms
+        return {
+            'listener': self.name,
+            'pattern': self.event_name,
+            'mode': self.mode,
+            'calls': calls,
+            'errors': errors,
+            'dropped': self.dropped,
+            'avg_ms': round(total_ms / calls, 3) if calls else 0.0,
+            'max_ms': round(max_ms, 3),
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'max_lag_ms': round(max_lag_ms, 3),
+        }
+
+
+class EventBus:
+    """
+    Centralized global event dispatcher.
+
+    Names are dot-separated topics. Subscriptions may use wildcards
+    ("core.*", "stt.**", "**"); they live in a topic trie, and the
+    listeners resolved for each concrete topic are cached until the next
+    subscribe/unsubscribe, so emit() does one dict lookup either way.
+    """
+
+    def __init__(self, pool_workers: Optional[int] = None,
+                 history: Optional[EventHistory] = None, record_history: bool = True,
+                 history_exclude: Optional[List[str]] = None):
+        """
+        Args:
+            pool_workers: Threads shared by "pool" subscriptions
+                (env SEBAS_EVENTBUS_WORKERS, default 4)
+            history: Where emitted events are recorded (default: the
+                process-wide history the EventSystem also uses)
+            record_history: False keeps no history at all
+            history_exclude: Topics delivered but never recorded - high-rate
+                chatter that would push real events out of the shared ring
+                and into the event log (env SEBAS_EVENT_HISTORY_EXCLUDE,
+                comma separated, default "stt.partial_transcript")
+        """
+        self.history: Optional[EventHistory] = (
+            (history if history is not None else get_event_history()) if record_history else None
+        )
+        if history_exclude is None:
+            history_exclude = os.environ.get("SEBAS_EVENT_HISTORY_EXCLUDE", "stt.partial_transcript").split(",")
+        self.history_exclude = frozenset(t.strip() for t in history_exclude if t.strip())
+        # Copy-on-write tuples: emit() reads them without taking the lock
+        self._listeners: Dict[str, Tuple[Subscription, ...]] = {}  # by name/pattern
+        self._trie = _TopicNode()
+        self._resolved: Dict[str, Tuple[Subscription, ...]] = {}  # by concrete topic
+        self._generation = 0  # bumped on every change; stale resolutions are not cached
         self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_workers = int(pool_workers if pool_workers is not None
+                                 else os.environ.get("SEBAS_EVENTBUS_WORKERS", 4))
+
+        # Emitter-side metrics: events and time spent in emit() per name.
+        # Emitted from many threads, so updated under their own lock
+        self._emit_counts: Dict[str, int] = {}
+        self._emit_ms: Dict[str, float] = {}
+        self._stats_lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=max(1, self._pool_workers), thread_name_prefix="EventBusPool"
+                    )
+        return self._pool
 
     # -------------------------------------------------------------
     # Register listener for event_name
     # -------------------------------------------------------------
-    def subscribe(self, event_name: str, callback: Callable):
+    def subscribe(self, event_name: str, callback: Callable, mode: str = DELIVERY_INLINE,
+                  max_queue: int = 1000, overflow: str = OVERFLOW_DROP_OLDEST,
+                  block_timeout: float = 1.0, with_topic: Optional[bool] = None) -> Subscription:
+        """
+        Register a listener.
+
+        Args:
+            event_name: Event to listen to, or a pattern: "core.*" (one
+                segment), "core.**" (core and anything below), "**" (all)
+            callback: Called with the event data
+            mode: "inline" (emitting thread), "pool" (shared threads) or
+                "queue" (own thread, in order)
+            max_queue: Pending events kept for pool/queue delivery
+            overflow: Full queue policy: "drop_oldest", "drop_newest" or
+                "block" (emitter waits up to block_timeout, then drops)
+            block_timeout: Seconds an emitter may be held back by "block"
+            with_topic: Call callback(topic, data); default on for patterns
+
+        Returns:
+            Subscription (for unsubscribe() and metrics)
+        """
+        if mode not in DELIVERY_MODES:
+            raise ValueError(f"Unknown delivery mode: {mode}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        segments = event_name.split(".")
+        if any(WILDCARD_ONE in seg and seg not in (WILDCARD_ONE, WILDCARD_ANY) for seg in segments):
+            raise ValueError(f"Wildcards must be whole segments: {event_name}")
+        if with_topic is None:
+            with_topic = is_pattern(event_name)
+
+        subscription = Subscription(self, event_name, callback, mode, max_queue, overflow,
+                                    block_timeout, with_topic)
+        with self._lock:
+            self._listeners[event_name] = self._listeners.get(event_name, ()) + (subscription,)
+            self._update_trie(event_name)
+            logging.info(f"[EventBus] subscribed: {callback} to '{event_name}' ({mode})")
+        return subscription
+
+    def unsubscribe(self, subscription: Union[Subscription, str], callback: Optional[Callable] = None) -> bool:
+        """
+        Remove a listener: unsubscribe(subscription) or unsubscribe(event_name, callback).
+
+        Returns:
+            True if something was removed
+        """
+        with self._lock:
+            if isinstance(subscription, Subscription):
+                event_name = subscription.event_name
+                match = lambda s: s is subscription
+            else:
+                event_name = subscription
+                match = lambda s: s.callback == callback
+
+            current = self._listeners.get(event_name, ())
+            removed = [s for s in current if match(s)]
+            if not removed:
+                return False
+            remaining = tuple(s for s in current if not match(s))
+            if remaining:
+                self._listeners[event_name] = remaining
+            else:
+                self._listeners.pop(event_name, None)
+            self._update_trie(event_name)
+
+        for s in removed:
+            s.close()
+        return True
+
+    # -------------------------------------------------------------
+    # Topic trie
+    # -------------------------------------------------------------
+    def _update_trie(self, event_name: str):
+        """Mirror _listeners[event_name] into the trie and drop cached resolutions (lock held)."""
+        node = self._trie
+        for segment in event_name.split("."):
+            node = node.children.setdefault(segment, _TopicNode())
+        node.subscriptions = self._listeners.get(event_name, ())
+        self._resolved = {}
+        self._generation += 1
+
+    def _resolve(self, event_name: str) -> Tuple[Subscription, ...]:
+        """Listeners for a concrete topic, from the cache or the trie."""
+        listeners = self._resolved.get(event_name)
+        if listeners is not None:
+            return listeners
+
+        generation = self._generation
+        found: list = []
+        self._trie.match(event_name.split("."), 0, found)
+        unique = {s.id: s for s in found}  # "**" can reach a node twice
+        listeners = tuple(unique[i] for i in sorted(unique))
+
         with self._lock:
-            self._listeners.setdefault(event_name, []).append(callback)
-            logging.info(f"[EventBus] subscribed: {callback} to '{event_name}'")
+            if generation == self._generation:
+                if len(self._resolved) >= 4096:  # Unbounded topic names (ids in names)
+                    self._resolved = {}
+                self._resolved[event_name] = listeners
+        return listeners
+
+    def resolve(self, event_name: str) -> List[Subscription]:
+        """Subscriptions an emit of ``event_name`` would reach."""
+        return list(self._resolve(event_name))
 
     # -------------------------------------------------------------
     # Emit an event to all subscribers
     # -------------------------------------------------------------
     def emit(self, event_name: str, data: Any = None):
-        listeners = self._listeners.get(event_name, [])
+        started = time.perf_counter()
+        listeners = self._resolve(event_name)
         logging.debug(f"[EventBus] emit: '{event_name}' => {len(listeners)} listeners")
 
-        for cb in listeners:
-            try:
-                cb(data)
-            except Exception:
-                logging.exception(f"[EventBus] listener failed: {cb}")
+        if self.history is not None and event_name not in self.history_exclude:
+            self.history.append(Event(event_name, "core", data))
+
+        for subscription in listeners:
+            subscription.deliver(event_name, data)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._emit_counts[event_name] = self._emit_counts.get(event_name, 0) + 1
+            self._emit_ms[event_name] = self._emit_ms.get(event_name, 0.0) + elapsed_ms
+
+    # -------------------------------------------------------------
+    # Metrics / lifetime
+    # -------------------------------------------------------------
+    def get_subscriptions(self, event_name: Optional[str] = None) -> List[Subscription]:
+        if event_name is not None:
+            return list(self._listeners.get(event_name, ()))
+        return [s for subs in list(self._listeners.values()) for s in subs]
+
+    def get_history(self, topic=None, since=None, until=None, limit: Optional[int] = 100) -> List[Event]:
+        """Recorded events, oldest first (see EventHistory.query)."""
+        if self.history is None:
+            return []
+        return self.history.query(topic=topic, since=since, until=until, limit=limit)
+
+    def get_stats(self) -> dict:
+        """Per event: emits, time the emitter spent, and per-listener metrics."""
+        with self._stats_lock:
+            emit_counts = dict(self._emit_counts)
+            emit_ms = dict(self._emit_ms)
+        listeners = dict(self._listeners)  # copy-on-write values; the dict itself may grow
+        stats = {}
+        for name in sorted(set(emit_counts) | set(listeners)):
+            count = emit_counts.get(name, 0)
+            stats[name] = {
+                'emits': count,
+                'emit_avg_ms': round(emit_ms.get(name, 0.0) / count, 3) if count else 0.0,
+                'listeners': [s.get_stats() for s in listeners.get(name, ())],
+            }
+        return stats
+
+    def close(self):
+        """Stop queue threads and the pool (pending events are dropped)."""
+        with self._lock:
+            subscriptions = [s for subs in self._listeners.values() for s in subs]
+            self._listeners.clear()
+            self._trie = _TopicNode()
+            self._resolved = {}
+            self._generation += 1
+            pool, self._pool = self._pool, None
+        for s in subscriptions:
+            s.close()
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,255 @@
+"""
+Event History - Stage 2
+Fixed-capacity ring buffer of recent events, shared by the core EventBus
+and the automation EventSystem.
+
+Records live in a preallocated slot list indexed by sequence number
+(seq % capacity); appending overwrites the oldest slot, so a publish is
+O(1) once the buffer is full. Timestamps sit in a parallel array('d')
+kept non-decreasing, which makes time-range queries a binary search.
+Each topic keeps a deque of its sequence numbers, so "last N of type X"
+does not scan unrelated events; entries that fell out of the ring are
+skipped and trimmed lazily.
+"""
+
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union, Iterable
+
+TimeLike = Union[float, datetime, None]
+
+
+def to_timestamp(value: TimeLike) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+class Event:
+    """One event as stored in the history (both buses)."""
+
+    __slots__ = ("event_type", "topic", "source", "data", "ts", "id")
+
+    def __init__(self, event_type, source: str, data: Any, ts: Optional[float] = None):
+        """
+        Args:
+            event_type: EventType enum member or a topic string
+            source: Publishing component ("core" for the EventBus)
+            data: Payload
+            ts: Unix timestamp (default: now)
+        """
+        self.event_type = event_type
+        self.topic: str = getattr(event_type, "value", event_type)
+        self.source = source
+        self.data = data
+        self.ts = ts if ts is not None else time.time()
+        self.id = f"{self.topic}_{self.ts}"
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'type': self.topic,
+            'source': self.source,
+            'data': self.data,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+    def __repr__(self):
+        return f"Event({self.topic!r}, source={self.source!r}, ts={self.ts:.3f})"
+
+
+class EventHistory:
+    """Ring buffer of Events with per-topic index and time-range queries."""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(1, capacity)
+        self._slots: List[Optional[Event]] = [None] * self.capacity
+        self._times = array('d', bytes(8 * self.capacity))
+        self._by_topic: Dict[str, deque] = {}
+        self._next = 0  # sequence number of the next event
+        self._last_ts = 0.0
+        self._lock = threading.Lock()
+        self._sinks: tuple = ()  # e.g. EventLog.write - called for every appended event
+
+    # ------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------
+    def append(self, event: Event) -> int:
+        """Store an event, overwriting the oldest when full; returns its sequence number."""
+        with self._lock:
+            seq = self._next
+            slot = seq % self.capacity
+            self._slots[slot] = event
+            self._last_ts = max(self._last_ts, event.ts)  # clock steps back -> keep order
+            self._times[slot] = self._last_ts
+            self._next = seq + 1
+
+            index = self._by_topic.get(event.topic)
+            if index is None:
+                index = self._by_topic[event.topic] = deque()
+            index.append(seq)
+            oldest = self._oldest
+            while index[0] < oldest:
+                index.popleft()
+
+        for sink in self._sinks:
+            try:
+                sink(event)
+            except Exception:
+                logging.exception(f"[EventHistory] sink failed: {sink}")
+        return seq
+
+    def add_sink(self, sink: Callable[[Event], None]):
+        """Also hand every appended event to ``sink`` (must be fast and non-blocking)."""
+        with self._lock:
+            self._sinks = self._sinks + (sink,)
+
+    def remove_sink(self, sink: Callable[[Event], None]):
+        with self._lock:
+            self._sinks = tuple(s for s in self._sinks if s != sink)
+
+    def record(self, topic, source: str, data: Any) -> Event:
+        """Build and store an Event."""
+        event = Event(topic, source, data)
+        self.append(event)
+        return event
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+    @property
+    def _oldest(self) -> int:
+        return max(0, self._next - self.capacity)
+
+    def __len__(self) -> int:
+        return self._next - self._oldest
+
+    def _first_seq_at(self, ts: float) -> int:
+        """Oldest retained sequence number with timestamp >= ts (lock held)."""
+        lo, hi = self._oldest, self._next
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times[mid % self.capacity] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, topic: Union[str, Any, Iterable, None] = None, since: TimeLike = None,
+              until: TimeLike = None, source: Optional[str] = None,
+              limit: Optional[int] = 100) -> List[Event]:
+        """
+        Recent events, oldest first.
+
+        Args:
+            topic: Topic string / EventType, or several of them (None = all)
+            since: Inclusive lower time bound (unix time or datetime)
+            until: Inclusive upper time bound
+            source: Only events from this source
+            limit: Newest N matches (None = all)
+        """
+        since_ts, until_ts = to_timestamp(since), to_timestamp(until)
+        if topic is not None and (isinstance(topic, str) or hasattr(topic, "value")):
+            topics = [getattr(topic, "value", topic)]
+        elif topic is not None:
+            topics = [getattr(t, "value", t) for t in topic]
+        else:
+            topics = None
+
+        with self._lock:
+            oldest = self._oldest
+            start = self._first_seq_at(since_ts) if since_ts is not None else oldest
+
+            if topics is None:
+                seqs: Iterable[int] = range(self._next - 1, start - 1, -1)
+            else:
+                merged = []
+                for name in topics:
+                    for seq in reversed(self._by_topic.get(name, ())):
+                        if seq < start:
+                            break
+                        merged.append(seq)
+                seqs = sorted(merged, reverse=True)
+
+            result = []
+            for seq in seqs:  # newest first
+                event = self._slots[seq % self.capacity]
+                if until_ts is not None and self._times[seq % self.capacity] > until_ts:
+                    continue
+                if source is not None and event.source != source:
+                    continue
+                result.append(event)
+                if limit is not None and len(result) >= limit:
+                    break
+        result.reverse()
+        return result
+
+    def topics(self) -> Dict[str, int]:
+        """Retained event count per topic."""
+        with self._lock:
+            oldest = self._oldest
+            counts = {name: sum(1 for seq in index if seq >= oldest)
+                      for name, index in self._by_topic.items()}
+        return {name: n for name, n in counts.items() if n}
+
+    def clear(self, keep: Optional[Callable[[Event], bool]] = None):
+        """
+        Drop events; with ``keep``, retain (in order) those it returns True for.
+
+        The history is shared by both buses, so callers clearing their own
+        entries pass a predicate, e.g. keep=lambda e: e.source == "core".
+        """
+        with self._lock:
+            kept = []
+            if keep is not None:
+                kept = [self._slots[seq % self.capacity] for seq in range(self._oldest, self._next)]
+                kept = [event for event in kept if keep(event)]
+            self._slots = [None] * self.capacity
+            self._by_topic.clear()
+            self._next = 0  # _times is only read inside [oldest, next)
+            self._last_ts = 0.0
+            for seq, event in enumerate(kept):  # re-indexed without calling the sinks
+                self._slots[seq] = event
+                self._last_ts = max(self._last_ts, event.ts)
+                self._times[seq] = self._last_ts
+                self._by_topic.setdefault(event.topic, deque()).append(seq)
+            self._next = len(kept)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            size = self._next - self._oldest
+            span = (self._times[(self._next - 1) % self.capacity] - self._times[self._oldest % self.capacity]
+                    if size else 0.0)
+            total = self._next
+        return {
+            'capacity': self.capacity,
+            'size': size,
+            'total_recorded': total,
+            'span_s': round(span, 3),
+        }
+
+
+# Shared by the EventBus and EventSystem unless they are given their own
+_history: Optional[EventHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_event_history() -> EventHistory:
+    """Process-wide history (capacity from env SEBAS_EVENT_HISTORY, default 1000)."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = EventHistory(int(os.environ.get("SEBAS_EVENT_HISTORY", 1000)))
+    return _history
@@ -0,0 +1,431 @@
+"""
+Event Log - Stage 2
+Optional durable, append-only log of every event, with replay.
+
+Attached to the shared EventHistory as a sink, so it sees both the core
+EventBus and the EventSystem. The emitting thread only appends the event
+to an in-memory queue; a writer thread serializes and writes in batches.
+
+On disk (directory from SEBAS_EVENT_LOG_DIR):
+
+    00000001-1760000000000.evlog    segment: <number>-<first event ms>
+    00000001-1760000000000.evidx    sparse index for that segment
+
+Segment record:  <u32 length><u32 crc32><f64 unix time><payload>
+                 payload = compact JSON {"t": topic, "s": source, "d": data}
+Index entry:     <f64 unix time><u64 byte offset>, every ``index_interval`` records
+
+Durability: data is fsynced every ``fsync_interval`` seconds or
+``fsync_batch`` records, whichever comes first, so a crash loses at most
+that window. A torn record at the end of a segment fails its length or
+CRC check and ends the read of that segment. Segments rotate by size and
+age; a restart always opens a new segment.
+
+Replay re-emits a time window into a (fresh) EventBus for debugging and
+for re-deriving statistics - see tools/event_log.py.
+"""
+
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union, Iterable
+
+from sebas.api.event_bridge import json_safe
+from sebas.events.event_history import Event, EventHistory, get_event_history, TimeLike, to_timestamp
+
+RECORD_HEADER = struct.Struct("<IId")   # payload length, crc32, timestamp
+INDEX_ENTRY = struct.Struct("<dQ")      # timestamp, byte offset
+
+SEGMENT_SUFFIX = ".evlog"
+INDEX_SUFFIX = ".evidx"
+_SEGMENT_NAME = re.compile(r"^(\d{8})-(\d+)\.evlog$")
+
+MAX_RECORD_BYTES = 16 * 1024 * 1024  # larger length fields mean corruption
+
+
+class Segment:
+    """One segment file on disk."""
+
+    __slots__ = ("number", "first_ts", "path")
+
+    def __init__(self, number: int, first_ts: float, path: Path):
+        self.number = number
+        self.first_ts = first_ts
+        self.path = path
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(INDEX_SUFFIX)
+
+    def load_index(self) -> List[tuple]:
+        """[(timestamp, offset), ...] from the sparse index (empty if missing)."""
+        try:
+            raw = self.index_path.read_bytes()
+        except OSError:
+            return []
+        usable = len(raw) - len(raw) % INDEX_ENTRY.size
+        return [INDEX_ENTRY.unpack_from(raw, pos) for pos in range(0, usable, INDEX_ENTRY.size)]
+
+    def read(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Event]:
+        """Events of this segment within [since, until], seeking via the sparse index."""
+        offset = 0
+        if since is not None:
+            index = self.load_index()
+            pos = bisect_right([ts for ts, _ in index], since) - 1
+            if pos >= 0:
+                offset = index[pos][1]
+
+        last_ts = 0.0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, crc, ts = RECORD_HEADER.unpack(header)
+                if length > MAX_RECORD_BYTES:
+                    logging.warning(f"[EventLog] {self.path.name}: corrupt record at {f.tell() - len(header)}")
+                    return
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    logging.warning(f"[EventLog] {self.path.name}: torn record at {f.tell() - len(payload) - len(header)}")
+                    return
+
+                last_ts = max(last_ts, ts)
+                if until is not None and last_ts > until:
+                    return
+                if since is not None and ts < since:
+                    continue
+                record = json.loads(payload)
+                yield Event(record.get("t"), record.get("s"), record.get("d"), ts=ts)
+
+
+class EventLog:
+    """Segmented append-only event log with batched fsync and replay."""
+
+    def __init__(self, directory: Union[str, Path],
+                 segment_bytes: int = 16 * 1024 * 1024,
+                 segment_seconds: float = 3600.0,
+                 fsync_interval: float = 1.0,
+                 fsync_batch: int = 512,
+                 index_interval: int = 128,
+                 max_segments: int = 0,
+                 max_pending: int = 10000):
+        """
+        Args:
+            directory: Where segments are written
+            segment_bytes: Rotate when a segment reaches this size
+            segment_seconds: Rotate when a segment's first event is this old
+            fsync_interval: Longest time written events stay un-synced
+            fsync_batch: Sync after this many records even if sooner
+            index_interval: Records between sparse index entries
+            max_segments: Keep only the newest N segments (0 = keep all)
+            max_pending: Queued events before new ones are dropped
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = max(1, fsync_batch)
+        self.index_interval = max(1, index_interval)
+        self.max_segments = max_segments
+        self.max_pending = max_pending
+
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._flush_requested = 0  # flush() callers waiting for a sync
+        self._history: Optional[EventHistory] = None
+
+        # Writer state (writer thread only)
+        self._segment: Optional[Segment] = None
+        self._data_file = None
+        self._index_file = None
+        self._segment_size = 0
+        self._segment_records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._index_ts = 0.0
+
+        # Metrics
+        self.accepted = 0
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.fsync_ms_total = 0.0
+        self.synced_through = 0  # written count covered by the last fsync
+
+    # ------------------------------------------------------------
+    # Lifetime
+    # ------------------------------------------------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, daemon=True, name="EventLogWriter")
+        self._thread.start()
+        logging.info(f"[EventLog] Writing to {self.directory}")
+
+    def attach(self, history: Optional[EventHistory] = None):
+        """Start logging everything appended to ``history`` (default: shared history)."""
+        self._history = history if history is not None else get_event_history()
+        self._history.add_sink(self.write)
+        self.start()
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued, sync and stop."""
+        if self._history is not None:
+            self._history.remove_sink(self.write)
+            self._history = None
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------
+    # Producer side (any thread)
+    # ------------------------------------------------------------
+    def write(self, event: Event) -> bool:
+        """Queue an event; False if it was dropped because the writer is behind."""
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.append(event)
+            self.accepted += 1
+            if len(self._pending) >= self.fsync_batch:
+                self._cond.notify()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is written and fsynced."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self.accepted
+            self._flush_requested += 1
+            self._cond.notify_all()
+            try:
+                while self.synced_through < target:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._running:
+                        return self.synced_through >= target
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flush_requested -= 1
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+    def _writer(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.fsync_batch or self._flush_requested or not self._running,
+                    self.fsync_interval
+                )
+                batch = list(self._pending)
+                self._pending.clear()
+                stopping = not self._running
+
+            try:
+                for event in batch:
+                    self._write_record(event)
+                if self._unsynced and (
+                        stopping or self._flush_requested
+                        or self._unsynced >= self.fsync_batch
+                        or time.monotonic() - self._last_sync >= self.fsync_interval):
+                    self._sync()
+            except Exception:
+                logging.exception("[EventLog] Write failed")
+
+            with self._cond:
+                self._cond.notify_all()  # flush() waiters
+                if stopping and not self._pending:
+                    break
+        self._close_segment()
+
+    def _encode(self, event: Event) -> bytes:
+        try:
+            # Structured payloads stay structured on replay (to_dict() where present)
+            return json.dumps({"t": event.topic, "s": event.source, "d": json_safe(event.data)},
+                              separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError):
+            return json.dumps({"t": event.topic, "s": event.source, "d": str(event.data)},
+                              separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def _write_record(self, event: Event):
+        payload = self._encode(event)
+        if self._needs_rotation(event.ts):
+            self._rotate(event.ts)
+
+        offset = self._segment_size
+        if self._segment_records % self.index_interval == 0:
+            self._index_ts = max(self._index_ts, event.ts)
+            self._index_file.write(INDEX_ENTRY.pack(self._index_ts, offset))
+
+        self._data_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload), event.ts))
+        self._data_file.write(payload)
+        size = RECORD_HEADER.size + len(payload)
+        self._segment_size += size
+        self._segment_records += 1
+        self._unsynced += 1
+        self.written += 1
+        self.bytes_written += size
+
+    def _needs_rotation(self, ts: float) -> bool:
+        if self._segment is None:
+            return True
+        return (self._segment_size >= self.segment_bytes
+                or ts - self._segment.first_ts >= self.segment_seconds)
+
+    def _rotate(self, first_ts: float):
+        self._close_segment()
+        existing = self.segments()
+        number = existing[-1].number + 1 if existing else 1
+        path = self.directory / f"{number:08d}-{int(first_ts * 1000)}{SEGMENT_SUFFIX}"
+        self._segment = Segment(number, first_ts, path)
+        self._data_file = open(path, "ab", buffering=64 * 1024)
+        self._index_file = open(self._segment.index_path, "ab", buffering=4096)
+        self._segment_size = 0
+        self._segment_records = 0
+        self._index_ts = first_ts
+        logging.info(f"[EventLog] New segment {path.name}")
+
+        if self.max_segments and len(existing) + 1 > self.max_segments:
+            for old in existing[:len(existing) + 1 - self.max_segments]:
+                for p in (old.path, old.index_path):
+                    try:
+                        p.unlink()
+                    except OSError:
+                        pass
+
+    def _sync(self):
+        started = time.perf_counter()
+        for f in (self._data_file, self._index_file):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        self.fsyncs += 1
+        self.fsync_ms_total += (time.perf_counter() - started) * 1000
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.synced_through = self.written
+
+    def _close_segment(self):
+        if self._data_file is None:
+            return
+        try:
+            if self._unsynced:
+                self._sync()
+        finally:
+            for f in (self._data_file, self._index_file):
+                try:
+                    f.close()
+                except Exception:
+                    pass
+            self._data_file = self._index_file = None
+            self._segment = None
+
+    # ------------------------------------------------------------
+    # Reading / replay
+    # ------------------------------------------------------------
+    def segments(self) -> List[Segment]:
+        """Segments on disk, oldest first."""
+        found = []
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            match = _SEGMENT_NAME.match(path.name)
+            if match:
+                found.append(Segment(int(match.group(1)), int(match.group(2)) / 1000.0, path))
+        return sorted(found, key=lambda s: s.number)
+
+    def read(self, since: TimeLike = None, until: TimeLike = None,
+             topics: Optional[Iterable[str]] = None) -> Iterator[Event]:
+        """Logged events in [since, until], oldest first (segments outside are skipped)."""
+        since_ts, until_ts = to_timestamp(since), to_timestamp(until)
+        wanted = set(topics) if topics else None
+        segments = self.segments()
+        for i, segment in enumerate(segments):
+            next_first = segments[i + 1].first_ts if i + 1 < len(segments) else None
+            if since_ts is not None and next_first is not None and next_first < since_ts:
+                continue  # Entirely before the window
+            if until_ts is not None and segment.first_ts > until_ts:
+                break
+            for event in segment.read(since_ts, until_ts):
+                if wanted is None or event.topic in wanted:
+                    yield event
+
+    def replay(self, bus, since: TimeLike = None, until: TimeLike = None,
+               topics: Optional[Iterable[str]] = None, speed: Optional[float] = None,
+               max_gap: float = 5.0) -> int:
+        """
+        Re-emit logged events into ``bus`` (use a fresh EventBus for analysis).
+
+        Args:
+            speed: None = as fast as possible, 1.0 = original pacing, 2.0 = twice as fast
+            max_gap: Cap on any single pause when pacing
+
+        Returns:
+            Number of events emitted
+        """
+        count = 0
+        previous = None
+        for event in self.read(since, until, topics):
+            if speed and previous is not None:
+                time.sleep(min(max(0.0, event.ts - previous) / speed, max_gap))
+            previous = event.ts
+            bus.emit(event.topic, event.data)
+            count += 1
+        return count
+
+    # ------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------
+    def get_stats(self) -> dict:
+        segments = self.segments()
+        return {
+            'directory': str(self.directory),
+            'running': self._running,
+            'written': self.written,
+            'dropped': self.dropped,
+            'pending': len(self._pending),
+            'bytes_written': self.bytes_written,
+            'segments': len(segments),
+            'disk_bytes': sum(s.path.stat().st_size for s in segments if s.path.exists()),
+            'fsyncs': self.fsyncs,
+            'fsync_avg_ms': round(self.fsync_ms_total / self.fsyncs, 3) if self.fsyncs else 0.0,
+        }
+
+
+def create_event_log(directory: Optional[Union[str, Path]] = None, **kwargs) -> Optional[EventLog]:
+    """
+    EventLog for env SEBAS_EVENT_LOG_DIR (None when unset - logging is opt-in).
+
+    Env SEBAS_EVENT_LOG_SEGMENT_MB and SEBAS_EVENT_LOG_FSYNC_MS override
+    the segment size and fsync interval.
+    """
+    directory = directory or os.environ.get("SEBAS_EVENT_LOG_DIR")
+    if not directory:
+        return None
+    if "SEBAS_EVENT_LOG_SEGMENT_MB" in os.environ:
+        kwargs.setdefault("segment_bytes", int(float(os.environ["SEBAS_EVENT_LOG_SEGMENT_MB"]) * 1024 * 1024))
+    if "SEBAS_EVENT_LOG_FSYNC_MS" in os.environ:
+        kwargs.setdefault("fsync_interval", float(os.environ["SEBAS_EVENT_LOG_FSYNC_MS"]) / 1000.0)
+    try:
+        return EventLog(directory, **kwargs)
+    except OSError as e:
+        logging.error(f"[EventLog] Cannot use {directory}: {e}")
+        return None
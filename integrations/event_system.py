@@ -5,12 +5,14 @@ Phase 5: Event-driven architecture
 """
 
 import logging
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Union
 from datetime import datetime
 from enum import Enum
 from collections import defaultdict
 import threading
 
+from sebas.events.event_history import Event, EventHistory, get_event_history
+
 
 class EventType(Enum):
     """Standard SEBAS event types"""
@@ -25,26 +27,6 @@ class EventType(Enum):
     CUSTOM = "custom"
 
 
-class Event:
-    """Event data structure"""
-    
-    def __init__(self, event_type: EventType, source: str, data: Dict[str, Any]):
-        self.event_type = event_type
-        self.source = source
-        self.data = data
-        self.timestamp = datetime.now()
-        self.id = f"{event_type.value}_{self.timestamp.timestamp()}"
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'type': self.event_type.value,
-            'source': self.source,
-            'data': self.data,
-            'timestamp': self.timestamp.isoformat()
-        }
-
-
 class MultiPartCommandParser:
     """Parse multi-part commands like 'open chrome and play music'"""
     
@@ -99,12 +81,14 @@ class EventSystem:
     """
     Event bus for SEBAS automation and workflows.
     Supports pub/sub pattern for loose coupling.
+    
+    History is an events.event_history.EventHistory ring buffer, by default
+    the one the core EventBus records into, so both buses share a timeline.
     """
     
-    def __init__(self):
+    def __init__(self, history: Optional[EventHistory] = None):
         self._subscribers: Dict[EventType, List[Callable]] = defaultdict(list)
-        self._event_history: List[Event] = []
-        self._max_history = 1000
+        self._history = history if history is not None else get_event_history()
         self._lock = threading.Lock()
         logging.info("[EventSystem] Initialized")
     
@@ -137,12 +121,7 @@ class EventSystem:
             data: Event payload
         """
         event = Event(event_type, source, data)
-        
-        # Store in history
-        with self._lock:
-            self._event_history.append(event)
-            if len(self._event_history) > self._max_history:
-                self._event_history.pop(0)
+        self._history.append(event)
         
         # Notify subscribers
         subscribers = self._subscribers.get(event_type, [])
@@ -156,14 +135,24 @@ class EventSystem:
     
     def get_event_history(self, event_type: Optional[EventType] = None, 
                          limit: int = 100) -> List[Event]:
-        """Get recent event history"""
-        with self._lock:
-            if event_type:
-                filtered = [e for e in self._event_history if e.event_type == event_type]
-                return filtered[-limit:]
-            return self._event_history[-limit:]
+        """Get recent event history (oldest first; includes core EventBus events)"""
+        return self._history.query(topic=event_type, limit=limit)
     
-    def clear_history(self):
-        """Clear event history"""
-        with self._lock:
-            self._event_history.clear()
\ No newline at end of file
+    def get_events_between(self, start: Union[datetime, float], end: Union[datetime, float, None] = None,
+                           event_type: Optional[EventType] = None,
+                           limit: Optional[int] = None) -> List[Event]:
+        """Events in a time range (end defaults to now)"""
+        return self._history.query(topic=event_type, since=start, until=end, limit=limit)
+    
+    def clear_history(self, source: Optional[str] = None):
+        """
+        Clear automation events from the (shared) history.
+        
+        Core EventBus events (source "core") are kept - they belong to the
+        timeline served at /api/v1/events/history. With ``source`` only
+        that component's events are removed.
+        """
+        if source is None:
+            self._history.clear(keep=lambda e: e.source == "core")
+        else:
+            self._history.clear(keep=lambda e: e.source != source)
\ No newline at end of file
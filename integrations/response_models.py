@@ -4,7 +4,9 @@ Response Models for SEBAS Skills
 Standardized output format with visual display flags
 """
 
-from dataclasses import dataclass
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
@@ -40,6 +42,72 @@ class SkillResponse:
         }
 
 
+@dataclass
+class CommandResult:
+    """
+    Outcome of one pass through Sebas.parse_and_execute.
+    
+    Carries everything the voice path, UI and API need (intent, slots,
+    confidence, the skill's response, what was spoken, stage timings), so
+    no caller has to parse the command a second time. str() gives the
+    short status message older callers used to receive.
+    """
+    text: str
+    source: str = 'voice'
+    status: str = 'not_understood'  # handled | unhandled | not_understood | denied | error | language | learning | empty
+    message: str = ''
+    intent: Optional[str] = None
+    slots: Dict[str, Any] = field(default_factory=dict)
+    confidence: Optional[float] = None
+    suggestions: List[str] = field(default_factory=list)
+    skill_response: Optional[SkillResponse] = None
+    spoken: List[str] = field(default_factory=list)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    request_id: Optional[str] = None  # caller's id, echoed so pushed copies can be matched
+    
+    @property
+    def handled(self) -> bool:
+        return self.status == 'handled'
+    
+    @property
+    def spoken_text(self) -> str:
+        return " ".join(self.spoken)
+    
+    @contextmanager
+    def timed(self, stage: str):
+        """Record the duration of a pipeline stage in timings_ms."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[stage] = round((time.perf_counter() - started) * 1000, 3)
+    
+    def __str__(self) -> str:
+        return self.message
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for API transport (display fields come from the skill)."""
+        skill = self.skill_response
+        return {
+            'text': self.text,
+            'source': self.source,
+            'request_id': self.request_id,
+            'status': self.status,
+            'handled': self.handled,
+            'message': self.message,
+            'intent': self.intent,
+            'slots': self.slots,
+            'confidence': self.confidence,
+            'suggestions': self.suggestions,
+            'spoken': self.spoken_text,
+            'timings_ms': self.timings_ms,
+            'skill_response': skill.to_dict() if skill else None,
+            'display_type': skill.display_type.value if skill else DisplayType.NONE.value,
+            'display_data': skill.display_data if skill else None,
+            'auto_close_seconds': skill.auto_close_seconds if skill else None,
+        }
+
+
 # Helper functions for common response types
 def info_response(message: str, data: Dict[str, Any], 
                  auto_close: int = 10) -> SkillResponse:
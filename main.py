@@ -6,15 +6,18 @@ WITH LEARNING SYSTEM INTEGRATION - ALL PYLANCE ERRORS FIXED
 """
 
 import logging
+import threading
 import time
 import sys
 import os
+from typing import Optional
 
 # === Core Services ===
 from sebas.permissions.permission_manager import PermissionManager
 from sebas.services.language_manager import LanguageManager
 from sebas.services.skill_registry import SkillRegistry
 from sebas.services.nlu import SimpleNLU, ContextManager
+from sebas.services.tracing import get_tracer
 
 # === Audio Modules ===
 from sebas.stt.stt_manager import STTManager
@@ -24,17 +27,20 @@ from sebas.tts.tts_manager import TTSManager
 from sebas.wakeword.wakeword_detector import WakeWordDetector
 
 # === UI & API ===
-from sebas.api.ui_server import start_ui_server, set_command_handler
+from sebas.api.ui_server import start_ui_server, set_command_handler, bind_event_bus as bind_ui_events
 from sebas.api.api_server import APIServer
+from sebas.api.async_server import AsyncAPIServer
 
 # === Events ===
 from sebas.events.event_bus import EventBus
+from sebas.events.event_log import create_event_log
 
 # === Permissions ===
 from sebas.constants.permissions import Role, is_authorized
 
 # === Learning System ===
 from sebas.integrations.learning_system import LearningSystem, LearningNLU
+from sebas.integrations.response_models import CommandResult
 from sebas.integrations.learning_integration import (
     LearningSEBASIntegration,
     VoiceLearningHelper,
@@ -62,6 +68,11 @@ class Sebas:
         # --------------------------------------------------
         self.events = EventBus()
 
+        # Optional durable event log (SEBAS_EVENT_LOG_DIR) for post-mortems and replay
+        self.event_log = create_event_log()
+        if self.event_log:
+            self.event_log.attach(self.events.history)
+
         # --------------------------------------------------
         # Language Manager
         # --------------------------------------------------
@@ -79,10 +90,17 @@ class Sebas:
         self.nlu = SimpleNLU()
         self.context = ContextManager()
 
+        # Wake word -> first audio sample latency traces
+        self.tracer = get_tracer()
+        self._command_local = threading.local()  # CommandResult being built on this thread
+
         # --------------------------------------------------
         # STT & TTS Managers
         # --------------------------------------------------
-        self.stt = STTManager(language_manager=self.language_manager)
+        self.stt = STTManager(
+            language_manager=self.language_manager,
+            event_bus=self.events
+        )
         self.tts = TTSManager(
             language_manager=self.language_manager,
             piper_model_path="sebas/voices/piper/en_US-john-medium.onnx",
@@ -134,7 +152,14 @@ class Sebas:
         # --------------------------------------------------
         # Wake Word Detector
         # --------------------------------------------------
-        self.wakeword = WakeWordDetector(callback=self._on_wake_word)
+        self.wakeword = WakeWordDetector(
+            callback=self._on_wake_word,
+            event_bus=self.events
+        )
+
+        # With the audio process, command capture reads the same shared frames
+        if hasattr(self.wakeword.detector, 'create_reader'):
+            self.stt.set_frame_source(self.wakeword.detector.create_reader())
 
         logging.info("[SEBAS] Stage 1 fully initialized")
 
@@ -144,15 +169,25 @@ class Sebas:
     # ========================================================
     #                   Speech Output
     # ========================================================
-    def speak(self, text: str):
-        """Send text to TTS engine and emit events."""
+    def speak(self, text: str, priority=None):
+        """
+        Send text to TTS engine and emit events.
+
+        Args:
+            priority: "urgent" interrupts current speech (reminders, errors),
+                "low" waits behind normal answers; default "normal"
+        """
         if not text:
             return
 
         logging.info(f"[SEBAS] Speaking: {text}")
         self.events.emit("core.before_speak", text)
 
-        self.tts.speak(text)
+        current = getattr(self._command_local, 'result', None)
+        if current is not None:
+            current.spoken.append(text)
+
+        self.tts.speak(text, priority=priority)
 
         self.events.emit("core.after_speak", text)
 
@@ -162,7 +197,8 @@ class Sebas:
     def listen(self, timeout: int = 5) -> str:
         """Capture user audio, transcribe, and send events."""
         self.events.emit("core.listen_start", None)
-        text = self.stt.listen(timeout=timeout)
+        with self.tracer.span("stt.listen"):
+            text = self.stt.listen(timeout=timeout)
         self.events.emit("core.listen_end", text)
         return text
 
@@ -177,8 +213,16 @@ class Sebas:
             detected_text: The full text that was recognized (e.g., "sebas open notepad")
         """
         logging.info(f"[WakeWord] Detected! Text: '{detected_text}'")
+        with self.tracer.span("core.wake_word_callback"):
+            self._handle_wake_word(detected_text)
+
+    def _handle_wake_word(self, detected_text=None):
+        """Speak the acknowledgement and run the command (traced by caller)."""
         self.events.emit("core.wake_word_detected", detected_text)
         
+        # Barge-in: the user is talking over SEBAS - stop within one audio block
+        self.tts.barge_in()
+        
         # Check if command was included in the wake word detection
         if detected_text and isinstance(detected_text, str):
             # Remove the wake word from the text to extract the command
@@ -207,18 +251,49 @@ class Sebas:
     # ========================================================
     #           Command Parsing + Intent Handling
     # ========================================================
-    def parse_and_execute(self, raw_command: str, source: str = 'voice') -> str:
+    def parse_and_execute(self, raw_command: str, source: str = 'voice',
+                          request_id: Optional[str] = None) -> CommandResult:
         """
         NLU pipeline with event hooks and learning support.
-        Returns response message for UI/API.
+        
+        Returns:
+            CommandResult with intent, slots, confidence, the skill's
+            SkillResponse, spoken text and per-stage timings (str() gives
+            the short status message)
         """
+        result = CommandResult(text=raw_command or "", source=source, request_id=request_id)
         if not raw_command:
-            return "No command received"
+            result.status = 'empty'
+            result.message = "No command received"
+            return result
 
+        outer = getattr(self._command_local, 'result', None)
+        self._command_local.result = result
+        try:
+            with self.tracer.span("core.parse_and_execute", source=source), result.timed("total"):
+                self._parse_and_execute(raw_command, source, result)
+        finally:
+            self._command_local.result = outer
+
+        logging.info(f"[SEBAS] Command '{raw_command}' -> {result.status} "
+                     f"(intent={result.intent}, confidence={result.confidence}, timings={result.timings_ms})")
+        self.events.emit("core.command_completed", result)
+        return result
+
+    def _reply(self, result: CommandResult, status: str, msg: str, priority=None) -> CommandResult:
+        """Finish a result with a spoken message."""
+        result.status = status
+        result.message = msg
+        self.speak(msg, priority=priority)
+        return result
+
+    def _parse_and_execute(self, raw_command: str, source: str, result: CommandResult) -> CommandResult:
+        """Body of parse_and_execute, run inside its trace span."""
         self.events.emit("core.command_received", raw_command)
 
         # Detect language BEFORE lowercasing
-        self.language_manager.detect_language(raw_command)
+        with result.timed("language"):
+            self.language_manager.detect_language(raw_command)
         command = raw_command.lower().strip()
 
         # -------- Manual language switching --------
@@ -230,27 +305,23 @@ class Sebas:
             )
             if self.language_manager.set_language(lang):
                 msg = f"Language set to {self.language_manager.get_current_language_name()}"
-                self.speak(msg)
-                return msg
+                return self._reply(result, 'language', msg)
             else:
-                msg = "Unsupported language."
-                self.speak(msg)
-                return msg
+                return self._reply(result, 'language', "Unsupported language.")
 
         # -------- Natural Language Understanding (with Learning) --------
         intent = None
         try:
-            # Use learning-enhanced NLU if available
-            if hasattr(self.nlu, 'parse'):
-                # LearningNLU accepts source parameter
+            with self.tracer.span("nlu.parse"), result.timed("nlu"):
                 if isinstance(self.nlu, LearningNLU):
+                    # LearningNLU accepts source parameter
                     intent = self.nlu.parse(command, source=source)
-                else:
-                    # Basic NLU doesn't accept source
+                elif hasattr(self.nlu, 'get_intent_with_confidence'):
+                    # One pass gives the intent and its confidence
+                    intent, suggestions = self.nlu.get_intent_with_confidence(command)
+                    result.suggestions = list(suggestions or [])
+                elif hasattr(self.nlu, 'parse'):
                     intent = self.nlu.parse(command)
-            elif hasattr(self.nlu, 'get_intent_with_confidence'):
-                # Fallback to basic NLU
-                intent, suggestions = self.nlu.get_intent_with_confidence(command)
         except Exception as e:
             logging.error(f"[NLU] Error parsing command: {e}")
             logging.exception("[NLU] Full traceback:")
@@ -264,18 +335,23 @@ class Sebas:
                 self.command_history.add(command, None, source, False)
             
             msg = "I did not understand, sir. You can teach me by saying: 'this means' followed by the intent name."
-            self.speak(msg)
-            return msg
+            return self._reply(result, 'not_understood', msg)
 
+        result.intent = intent.name
+        result.slots = dict(getattr(intent, 'slots', None) or {})
+        result.confidence = getattr(intent, 'confidence', None)
         self.events.emit("core.intent_detected", intent)
 
         # -------- Handle Learning Correction --------
         if intent.name == 'learning_correction':
+            result.status = 'learning'
             corrected_intent = intent.slots.get('intent', '')
             if hasattr(self, 'learning_integration') and self.learning_integration:
                 success = self.learning_integration.handle_learning_correction(command, corrected_intent)
-                return "Learning correction applied" if success else "Learning correction failed"
-            return "Learning system not available"
+                result.message = "Learning correction applied" if success else "Learning correction failed"
+            else:
+                result.message = "Learning system not available"
+            return result
 
         # Save context
         self.context.add(
@@ -288,24 +364,26 @@ class Sebas:
         )
 
         # -------- Permission Check --------
-        if not is_authorized(self.user_role, intent.name):
+        with self.tracer.span("permission.check"), result.timed("permission"):
+            authorized = is_authorized(self.user_role, intent.name)
+        if not authorized:
             self.events.emit("core.permission_denied", intent)
-            msg = "You do not have permission for this action."
-            self.speak(msg)
-            return msg
+            return self._reply(result, 'denied', "You do not have permission for this action.")
 
         # -------- Dispatch to Skills --------
         try:
-            result = self.skill_registry.handle_intent(intent.name, intent.slots)
+            with self.tracer.span("skill.handle_intent", intent=intent.name), result.timed("skill"):
+                response = self.skill_registry.handle_intent(intent.name, intent.slots)
             
             # Extract boolean success from result
             # Handle both bool and SkillResponse types
-            if hasattr(result, 'success'):
+            if hasattr(response, 'success'):
                 # It's a SkillResponse object
-                handled = result.success
+                result.skill_response = response
+                handled = response.success
             else:
                 # It's a boolean
-                handled = bool(result)
+                handled = bool(response)
             
             # Track execution for learning
             if hasattr(self, 'learning_integration') and self.learning_integration:
@@ -321,12 +399,12 @@ class Sebas:
             
             if handled:
                 self.events.emit("core.intent_handled", intent)
-                return f"Command executed: {intent.name}"
+                result.status = 'handled'
+                result.message = f"Command executed: {intent.name}"
+                return result
             else:
                 self.events.emit("core.intent_unhandled", intent)
-                msg = "This command is not implemented yet, sir."
-                self.speak(msg)
-                return msg
+                return self._reply(result, 'unhandled', "This command is not implemented yet, sir.")
                 
         except Exception as e:
             logging.exception(f"[SKILL] Error executing intent {intent.name}")
@@ -336,9 +414,8 @@ class Sebas:
                     False,
                     error=str(e)
                 )
-            msg = "An error occurred while executing the command."
-            self.speak(msg)
-            return msg
+            return self._reply(result, 'error', "An error occurred while executing the command.",
+                               priority="urgent")
 
     # ========================================================
     #               Startup Routine
@@ -371,12 +448,16 @@ def main():
     logging.info("[SEBAS] Stage 1 Mk.I Enhanced - STARTING")
     logging.info("=" * 60)
 
+    assistant = None
     try:
         # Initialize SEBAS
         assistant = Sebas()
 
         # Register command handler for UI
-        set_command_handler(assistant.parse_and_execute)
+        set_command_handler(lambda text, request_id=None:
+                            assistant.parse_and_execute(text, source='ui', request_id=request_id))
+        # Mic / processing state and command results are pushed to the UI (no polling)
+        bind_ui_events(assistant.events)
 
         # Start UI server
         logging.info("[UI] Starting server on http://127.0.0.1:5000")
@@ -390,7 +471,11 @@ def main():
             host="127.0.0.1",
             port=5002
         )
-        api.start()
+        if os.environ.get("SEBAS_API_ASYNC", "0") == "1":
+            # Event-loop front-end: skills run on executors, not one thread per request
+            AsyncAPIServer(api).start()
+        else:
+            api.start()
 
         # Start SEBAS core
         assistant.start()
@@ -415,6 +500,8 @@ def main():
 
     except KeyboardInterrupt:
         logging.info("\n[SEBAS] Shutting down Stage 1...")
+        if assistant is not None and assistant.event_log:
+            assistant.event_log.close()  # Write and fsync the tail of the event log
     except Exception as e:
         logging.exception("[ERROR] FATAL ERROR in SEBAS Stage 1")
         sys.exit(1)
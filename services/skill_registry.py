@@ -11,6 +11,7 @@ from typing import List, Dict, Any, Optional, Set
 from sebas.skills.base_skill import BaseSkill
 import logging
 from sebas.integrations.response_models import SkillResponse, error_response
+from sebas.services.tracing import get_tracer
 
 
 class SkillRegistry:
@@ -145,12 +146,13 @@ class SkillRegistry:
                 sig = inspect.signature(skill.handle)
                 params = list(sig.parameters.keys())
                 
-                if len(params) >= 4:
-                    # Old style: handle(self, intent, slots, sebas)
-                    result = skill.handle(intent, slots, self.assistant) # type: ignore
-                else:
-                    # New style: handle(self, intent, slots)
-                    result = skill.handle(intent, slots)
+                with get_tracer().span("skill.execute", skill=skill.__class__.__name__):
+                    if len(params) >= 4:
+                        # Old style: handle(self, intent, slots, sebas)
+                        result = skill.handle(intent, slots, self.assistant) # type: ignore
+                    else:
+                        # New style: handle(self, intent, slots)
+                        result = skill.handle(intent, slots)
                 
                 # ✅ Handle both SkillResponse and bool returns
                 if isinstance(result, SkillResponse):
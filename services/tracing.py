@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Latency Tracing - Stage 2
+End-to-end timing of a voice command, from wake word to first audio sample.
+
+A Trace is created in the wake word detection loop and made "current" for
+that thread, so every stage on the way (callback, STT, parse, NLU,
+permission check, skill dispatch) can add a span without the trace being
+passed through each signature:
+
+    with tracer.span("nlu.parse"):
+        intent = nlu.parse(command)
+
+Work handed to another thread (the TTS queue) carries the trace object
+explicitly and keeps it open with retain()/release(). The trace is
+recorded once the last holder releases it.
+
+All timestamps come from time.perf_counter() (monotonic). Completed traces
+feed per-stage histograms and can be exported as Chrome trace JSON
+(chrome://tracing, Perfetto).
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class Span:
+    """One timed stage of a trace."""
+
+    __slots__ = ("name", "start", "end", "thread", "args")
+
+    def __init__(self, name: str, start: float, thread: str, args: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.thread = thread
+        self.args = args or {}
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end is None:
+            return 0.0
+        return (self.end - self.start) * 1000
+
+
+class Trace:
+    """Spans belonging to one voice command."""
+
+    def __init__(self, tracer: "LatencyTracer", trace_id: int, name: str, start: Optional[float] = None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.name = name
+        self.start = start if start is not None else time.perf_counter()
+        self.spans: List[Span] = []
+        self.marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._holders = 1
+        self.finished = False
+
+    # ---------- spans ----------
+    def begin(self, name: str, start: Optional[float] = None, **args) -> Span:
+        """Open a span; close it with end()."""
+        span = Span(name, start if start is not None else time.perf_counter(),
+                    threading.current_thread().name, args)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end(self, span: Span, end: Optional[float] = None):
+        span.end = end if end is not None else time.perf_counter()
+
+    def add_span(self, name: str, start: float, end: float, **args) -> Span:
+        """Record a span measured elsewhere (e.g. queue wait)."""
+        span = self.begin(name, start, **args)
+        span.end = end
+        return span
+
+    def mark(self, name: str, when: Optional[float] = None):
+        """Record an instant (first one wins, e.g. 'tts.first_sample')."""
+        with self._lock:
+            self.marks.setdefault(name, when if when is not None else time.perf_counter())
+
+    # ---------- lifetime ----------
+    def retain(self) -> "Trace":
+        """Keep the trace open while another thread works on it."""
+        with self._lock:
+            self._holders += 1
+        return self
+
+    def release(self):
+        """Drop one holder; the last release records the trace."""
+        with self._lock:
+            self._holders -= 1
+            done = self._holders <= 0 and not self.finished
+            if done:
+                self.finished = True
+        if done:
+            self.tracer._record(self)
+
+    def first_audio_ms(self) -> Optional[float]:
+        first = self.marks.get("tts.first_sample")
+        return (first - self.start) * 1000 if first is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "first_audio_ms": self.first_audio_ms(),
+            "spans": [
+                {
+                    "name": s.name,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration_ms, 3),
+                    "thread": s.thread,
+                    **({"args": s.args} if s.args else {}),
+                }
+                for s in self.spans
+            ],
+            "marks": {k: round((v - self.start) * 1000, 3) for k, v in self.marks.items()},
+        }
+
+
+class StageHistogram:
+    """Fixed-bucket latency histogram for one stage."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: deque = deque(maxlen=256)  # for percentiles
+
+    def add(self, ms: float):
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def _percentile(self, ordered: List[float], p: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        buckets = {f"le_{b}": c for b, c in zip(BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self._percentile(ordered, 0.50), 3),
+            "p95_ms": round(self._percentile(ordered, 0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class LatencyTracer:
+    """Creates traces, keeps recent ones and aggregates per-stage histograms."""
+
+    def __init__(self, max_traces: int = 50, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("SEBAS_TRACING", "1") != "0"
+        self.enabled = enabled
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._traces: deque = deque(maxlen=max_traces)
+        self._histograms: Dict[str, StageHistogram] = {}
+        self._origin = time.perf_counter()  # Chrome trace time zero
+
+    # ---------- current trace ----------
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def activate(self, trace: Optional[Trace]):
+        """Make trace current for this thread inside the block."""
+        previous = self.current()
+        self._local.trace = trace
+        try:
+            yield trace
+        finally:
+            self._local.trace = previous
+
+    def start_trace(self, name: str, start: Optional[float] = None) -> Optional[Trace]:
+        if not self.enabled:
+            return None
+        return Trace(self, next(self._ids), name, start)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """Time a block as a span of the current trace (no-op without one)."""
+        trace = self.current()
+        if trace is None:
+            yield None
+            return
+        span = trace.begin(name, **args)
+        try:
+            yield span
+        finally:
+            trace.end(span)
+
+    # ---------- aggregation ----------
+    def _record(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+            for span in trace.spans:
+                if span.end is not None:
+                    self._histograms.setdefault(span.name, StageHistogram()).add(span.duration_ms)
+            first_audio = trace.first_audio_ms()
+            if first_audio is not None:
+                self._histograms.setdefault("total.first_audio", StageHistogram()).add(first_audio)
+
+        logging.debug(f"[Tracing] {trace.name} #{trace.trace_id}: first audio "
+                      f"{trace.first_audio_ms() or 0:.0f} ms, {len(trace.spans)} spans")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage histograms."""
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self._histograms.items())}
+
+    def get_recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)[-limit:]
+        return [t.to_dict() for t in reversed(traces)]
+
+    def reset(self):
+        with self._lock:
+            self._traces.clear()
+            self._histograms.clear()
+
+    def export_chrome_trace(self) -> Dict[str, Any]:
+        """Recent traces in Chrome trace event format (microsecond timestamps)."""
+        with self._lock:
+            traces = list(self._traces)
+
+        events = []
+        thread_ids: Dict[str, int] = {}
+        for trace in traces:
+            for span in trace.spans:
+                if span.end is None:
+                    continue
+                tid = thread_ids.setdefault(span.thread, len(thread_ids) + 1)
+                events.append({
+                    "name": span.name,
+                    "cat": trace.name,
+                    "ph": "X",
+                    "ts": round((span.start - self._origin) * 1e6, 1),
+                    "dur": round((span.end - span.start) * 1e6, 1),
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"trace_id": trace.trace_id, **span.args},
+                })
+            for name, when in trace.marks.items():
+                events.append({
+                    "name": name,
+                    "cat": trace.name,
+                    "ph": "i",
+                    "s": "p",
+                    "ts": round((when - self._origin) * 1e6, 1),
+                    "pid": 1,
+                    "tid": 0,
+                    "args": {"trace_id": trace.trace_id},
+                })
+
+        for thread, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# ============================================================
+#                     Global instance
+# ============================================================
+
+_tracer: Optional[LatencyTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> LatencyTracer:
+    """Process-wide tracer shared by wake word, core, skills and TTS."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = LatencyTracer()
+    return _tracer
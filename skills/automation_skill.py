@@ -487,7 +487,7 @@ class AutomationSkill(BaseSkill):
             if delay:
                 time.sleep(delay)
             try:
-                self.assistant.speak(f"Reminder: {message}")
+                self.assistant.speak(f"Reminder: {message}", priority="urgent")
             except Exception:
                 logging.exception("reminder speak failed")
 
@@ -0,0 +1,334 @@
+"""
+Audio Preprocessor - Stage 2
+Noise suppression, high-pass filter and automatic gain before recognition.
+
+Runs on each int16 frame right before it is handed to
+KaldiRecognizer.AcceptWaveform():
+
+    int16 -> float32 -> STFT (512-sample sub-frames, sqrt-Hann, 50% overlap)
+          -> [high-pass + spectral subtraction mask] -> irFFT -> overlap-add
+          -> AGC -> int16
+
+The spectral stage works on fixed sub-frames rather than on whole reads:
+a mask applied to one rectangular block is a circular convolution (its
+tail wraps into its head) and its gain would jump at every block edge.
+Sub-frames are streamed across reads, so the output keeps the input
+length but lags it by a constant 32 ms (one sub-frame).
+
+All work buffers are allocated once and reused, so a 250 ms frame costs
+well under a millisecond. On NumPy >= 2.0 the FFTs also write into the
+preallocated spectrum buffers.
+
+Switch per deployment with SEBAS_AUDIO_PREPROCESS:
+    off (default)       no processing
+    on | all            noise suppression + high-pass + AGC
+    ns,hpf,agc          any subset of the three stages
+"""
+
+import inspect
+import logging
+import os
+import time
+from typing import Optional, Dict
+
+import numpy as np
+
+
+# NumPy 2.0 added out= to the FFT functions
+_FFT_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+
+STAGES = ("ns", "hpf", "agc")
+
+STFT_FRAME = 512  # 32 ms at 16 kHz
+STFT_HOP = STFT_FRAME // 2
+
+
+class _FrameBuffers:
+    """Work buffers for one read length."""
+
+    def __init__(self, n: int):
+        self.samples = np.zeros(n, dtype=np.float32)
+        self.pcm = np.zeros(n, dtype=np.int16)
+
+
+class _Stft:
+    """Streaming STFT state: sub-frame buffers, input/output FIFOs, noise estimate."""
+
+    def __init__(self):
+        bins = STFT_FRAME // 2 + 1
+        # sqrt of a periodic Hann on analysis and synthesis: w^2 sums to 1 at 50% overlap
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(STFT_FRAME) / STFT_FRAME))
+        self.frame = np.zeros(STFT_FRAME, dtype=np.float64)
+        self.time = np.zeros(STFT_FRAME, dtype=np.float64)
+        self.overlap = np.zeros(STFT_FRAME, dtype=np.float64)  # pending overlap-add sums
+        self.spectrum = np.zeros(bins, dtype=np.complex128)
+        self.magnitude = np.zeros(bins, dtype=np.float64)
+        self.mask = np.zeros(bins, dtype=np.float64)
+        self.scratch = np.zeros(bins, dtype=np.float64)
+        self.noise: Optional[np.ndarray] = None  # noise magnitude estimate
+        self.frames = 0
+
+        # FIFOs sized on first use / when reads get longer
+        self.inbuf = np.zeros(0, dtype=np.float64)
+        self.outbuf = np.zeros(0, dtype=np.float64)
+        self.in_len = 0
+        self.out_len = 0
+
+    def ensure_capacity(self, n: int):
+        if self.inbuf.size >= STFT_FRAME + n:
+            return
+        inbuf = np.zeros(STFT_FRAME + n, dtype=np.float64)
+        outbuf = np.zeros(STFT_FRAME + n, dtype=np.float64)
+        if self.inbuf.size == 0:
+            # Primed with silence: one sub-frame of history, one hop of output
+            self.in_len = STFT_FRAME - STFT_HOP
+            self.out_len = STFT_HOP
+        else:
+            inbuf[:self.in_len] = self.inbuf[:self.in_len]
+            outbuf[:self.out_len] = self.outbuf[:self.out_len]
+        self.inbuf, self.outbuf = inbuf, outbuf
+
+
+class AudioPreprocessor:
+    """Frame-by-frame noise suppression, high-pass filter and AGC."""
+
+    def __init__(self, sample_rate: int = 16000,
+                 noise_suppression: bool = True, highpass: bool = True, agc: bool = True,
+                 highpass_hz: float = 100.0,
+                 over_subtraction: float = 1.5, spectral_floor: float = 0.1,
+                 noise_adapt: float = 0.99, noise_clamp: float = 1.5, noise_frames: int = 32,
+                 target_rms: float = 3000.0, max_gain: float = 8.0,
+                 agc_gate_rms: float = 150.0, agc_attack: float = 0.5, agc_release: float = 0.1):
+        """
+        Args:
+            sample_rate: Input sample rate
+            noise_suppression: Enable spectral subtraction
+            highpass: Enable the high-pass filter
+            agc: Enable automatic gain control
+            highpass_hz: Cut-off of the high-pass filter (hum, fan rumble)
+            over_subtraction: Multiple of the noise estimate removed per bin
+            spectral_floor: Minimum gain per bin, avoids "musical noise"
+            noise_adapt: Smoothing of the noise estimate per 16 ms hop
+                (0..1, higher = slower)
+            noise_clamp: Per sub-frame, a bin enters the noise estimate at
+                most at this multiple of its current estimate
+            noise_frames: Sub-frames always used to learn the noise at
+                start-up (32 = about half a second)
+            target_rms: AGC target level (int16 RMS)
+            max_gain: AGC gain limit (1/max_gain is the lower limit)
+            agc_gate_rms: Frames quieter than this do not move the AGC gain,
+                so silence is not amplified up to the target level
+            agc_attack: Gain smoothing when the gain must go down
+            agc_release: Gain smoothing when the gain may go up
+        """
+        self.sample_rate = sample_rate
+        self.noise_suppression = noise_suppression
+        self.highpass = highpass
+        self.agc = agc
+        self.highpass_hz = highpass_hz
+        self.over_subtraction = over_subtraction
+        self.spectral_floor = spectral_floor
+        self.noise_adapt = noise_adapt
+        self.noise_clamp = noise_clamp
+        self.noise_frames = noise_frames
+        self.target_rms = target_rms
+        self.max_gain = max_gain
+        self.agc_gate_rms = agc_gate_rms
+        self.agc_attack = agc_attack
+        self.agc_release = agc_release
+
+        self.gain = 1.0
+        self.frames = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._buffers: Dict[int, _FrameBuffers] = {}
+        self._stft = _Stft()
+
+    @property
+    def enabled_stages(self) -> list:
+        flags = {"ns": self.noise_suppression, "hpf": self.highpass, "agc": self.agc}
+        return [stage for stage in STAGES if flags[stage]]
+
+    def _get_buffers(self, n: int) -> _FrameBuffers:
+        buffers = self._buffers.get(n)
+        if buffers is None:
+            buffers = self._buffers[n] = _FrameBuffers(n)
+        return buffers
+
+    # ------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------
+    def process(self, data: bytes) -> bytes:
+        """
+        Process one frame of int16 mono PCM.
+
+        Returns:
+            Processed frame, same length and format
+        """
+        started = time.perf_counter()
+        n = len(data) // 2
+        if n == 0:
+            return data
+
+        buf = self._get_buffers(n)
+        x = buf.samples
+        np.copyto(x, np.frombuffer(data, dtype=np.int16, count=n), casting="unsafe")
+
+        if self.noise_suppression or self.highpass:
+            self._spectral_stage(x, n)
+
+        if self.agc:
+            self._agc_stage(x)
+
+        np.clip(x, -32768, 32767, out=x)
+        np.copyto(buf.pcm, x, casting="unsafe")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.frames += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+        return buf.pcm.tobytes()
+
+    def _spectral_stage(self, x: np.ndarray, n: int):
+        """
+        Overlap-add STFT over the stream: queue the read, filter every
+        complete sub-frame, and replace ``x`` with the oldest n output samples.
+        """
+        st = self._stft
+        st.ensure_capacity(n)
+        inbuf, outbuf = st.inbuf, st.outbuf
+
+        inbuf[st.in_len:st.in_len + n] = x
+        st.in_len += n
+
+        pos = 0
+        while pos + STFT_FRAME <= st.in_len:
+            np.multiply(inbuf[pos:pos + STFT_FRAME], st.window, out=st.frame)
+            self._filter_subframe(st)
+            st.time *= st.window
+            st.overlap += st.time
+            outbuf[st.out_len:st.out_len + STFT_HOP] = st.overlap[:STFT_HOP]
+            st.out_len += STFT_HOP
+            st.overlap[:STFT_HOP] = st.overlap[STFT_HOP:]
+            st.overlap[STFT_HOP:] = 0.0
+            pos += STFT_HOP
+
+        # Keep the unconsumed input (the history of the next sub-frame)
+        st.in_len -= pos
+        inbuf[:st.in_len] = inbuf[pos:pos + st.in_len]
+
+        # Priming guarantees out_len >= n: hops produced = floor(samples in / hop)
+        np.copyto(x, outbuf[:n], casting="unsafe")
+        st.out_len -= n
+        outbuf[:st.out_len] = outbuf[n:n + st.out_len]
+
+    def _filter_subframe(self, st: _Stft):
+        """High-pass and spectral subtraction as one gain mask on st.frame -> st.time."""
+        spectrum = st.spectrum
+        magnitude = st.magnitude
+        mask = st.mask
+
+        if _FFT_OUT:
+            np.fft.rfft(st.frame, out=spectrum)
+        else:
+            spectrum[:] = np.fft.rfft(st.frame)
+        np.abs(spectrum, out=magnitude)
+
+        mask.fill(1.0)
+
+        if self.noise_suppression:
+            if st.noise is None:
+                st.noise = magnitude.copy()
+            else:
+                # Per-bin update, clamped so speech peaks cannot pull the
+                # estimate up quickly; steady tones (hum, fans) still get in
+                scratch = st.scratch
+                if st.frames < self.noise_frames:
+                    np.copyto(scratch, magnitude)
+                else:
+                    np.multiply(st.noise, self.noise_clamp, out=scratch)
+                    np.minimum(scratch, magnitude, out=scratch)
+                st.noise *= self.noise_adapt
+                scratch *= 1.0 - self.noise_adapt
+                st.noise += scratch
+            st.frames += 1
+
+            # mask = max(1 - k * noise / |X|, floor)
+            np.maximum(magnitude, 1e-9, out=mask)
+            np.divide(st.noise, mask, out=mask)
+            mask *= -self.over_subtraction
+            mask += 1.0
+            np.maximum(mask, self.spectral_floor, out=mask)
+
+        if self.highpass:
+            cutoff_bin = int(self.highpass_hz * STFT_FRAME / self.sample_rate) + 1
+            mask[:cutoff_bin] = 0.0
+            mask[cutoff_bin] *= 0.5  # one-bin transition instead of a brick wall
+
+        spectrum *= mask
+
+        if _FFT_OUT:
+            np.fft.irfft(spectrum, n=STFT_FRAME, out=st.time)
+        else:
+            st.time[:] = np.fft.irfft(spectrum, n=STFT_FRAME)
+
+    def _agc_stage(self, x: np.ndarray):
+        """Smoothed gain towards target_rms, frozen on quiet frames."""
+        rms = float(np.sqrt(np.dot(x, x) / x.size))
+        if rms >= self.agc_gate_rms:
+            desired = min(self.max_gain, max(1.0 / self.max_gain, self.target_rms / max(rms, 1e-6)))
+            rate = self.agc_attack if desired < self.gain else self.agc_release
+            self.gain += rate * (desired - self.gain)
+        if self.gain != 1.0:
+            x *= self.gain
+
+    def reset(self):
+        """Forget the noise estimate, the STFT stream and AGC gain (e.g. device change)."""
+        self._buffers.clear()
+        self._stft = _Stft()
+        self.gain = 1.0
+        self.frames = 0
+
+    def get_status(self) -> dict:
+        return {
+            'stages': self.enabled_stages,
+            'frames': self.frames,
+            'gain': round(self.gain, 3),
+            'avg_ms': round(self.total_ms / self.frames, 4) if self.frames else 0.0,
+            'max_ms': round(self.max_ms, 4),
+        }
+
+
+def create_preprocessor(setting: Optional[str] = None, **kwargs) -> Optional[AudioPreprocessor]:
+    """
+    Build the preprocessor selected by config.
+
+    Args:
+        setting: Overrides env SEBAS_AUDIO_PREPROCESS ("off", "on", "ns,hpf,agc")
+
+    Returns:
+        AudioPreprocessor, or None when preprocessing is off
+    """
+    setting = (setting if setting is not None else os.environ.get("SEBAS_AUDIO_PREPROCESS", "off")).strip().lower()
+    if setting in ("", "0", "off", "false", "none"):
+        return None
+
+    if setting in ("1", "on", "true", "all"):
+        stages = set(STAGES)
+    else:
+        stages = {s.strip() for s in setting.split(",") if s.strip()}
+        unknown = stages - set(STAGES)
+        if unknown:
+            logging.warning(f"[AudioPreprocessor] Ignoring unknown stages: {sorted(unknown)}")
+        stages &= set(STAGES)
+        if not stages:
+            return None
+
+    logging.info(f"[AudioPreprocessor] Enabled stages: {sorted(stages)}")
+    return AudioPreprocessor(
+        noise_suppression="ns" in stages,
+        highpass="hpf" in stages,
+        agc="agc" in stages,
+        **kwargs
+    )
@@ -5,6 +5,7 @@ With graceful fallback if Vosk not available
 
 import logging
 import os
+import time
 from pathlib import Path
 
 # Try to import Vosk
@@ -12,12 +13,14 @@ try:
     import vosk
     import pyaudio
     import json
+    import numpy as np
     VOSK_AVAILABLE = True
 except ImportError:
     VOSK_AVAILABLE = False
     logging.warning("[STT] Vosk not available - using text input fallback")
 
 from sebas.stt.stt_none import NoSTT
+from sebas.stt.audio_preprocessor import create_preprocessor
 
 
 class STTManager:
@@ -28,9 +31,27 @@ class STTManager:
     Mode 2: Text input fallback (for testing)
     """
     
-    def __init__(self, language_manager=None):
+    def __init__(self, language_manager=None, event_bus=None,
+                 endpoint_ms=None, vad_threshold=None,
+                 max_utterance_s=None, chunk_ms=None):
+        """
+        Args:
+            language_manager: Optional LanguageManager
+            event_bus: Optional EventBus for live transcripts
+            endpoint_ms: Stop this long after the last partial change / voiced
+                chunk once speech started (env SEBAS_STT_ENDPOINT_MS, default 700)
+            vad_threshold: Mean absolute int16 level counted as voice
+                (env SEBAS_STT_VAD_THRESHOLD, default 300); 0 turns the
+                energy gate off - only partial-transcript changes count
+                as activity
+            max_utterance_s: Hard cap on a single capture
+                (env SEBAS_STT_MAX_SECONDS, default 10)
+            chunk_ms: Audio read size in milliseconds
+                (env SEBAS_STT_CHUNK_MS, default 100)
+        """
         print("[STT DEBUG] STTManager.__init__() called")  # Use print, not logging
         self.language_manager = language_manager
+        self.event_bus = event_bus  # Optional EventBus for live transcripts
         self.model = None
         self.recognizer = None
         self.engine = None
@@ -38,11 +59,28 @@ class STTManager:
         
         # Audio configuration
         self.RATE = 16000
-        self.CHUNK = 8000
+        self.chunk_ms = max(10, int(chunk_ms if chunk_ms is not None  # a 0-sample read would spin
+                                    else os.environ.get("SEBAS_STT_CHUNK_MS", 100)))
+        self.CHUNK = int(self.RATE * self.chunk_ms / 1000)
         self.FORMAT = None
         self.CHANNELS = 1
         self.pa_format = None
         
+        # Adaptive endpointing (see _listen_vosk); an explicit 0 is a value, not "unset"
+        self.endpoint_ms = int(endpoint_ms if endpoint_ms is not None
+                               else os.environ.get("SEBAS_STT_ENDPOINT_MS", 700))
+        self.vad_threshold = float(vad_threshold if vad_threshold is not None
+                                   else os.environ.get("SEBAS_STT_VAD_THRESHOLD", 300))
+        self.max_utterance_s = float(max_utterance_s if max_utterance_s is not None
+                                     else os.environ.get("SEBAS_STT_MAX_SECONDS", 10))
+        self.last_capture_metrics: dict = {}
+        
+        # Optional shared audio source (audio process) instead of PyAudio
+        self.frame_source = None
+        
+        # Optional noise suppression / high-pass / AGC (SEBAS_AUDIO_PREPROCESS)
+        self.preprocessor = create_preprocessor()
+        
         print("[STT DEBUG] About to call _init_vosk()")
         self._init_vosk()
         print(f"[STT DEBUG] After _init_vosk(), mode={self.mode}")
@@ -137,7 +175,21 @@ class STTManager:
         return ""
     
     def _listen_vosk(self, timeout: int) -> str:
-        """Listen using Vosk (original implementation)"""
+        """
+        Listen using Vosk with adaptive endpointing.
+        
+        Capture stops as soon as one of these happens:
+            - Vosk reports a final result on its own
+            - speech started and, for ``endpoint_ms``, the partial
+              transcript has not changed and no chunk was above the
+              VAD energy threshold
+            - no speech at all within ``timeout`` seconds
+            - the capture reached ``max_utterance_s``
+        
+        Timing is measured in audio time (samples read), so it is not
+        skewed by scheduling jitter. The result is kept in
+        ``last_capture_metrics``.
+        """
         # Type guard - ensure recognizer is available
         if not self.recognizer:
             logging.error("[STT] Vosk recognizer not initialized")
@@ -145,60 +197,83 @@ class STTManager:
         
         import pyaudio
         
-        audio = pyaudio.PyAudio()
+        audio = None
         stream = None
         
         try:
-            # Use stored format (guaranteed to be set if we got here)
-            audio_format = self.pa_format if self.pa_format is not None else pyaudio.paInt16
-            
-            stream = audio.open(
-                format=audio_format,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK
-            )
+            if self.frame_source is not None:
+                # Audio comes from the capture process - no second device open
+                self.frame_source.skip_to_latest()
+                read_chunk = self.frame_source.read
+            else:
+                audio = pyaudio.PyAudio()
+                
+                # Use stored format (guaranteed to be set if we got here)
+                audio_format = self.pa_format if self.pa_format is not None else pyaudio.paInt16
+                
+                stream = audio.open(
+                    format=audio_format,
+                    channels=self.CHANNELS,
+                    rate=self.RATE,
+                    input=True,
+                    frames_per_buffer=self.CHUNK
+                )
+                read_chunk = lambda n: stream.read(n, exception_on_overflow=False)
             
             logging.info("[STT] Listening... (speak now)")
             
-            frames = []
-            silence_threshold = 3
-            silence_chunks = int(silence_threshold * self.RATE / self.CHUNK)
-            silent_chunks_count = 0
-            has_speech = False
+            started = time.monotonic()
+            samples_read = 0
+            speech_start_ms = None
+            last_activity_ms = 0.0
+            last_partial = ""
             
             while True:
-                data = stream.read(self.CHUNK, exception_on_overflow=False)
-                frames.append(data)
+                data = read_chunk(self.CHUNK)
+                samples_read += self.CHUNK
+                now_ms = samples_read * 1000.0 / self.RATE
+                voiced = self.vad_threshold > 0 and self._frame_energy(data) >= self.vad_threshold
+                
+                if self.preprocessor is not None:
+                    data = self.preprocessor.process(data)
                 
                 if self.recognizer.AcceptWaveform(data):
                     result = json.loads(self.recognizer.Result())
                     text = result.get('text', '').strip()
                     if text:
-                        has_speech = True
                         logging.info(f"[STT] Recognized: {text}")
-                        return text
+                        return self._finish_capture(
+                            text, "vosk_final", now_ms, speech_start_ms, last_activity_ms, started
+                        )
                 else:
                     partial = json.loads(self.recognizer.PartialResult())
                     partial_text = partial.get('partial', '')
-                    if partial_text:
-                        has_speech = True
-                        silent_chunks_count = 0
-                    else:
-                        silent_chunks_count += 1
+                    if partial_text and partial_text != last_partial:
+                        last_partial = partial_text
+                        last_activity_ms = now_ms
+                        if speech_start_ms is None:
+                            speech_start_ms = now_ms
+                        self._publish_transcript(partial_text, final=False)
                 
-                # Stop after silence
-                if has_speech and silent_chunks_count > silence_chunks:
-                    final_result = json.loads(self.recognizer.FinalResult())
-                    text = final_result.get('text', '').strip()
-                    return text
+                # Energy only extends an utterance that already started,
+                # otherwise background noise would keep us listening
+                if voiced and speech_start_ms is not None:
+                    last_activity_ms = now_ms
                 
-                # Timeout after 10 seconds
-                if len(frames) > (10 * self.RATE / self.CHUNK):
+                reason = None
+                if speech_start_ms is not None and now_ms - last_activity_ms >= self.endpoint_ms:
+                    reason = "endpoint"
+                elif speech_start_ms is None and now_ms >= timeout * 1000:
+                    reason = "no_speech"
+                elif now_ms >= self.max_utterance_s * 1000:
+                    reason = "max_duration"
+                
+                if reason:
                     final_result = json.loads(self.recognizer.FinalResult())
                     text = final_result.get('text', '').strip()
-                    return text
+                    return self._finish_capture(
+                        text, reason, now_ms, speech_start_ms, last_activity_ms, started
+                    )
         
         except Exception as e:
             logging.exception(f"[STT] Error during listening: {e}")
@@ -208,7 +283,64 @@ class STTManager:
             if stream:
                 stream.stop_stream()
                 stream.close()
-            audio.terminate()
+            if audio:
+                audio.terminate()
+    
+    def _frame_energy(self, data: bytes) -> float:
+        """Mean absolute level of an int16 chunk (cheap VAD measure)."""
+        samples = np.frombuffer(data, dtype=np.int16)
+        if not samples.size:
+            return 0.0
+        return float(np.abs(samples).mean())
+    
+    def _finish_capture(self, text: str, reason: str, audio_ms: float,
+                        speech_start_ms, last_activity_ms: float, started: float) -> str:
+        """Record endpointing metrics and publish the final transcript."""
+        self.last_capture_metrics = {
+            'reason': reason,
+            'audio_ms': round(audio_ms, 1),
+            'speech_start_ms': round(speech_start_ms, 1) if speech_start_ms is not None else None,
+            # Time spent waiting after the last sign of speech
+            'endpoint_wait_ms': round(audio_ms - last_activity_ms, 1) if speech_start_ms is not None else None,
+            'wall_ms': round((time.monotonic() - started) * 1000, 1),
+            'endpoint_ms': self.endpoint_ms,
+            'vad_threshold': self.vad_threshold,
+            'chunk_ms': self.chunk_ms,
+            'max_utterance_s': self.max_utterance_s,
+        }
+        logging.info(f"[STT] Capture finished ({reason}): {self.last_capture_metrics}")
+        
+        self._publish_transcript(text, final=True)
+        return text
+    
+    def _publish_transcript(self, text: str, final: bool):
+        """
+        Publish a live transcript update on the EventBus (if bound).
+        
+        Emits 'stt.partial_transcript' while the user is talking and
+        'stt.final_transcript' once the utterance is complete.
+        """
+        if not self.event_bus or not text:
+            return
+        
+        event_name = "stt.final_transcript" if final else "stt.partial_transcript"
+        self.event_bus.emit(event_name, {
+            'text': text,
+            'final': final,
+            'source': 'stt',
+            'timestamp': time.time()
+        })
+    
+    def set_frame_source(self, source):
+        """
+        Read command audio from a shared source instead of opening the mic.
+        
+        Args:
+            source: Object with read(n_samples) -> bytes and skip_to_latest(),
+                e.g. the audio process SharedFrameReader. None restores PyAudio.
+        """
+        self.frame_source = source
+        logging.info(f"[STT] Audio source: {'shared frames' if source else 'PyAudio'}")
     
     def set_language(self, model_path: str):
         """Switch to a different Vosk model"""
@@ -230,7 +362,15 @@ class STTManager:
             'mode': self.mode,
             'vosk_available': VOSK_AVAILABLE,
             'model_loaded': self.model is not None,
-            'fallback_active': self.mode == 'text_input'
+            'fallback_active': self.mode == 'text_input',
+            'endpointing': {
+                'endpoint_ms': self.endpoint_ms,
+                'vad_threshold': self.vad_threshold,
+                'chunk_ms': self.chunk_ms,
+                'max_utterance_s': self.max_utterance_s,
+            },
+            'last_capture': self.last_capture_metrics,
+            'preprocessing': self.preprocessor.get_status() if self.preprocessor else None
         }
 
 
@@ -239,4 +379,3 @@ class STTManager:
 # - Real-time streaming recognition
 # - Language auto-detection
 # - Noise cancellation
-# - Voice activity detection
@@ -0,0 +1,107 @@
+"""
+SEBAS EVENT LOG TOOL
+
+Inspect the durable event log written when SEBAS_EVENT_LOG_DIR is set:
+- List the events of a time window (optionally as JSON lines)
+- Re-derive statistics by replaying the window into a fresh EventBus
+- Show the segments on disk
+
+Times are unix seconds, ISO dates ("2026-10-18T21:40") or relative to
+now ("-15m", "-2h", "-1d"; pass them as --since=-15m).
+
+Run with:
+    python -m sebas.tools.event_log logs/events --since=-15m
+    python -m sebas.tools.event_log logs/events --since=-1d --topic core.intent_detected --json
+    python -m sebas.tools.event_log logs/events --since=-1h --stats
+    python -m sebas.tools.event_log logs/events --segments
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from sebas.events.event_bus import EventBus
+from sebas.events.event_log import EventLog
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_time(value):
+    """Unix seconds, ISO date or relative offset ("-15m") -> unix seconds."""
+    if value is None:
+        return None
+    value = value.strip()
+    if value.startswith("-") and value[-1:] in _UNITS:
+        return time.time() - float(value[1:-1]) * _UNITS[value[-1]]
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def print_events(log, since, until, topics, as_json, limit):
+    shown = 0
+    for event in log.read(since, until, topics):
+        if as_json:
+            print(json.dumps({"ts": event.ts, "type": event.topic, "source": event.source, "data": event.data},
+                             ensure_ascii=False, default=str))
+        else:
+            stamp = datetime.fromtimestamp(event.ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            print(f"{stamp}  {event.topic:<32} {event.source:<10} {json.dumps(event.data, ensure_ascii=False, default=str)[:120]}")
+        shown += 1
+        if limit and shown >= limit:
+            break
+    return shown
+
+
+def print_stats(log, since, until, topics, as_json):
+    """Replay into a fresh bus and report what it saw."""
+    bus = EventBus(record_history=False)
+    started = time.perf_counter()
+    count = log.replay(bus, since, until, topics)
+    elapsed = time.perf_counter() - started
+
+    emits = {name: info["emits"] for name, info in bus.get_stats().items() if info["emits"]}
+    if as_json:
+        print(json.dumps({"events": count, "by_topic": emits, "replay_s": round(elapsed, 3)}, indent=2))
+        return
+    print(f"Replayed {count} events in {elapsed:.2f}s")
+    for name, n in sorted(emits.items(), key=lambda item: -item[1]):
+        print(f"  {n:>8}  {name}")
+
+
+def print_segments(log):
+    for segment in log.segments():
+        size = segment.path.stat().st_size
+        first = datetime.fromtimestamp(segment.first_ts).isoformat(timespec="seconds")
+        print(f"{segment.path.name}  from {first}  {size / 1024:.1f} KB  {len(segment.load_index())} index entries")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay the SEBAS event log")
+    parser.add_argument("directory", help="Event log directory (SEBAS_EVENT_LOG_DIR)")
+    parser.add_argument("--since", help="Window start (unix, ISO or relative, e.g. --since=-15m)")
+    parser.add_argument("--until", help="Window end (unix, ISO or relative, e.g. --until=-5m)")
+    parser.add_argument("--topic", action="append", help="Only these topics (repeatable)")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after N events")
+    parser.add_argument("--stats", action="store_true", help="Replay into a fresh EventBus and count per topic")
+    parser.add_argument("--segments", action="store_true", help="List segment files")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args(argv)
+
+    log = EventLog(args.directory)
+    since, until = parse_time(args.since), parse_time(args.until)
+
+    if args.segments:
+        print_segments(log)
+    elif args.stats:
+        print_stats(log, since, until, args.topic, args.json)
+    else:
+        print_events(log, since, until, args.topic, args.json, args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
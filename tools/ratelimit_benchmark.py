@@ -0,0 +1,143 @@
+"""
+SEBAS RATE LIMITER BENCHMARK
+
+Compares the sliding-window-counter RateLimiter (api/rate_limit.py) with
+the list-of-timestamps limiter it replaced, reproduced below as
+ListRateLimiter. For each scenario it reports:
+- Mean cost per check (microseconds)
+- Python heap held by the limiter afterwards (tracemalloc, separate run)
+- Identifiers still tracked afterwards
+
+Scenarios:
+- hot:     one client hammering a high limit (cost grows with the limit)
+- clients: many distinct clients, one request each (memory grows with clients)
+- threads: several threads sharing one limiter
+
+Run with:
+    python -m sebas.tools.ratelimit_benchmark
+    python -m sebas.tools.ratelimit_benchmark --requests 50000 --limit 10000 --clients 100000 --json
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from sebas.api.rate_limit import RateLimiter
+
+
+class ListRateLimiter:
+    """The previous algorithm: a list of (timestamp, count) per identifier, rebuilt on every check."""
+
+    def __init__(self, default_rate: int = 100, default_window: int = 60):
+        self.default_rate = default_rate
+        self.default_window = default_window
+        self.requests = defaultdict(list)
+
+    def check_rate_limit(self, identifier):
+        rate, window = self.default_rate, self.default_window
+        now = time.time()
+        cutoff = now - window
+        self.requests[identifier] = [(ts, count) for ts, count in self.requests[identifier] if ts > cutoff]
+        request_count = sum(count for _, count in self.requests[identifier])
+        if request_count >= rate:
+            return False, {'remaining': 0, 'limit': rate}
+        self.requests[identifier].append((now, 1))
+        return True, {'remaining': rate - request_count - 1, 'limit': rate}
+
+    def tracked(self):
+        return len(self.requests)
+
+
+def _tracked(limiter):
+    if hasattr(limiter, "tracked"):
+        return limiter.tracked()
+    return limiter.get_stats()["tracked_identifiers"]
+
+
+def _drive(limiter, identifiers, threads):
+    def worker(chunk):
+        check = limiter.check_rate_limit
+        for identifier in chunk:
+            check(identifier)
+
+    if threads == 1:
+        worker(identifiers)
+        return
+    pool = [threading.Thread(target=worker, args=(identifiers[i::threads],)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def run_scenario(name, factory, identifiers, threads=1):
+    """Time checks for the given identifier sequence; returns a result row."""
+    limiter = factory()
+    started = time.perf_counter()
+    _drive(limiter, identifiers, threads)
+    elapsed = time.perf_counter() - started
+
+    # Memory on a second run: tracemalloc would distort the timing
+    limiter = factory()
+    tracemalloc.start()
+    _drive(limiter, identifiers, threads)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "limiter": type(limiter).__name__,
+        "checks": len(identifiers),
+        "us_per_check": round(elapsed / max(1, len(identifiers)) * 1e6, 2),
+        "heap_kb": round(retained / 1024, 1),
+        "tracked": _tracked(limiter),
+    }
+
+
+def benchmark(requests=20000, limit=5000, clients=50000, threads=4):
+    factories = [
+        lambda: ListRateLimiter(default_rate=limit, default_window=60),
+        lambda: RateLimiter(default_rate=limit, default_window=60, max_identifiers=clients // 2),
+    ]
+    scenarios = [
+        ("hot", ["ip:10.0.0.1"] * requests, 1),
+        ("clients", [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)], 1),
+        ("threads", [f"ip:10.0.0.{i % 8}" for i in range(requests)], threads),
+    ]
+    rows = []
+    for name, identifiers, n_threads in scenarios:
+        for factory in factories:
+            rows.append(run_scenario(name, factory, identifiers, n_threads))
+    return rows
+
+
+def print_report(rows):
+    print(f"{'scenario':<10} {'limiter':<16} {'checks':>8} {'us/check':>9} {'heap KB':>9} {'tracked':>8}")
+    for row in rows:
+        print(f"{row['scenario']:<10} {row['limiter']:<16} {row['checks']:>8} {row['us_per_check']:>9} "
+              f"{row['heap_kb']:>9} {row['tracked']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API rate limiter against the list-based one")
+    parser.add_argument("--requests", type=int, default=20000, help="Checks in the hot and threads scenarios")
+    parser.add_argument("--limit", type=int, default=5000, help="Requests per 60 s window")
+    parser.add_argument("--clients", type=int, default=50000, help="Distinct identifiers in the clients scenario")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = benchmark(args.requests, args.limit, args.clients, args.threads)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_report(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+SEBAS WAKE WORD BENCHMARK
+
+Feeds a recorded WAV file through each wake word engine and reports:
+- CPU time per second of audio and real-time factor
+- Detection latency (audio time of detection minus expected utterance time)
+- Hits, misses and false accepts (also as false accepts per hour)
+
+The recording must be 16 kHz mono 16-bit PCM. Expected wake word
+positions (seconds) come from --expect or a labels file with one
+timestamp per line.
+
+Run with:
+    python -m sebas.tools.wakeword_benchmark recording.wav --expect 1.2,7.8
+    python -m sebas.tools.wakeword_benchmark recording.wav --labels labels.txt --engines vosk,porcupine
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import wave
+from pathlib import Path
+
+from sebas.wakeword.backend import create_wakeword_backend, available_backends
+from sebas.wakeword.wakeword_detector import DEFAULT_VARIATIONS, match_variation
+
+
+# ============================================================
+# Input
+# ============================================================
+
+def load_wav(path):
+    """Read a 16 kHz mono int16 WAV file and return (pcm_bytes, seconds)."""
+    with wave.open(str(path), "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+            raise ValueError(
+                f"{path}: expected 16 kHz mono 16-bit PCM, got "
+                f"{wf.getframerate()} Hz, {wf.getnchannels()} ch, {wf.getsampwidth() * 8}-bit"
+            )
+        pcm = wf.readframes(wf.getnframes())
+        return pcm, wf.getnframes() / 16000
+
+
+def load_labels(expect=None, labels_path=None):
+    """Expected wake word times in seconds, sorted."""
+    times = []
+    if expect:
+        times.extend(float(t) for t in expect.split(",") if t.strip())
+    if labels_path:
+        for line in Path(labels_path).read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                times.append(float(line.split()[0]))
+    return sorted(times)
+
+
+# ============================================================
+# Benchmark
+# ============================================================
+
+def run_engine(name, pcm, keyword="sebas", variations=None):
+    """
+    Feed the recording through one engine frame by frame.
+
+    Returns:
+        dict with 'init_s', 'cpu_s', 'wall_s' and 'detections'
+        (list of (audio_time_s, text))
+    """
+    variations = variations or DEFAULT_VARIATIONS
+
+    t0 = time.perf_counter()
+    engine = create_wakeword_backend(name, keyword=keyword, open_stream=False)
+    init_s = time.perf_counter() - t0
+
+    frame_bytes = engine.frame_length * 2
+    detections = []
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        result = engine.process(pcm[offset:offset + frame_bytes])
+        if not result or not result.get("detected"):
+            continue
+
+        text = result.get("text", "")
+        if not result.get("spotted") and not match_variation(text, variations)[0]:
+            continue
+
+        # Timestamp = end of the frame that produced the detection
+        audio_time = (offset + frame_bytes) / 2 / engine.sample_rate
+        detections.append((audio_time, text))
+
+    cpu_s = time.process_time() - cpu_start
+    wall_s = time.perf_counter() - wall_start
+    engine.cleanup()
+
+    return {"init_s": init_s, "cpu_s": cpu_s, "wall_s": wall_s, "detections": detections}
+
+
+def score(detections, expected, tolerance):
+    """
+    Match detections to expected times.
+
+    A detection counts as a hit for the first unmatched expected time
+    in [expected, expected + tolerance]; everything else is a false accept.
+    """
+    matched = [False] * len(expected)
+    latencies = []
+    false_accepts = 0
+
+    for det_time, _ in detections:
+        for i, exp_time in enumerate(expected):
+            if not matched[i] and exp_time <= det_time <= exp_time + tolerance:
+                matched[i] = True
+                latencies.append(det_time - exp_time)
+                break
+        else:
+            false_accepts += 1
+
+    return {
+        "hits": sum(matched),
+        "misses": len(expected) - sum(matched),
+        "false_accepts": false_accepts,
+        "latencies": latencies,
+    }
+
+
+def benchmark(wav_path, expected, engines, tolerance=2.0, keyword="sebas"):
+    """Run every engine over the recording; returns a list of result rows."""
+    pcm, duration = load_wav(wav_path)
+    rows = []
+
+    for name in engines:
+        try:
+            run = run_engine(name, pcm, keyword=keyword)
+        except Exception as e:
+            rows.append({"engine": name, "error": str(e)})
+            continue
+
+        s = score(run["detections"], expected, tolerance)
+        latencies = s["latencies"]
+        rows.append({
+            "engine": name,
+            "audio_s": round(duration, 2),
+            "init_s": round(run["init_s"], 3),
+            "cpu_ms_per_audio_s": round(run["cpu_s"] * 1000 / duration, 2) if duration else 0.0,
+            "rtf": round(run["wall_s"] / duration, 4) if duration else 0.0,
+            "hits": s["hits"],
+            "misses": s["misses"],
+            "false_accepts": s["false_accepts"],
+            "fa_per_hour": round(s["false_accepts"] * 3600 / duration, 2) if duration else 0.0,
+            "latency_mean_ms": round(sum(latencies) / len(latencies) * 1000) if latencies else None,
+            "latency_max_ms": round(max(latencies) * 1000) if latencies else None,
+            "detections": [(round(t, 2), text) for t, text in run["detections"]],
+        })
+
+    return rows
+
+
+# ============================================================
+# Report
+# ============================================================
+
+def print_report(rows):
+    header = f"{'engine':<10} {'cpu ms/s':>9} {'rtf':>7} {'hits':>5} {'miss':>5} {'FA':>4} {'FA/h':>7} {'lat ms':>7} {'max ms':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if "error" in row:
+            print(f"{row['engine']:<10} unavailable: {row['error']}")
+            continue
+        lat = row["latency_mean_ms"] if row["latency_mean_ms"] is not None else "-"
+        lat_max = row["latency_max_ms"] if row["latency_max_ms"] is not None else "-"
+        print(f"{row['engine']:<10} {row['cpu_ms_per_audio_s']:>9} {row['rtf']:>7} {row['hits']:>5} "
+              f"{row['misses']:>5} {row['false_accepts']:>4} {row['fa_per_hour']:>7} {lat:>7} {lat_max:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark wake word engines on a recording")
+    parser.add_argument("wav", help="16 kHz mono 16-bit WAV recording")
+    parser.add_argument("--expect", help="Comma-separated wake word times in seconds")
+    parser.add_argument("--labels", help="File with one expected wake word time (seconds) per line")
+    parser.add_argument("--engines", default="vosk",
+                        help=f"Comma-separated engines (available: {', '.join(available_backends())})")
+    parser.add_argument("--keyword", default="sebas")
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="Seconds after the expected time a detection still counts")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    expected = load_labels(args.expect, args.labels)
+    engines = [e.strip().lower() for e in args.engines.split(",") if e.strip()]
+    rows = benchmark(args.wav, expected, engines, tolerance=args.tolerance, keyword=args.keyword)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"Recording: {args.wav}  expected wake words: {len(expected)}")
+        print_report(rows)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
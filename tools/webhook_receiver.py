@@ -0,0 +1,201 @@
+"""
+SEBAS WEBHOOK RECEIVER
+
+Local HTTP stand-in for a webhook endpoint, for exercising the delivery
+engine in api/webhooks.py without a real service:
+- Records every POST (body, headers, arrival time)
+- Verifies X-Sebas-Signature when a secret is given
+- Simulates trouble: response delay, a failure rate, a fixed status code,
+  and Retry-After on 429/503
+- Batches (X-Sebas-Batch): can reject single items with
+  {"failed": [indices]} to exercise partial retries
+
+Use it from Python:
+    receiver = WebhookReceiver(secret="s3cret", fail_rate=0.2).start()
+    manager.register_webhook("local", Webhook(url=receiver.url, events=[...], secret="s3cret"))
+    ...
+    print(receiver.get_stats())
+    receiver.stop()
+
+or run it standalone:
+    python -m sebas.tools.webhook_receiver --port 8765 --secret s3cret --fail-rate 0.2 --delay-ms 50
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookReceiver:
+    """Threaded HTTP server that records and optionally rejects webhook POSTs."""
+
+    def __init__(self, host="127.0.0.1", port=0, secret=None, delay_ms=0.0, fail_rate=0.0,
+                 status=200, retry_after=None, seed=None, item_fail_rate=0.0):
+        """
+        Args:
+            port: 0 picks a free port (see .url)
+            secret: Verify signatures with this secret (bad ones get 401)
+            delay_ms: Time spent before answering each request
+            fail_rate: Fraction of requests answered with 503
+            status: Status code for requests that do not fail
+            retry_after: Seconds sent as Retry-After on 429/503
+            item_fail_rate: Fraction of batch items reported back as failed
+        """
+        self.secret = secret
+        self.delay_ms = delay_ms
+        self.fail_rate = fail_rate
+        self.status = status
+        self.retry_after = retry_after
+        self.item_fail_rate = item_fail_rate
+        self.random = random.Random(seed)
+
+        self.received = []  # accepted requests: dicts with body, payload, headers, at
+        self.events = []  # accepted event payloads in arrival order (batches unpacked)
+        self.requests = 0
+        self.batches = 0
+        self.item_failures = 0
+        self.failures = 0
+        self.bad_signatures = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/hook"
+
+    def _handler_class(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled sessions are visible
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, reply = receiver.handle(body, dict(self.headers))
+                self.send_response(status)
+                if status in (429, 503) and receiver.retry_after is not None:
+                    self.send_header("Retry-After", str(receiver.retry_after))
+                if reply:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, body, headers):
+        """Decide the response (status, JSON body bytes) for one request and record it."""
+        with self._lock:
+            self.requests += 1
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            if self.delay_ms:
+                time.sleep(self.delay_ms / 1000.0)
+
+            if self.secret:
+                expected = "sha256=" + hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(expected, headers.get("X-Sebas-Signature", "")):
+                    with self._lock:
+                        self.bad_signatures += 1
+                    return 401, b""
+
+            with self._lock:
+                if self.fail_rate and self.random.random() < self.fail_rate:
+                    self.failures += 1
+                    return 503, b""
+                if self.status >= 400:
+                    return self.status, b""
+
+                payload = json.loads(body or b"null")
+                failed = []
+                if "X-Sebas-Batch" in headers and isinstance(payload, list):
+                    self.batches += 1
+                    failed = [i for i in range(len(payload))
+                              if self.item_fail_rate and self.random.random() < self.item_fail_rate]
+                    self.item_failures += len(failed)
+                    self.events.extend(item for i, item in enumerate(payload) if i not in failed)
+                else:
+                    self.events.append(payload)
+                self.received.append({
+                    "body": body,
+                    "payload": payload,
+                    "headers": headers,
+                    "at": time.time(),
+                })
+            return self.status, json.dumps({"failed": failed}).encode() if failed else b""
+        finally:
+            with self._lock:
+                self.concurrent -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="WebhookReceiver")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "accepted": len(self.received),
+                "events": len(self.events),
+                "batches": self.batches,
+                "item_failures": self.item_failures,
+                "failures": self.failures,
+                "bad_signatures": self.bad_signatures,
+                "max_concurrent": self.max_concurrent,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in webhook endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--secret", help="Verify X-Sebas-Signature with this secret")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Delay before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    parser.add_argument("--status", type=int, default=200, help="Status for non-failing requests")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds on 429/503")
+    parser.add_argument("--item-fail-rate", type=float, default=0.0,
+                        help="Fraction of batch items reported as failed")
+    args = parser.parse_args(argv)
+
+    receiver = WebhookReceiver(args.host, args.port, args.secret, args.delay_ms, args.fail_rate,
+                               args.status, args.retry_after, item_fail_rate=args.item_fail_rate).start()
+    print(f"Listening on {receiver.url} (Ctrl+C to stop)")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            for item in receiver.received[seen:]:
+                print(json.dumps(item["payload"], ensure_ascii=False)[:200])
+            seen = len(receiver.received)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop()
+        print(json.dumps(receiver.get_stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Audio Output - Stage 2
+Long-lived output stream fed through a single-producer/single-consumer
+ring buffer.
+
+The speech worker writes samples into the ring; the PortAudio callback
+copies them into the device buffer, applies volume in place and outputs
+silence when the ring is empty. The stream stays open between
+utterances, so there is no device-open latency and no pop per phrase.
+
+The ring needs no lock: only the writer moves the write index and only
+the callback moves the read index. Both are plain ints, updated after
+the samples are copied. flush() only publishes a target index, which the
+callback applies on its next block, so stop/pause take effect within one
+block (blocksize / sample_rate, ~23 ms at 1024 / 44.1 kHz).
+"""
+
+import logging
+import threading
+import time
+from typing import Optional, Callable
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except ImportError:
+    sd = None
+    SOUNDDEVICE_AVAILABLE = False
+
+
+class AudioRingBuffer:
+    """Lock-free SPSC ring of float32 samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._write = 0   # total samples written (writer only)
+        self._read = 0    # total samples consumed (reader only)
+        self._flush_to = 0
+
+    @property
+    def available(self) -> int:
+        """Samples waiting to be read."""
+        return self._write - max(self._read, self._flush_to)
+
+    @property
+    def free(self) -> int:
+        return self.capacity - (self._write - self._read)
+
+    @property
+    def write_position(self) -> int:
+        return self._write
+
+    @property
+    def read_position(self) -> int:
+        return max(self._read, self._flush_to)
+
+    def write(self, samples: np.ndarray) -> int:
+        """Copy as many samples as fit; returns how many were written."""
+        n = min(len(samples), self.free)
+        if n <= 0:
+            return 0
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:n]
+        self._write += n  # publish after the copy
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fill ``out`` from the ring, zero the rest; returns samples read."""
+        if self._flush_to > self._read:
+            self._read = self._flush_to
+
+        n = min(len(out), self._write - self._read)
+        if n > 0:
+            start = self._read % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self._data[start:start + first]
+            if first < n:
+                out[first:n] = self._data[:n - first]
+            self._read += n
+        if n < len(out):
+            out[n:] = 0.0
+        return max(n, 0)
+
+    def flush(self) -> int:
+        """
+        Discard everything written so far (applied by the reader).
+
+        Returns:
+            Read position at the time of the flush (what was heard)
+        """
+        heard = self._read
+        self._flush_to = self._write
+        return heard
+
+
+class AudioOutput:
+    """Persistent callback output stream with in-place volume."""
+
+    def __init__(self, sample_rate: int, device: Optional[int] = None,
+                 blocksize: int = 1024, buffer_seconds: float = 2.0, volume: float = 1.0):
+        """
+        Args:
+            sample_rate: Initial sample rate (set_sample_rate() changes it)
+            device: Output device id (None = default)
+            blocksize: Samples per callback
+            buffer_seconds: Ring capacity
+            volume: Gain applied in the callback (0.0 to 1.0)
+        """
+        self.device = device
+        self.blocksize = blocksize
+        self.buffer_seconds = buffer_seconds
+        self.volume = volume
+        self.sample_rate = 0
+        self.underruns = 0
+        self.last_flush_position: Optional[int] = None
+        self._stream = None
+        self._ring: Optional[AudioRingBuffer] = None
+        self._lock = threading.Lock()  # open/close only, never taken in the callback
+
+        self.set_sample_rate(sample_rate)
+
+    # ------------------------------------------------------------
+    # Stream lifetime
+    # ------------------------------------------------------------
+    def set_sample_rate(self, sample_rate: int):
+        """(Re)open the stream if the rate differs (e.g. after a voice change)."""
+        if sample_rate == self.sample_rate and self._stream is not None:
+            return
+        with self._lock:
+            self._close_stream()
+            self.sample_rate = sample_rate
+            self._ring = AudioRingBuffer(int(sample_rate * self.buffer_seconds))
+            self._stream = sd.OutputStream(
+                samplerate=sample_rate,
+                channels=1,
+                dtype=np.float32,
+                blocksize=self.blocksize,
+                device=self.device,
+                callback=self._callback
+            )
+            self._stream.start()
+        logging.info(f"[AudioOutput] Stream open at {sample_rate} Hz")
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.abort()
+            self._stream.close()
+        except Exception as e:
+            logging.debug(f"[AudioOutput] Close: {e}")
+        self._stream = None
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+
+    # ------------------------------------------------------------
+    # Real-time callback
+    # ------------------------------------------------------------
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        ring = self._ring
+        if ring is None:
+            out.fill(0.0)
+            return
+        if status and status.output_underflow:
+            self.underruns += 1
+        n = ring.read_into(out)
+        if n and self.volume != 1.0:
+            np.multiply(out[:n], self.volume, out=out[:n])
+
+    # ------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------
+    def play(self, samples: np.ndarray, sample_rate: Optional[int] = None,
+             cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Queue samples for playback, blocking while the ring is full.
+
+        Returns:
+            False if cancelled before everything was queued
+        """
+        if sample_rate and sample_rate != self.sample_rate:
+            self.wait_until_played(cancelled=cancelled)
+            self.set_sample_rate(sample_rate)
+
+        ring = self._ring
+        pos = 0
+        block_s = self.blocksize / self.sample_rate
+        while pos < len(samples):
+            if cancelled and cancelled():
+                return False
+            written = ring.write(samples[pos:])
+            pos += written
+            if pos < len(samples):
+                time.sleep(block_s)
+        return True
+
+    def wait_until_played(self, timeout: Optional[float] = None,
+                          cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Block until everything queued so far was handed to the device."""
+        ring = self._ring
+        if ring is None:
+            return True
+        target = ring.write_position
+        deadline = time.monotonic() + timeout if timeout else None
+        while ring.read_position < target:
+            if ring is not self._ring:  # Stream reopened (rate change) - old ring never drains
+                return False
+            if cancelled and cancelled():
+                return False
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def flush(self) -> Optional[int]:
+        """
+        Drop queued audio; silence starts on the next callback block.
+
+        Returns:
+            Ring position reached by playback when flushed (compare with
+            queued_position taken after play()), None without a stream
+        """
+        if self._ring is None:
+            return None
+        self.last_flush_position = self._ring.flush()
+        return self.last_flush_position
+
+    @property
+    def queued_position(self) -> int:
+        """Ring write position: samples handed to play() so far."""
+        return self._ring.write_position if self._ring is not None else 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        if self._ring is None or not self.sample_rate:
+            return 0.0
+        return self._ring.available / self.sample_rate
+
+    def get_status(self) -> dict:
+        return {
+            'sample_rate': self.sample_rate,
+            'active': bool(self._stream is not None and self._stream.active),
+            'buffered_ms': round(self.buffered_seconds * 1000, 1),
+            'blocksize': self.blocksize,
+            'underruns': self.underruns,
+        }
@@ -5,6 +5,8 @@ import sounddevice as sd
 import onnxruntime as ort
 import json
 
+from sebas.tts.voice_pool import create_session_options
+
 
 class PiperRealTTS:
     """ONNX-based Piper/Kokoro TTS engine"""
@@ -14,7 +16,10 @@ class PiperRealTTS:
         self.config = config
 
         try:
-            self.session = ort.InferenceSession(model_path)
+            # Tuned threads / graph optimization / arena (see tts.voice_pool)
+            self.session = ort.InferenceSession(
+                model_path, sess_options=create_session_options(), providers=["CPUExecutionProvider"]
+            )
         except Exception as e:
             logging.error(f"[PiperReal] Failed to load ONNX model: {e}")
             raise
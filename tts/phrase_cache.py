@@ -0,0 +1,206 @@
+"""
+Phrase Cache - Stage 2
+Synthesized audio for repeated phrases ("Yes, sir?", greetings, errors).
+
+Entries are keyed by (voice id, normalized text) and hold float32 PCM
+before volume is applied, so a volume change does not invalidate them.
+Memory use is bounded by bytes with LRU eviction. An optional directory
+keeps rendered phrases across restarts as .npz files (PCM + sample rate).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, List, Union
+
+import numpy as np
+
+
+# Phrases SEBAS says often enough to render at startup
+DEFAULT_PHRASES = [
+    "Yes, sir?",
+    "SEBAS Stage 1 online and awaiting your orders, sir.",
+    "I did not understand, sir. You can teach me by saying: 'this means' followed by the intent name.",
+    "This command is not implemented yet, sir.",
+    "You do not have permission for this action.",
+    "An error occurred while executing the command.",
+    "Unsupported language.",
+]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key text: same words and punctuation, whitespace collapsed."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class PhraseCache:
+    """Byte-bounded LRU of synthesized phrases with optional disk store."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024,
+                 disk_dir: Optional[Union[str, Path]] = None,
+                 max_entry_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: Memory budget for cached PCM
+            disk_dir: Optional directory for persisted phrases
+            max_entry_bytes: Larger results are not cached (default: max_bytes / 4)
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------
+    # Lookup / insert
+    # ------------------------------------------------------------
+    def get(self, voice_id: str, text: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Returns:
+            (float32 samples, sample_rate) or None
+        """
+        key = (voice_id, normalize_text(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load_from_disk(key)
+        if entry is not None:
+            self.disk_hits += 1
+            self._insert(key, entry[0], entry[1])
+            return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, voice_id: str, text: str, audio: np.ndarray, sample_rate: int):
+        """Store synthesized samples (float32, before volume)."""
+        if audio is None or not len(audio):
+            return
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if audio.nbytes > self.max_entry_bytes:
+            return
+
+        audio.setflags(write=False)  # Shared with every caller
+        key = (voice_id, normalize_text(text))
+        self._insert(key, audio, sample_rate)
+        self._save_to_disk(key, audio, sample_rate)
+
+    def contains(self, voice_id: str, text: str) -> bool:
+        key = (voice_id, normalize_text(text))
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self._disk_path(key) is not None and self._disk_path(key).exists()
+
+    def _insert(self, key, audio: np.ndarray, sample_rate: int):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes
+            self._entries[key] = (audio, sample_rate)
+            self._bytes += audio.nbytes
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self, voice_id: Optional[str] = None):
+        """Drop memory entries (all, or for one voice). Disk files are kept."""
+        with self._lock:
+            if voice_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == voice_id]:
+                self._bytes -= self._entries.pop(key)[0].nbytes
+
+    # ------------------------------------------------------------
+    # Disk store
+    # ------------------------------------------------------------
+    def _disk_path(self, key) -> Optional[Path]:
+        if not self.disk_dir:
+            return None
+        digest = hashlib.sha1(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.npz"
+
+    def _load_from_disk(self, key) -> Optional[Tuple[np.ndarray, int]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                audio = data["audio"].astype(np.float32, copy=False)
+                sample_rate = int(data["sample_rate"])
+            audio.setflags(write=False)
+            return audio, sample_rate
+        except Exception as e:
+            logging.warning(f"[PhraseCache] Could not read {path.name}: {e}")
+            return None
+
+    def _save_to_disk(self, key, audio: np.ndarray, sample_rate: int):
+        path = self._disk_path(key)
+        if path is None or path.exists():
+            return
+        try:
+            tmp = path.with_suffix(".tmp.npz")
+            np.savez(tmp, audio=audio, sample_rate=np.int32(sample_rate))
+            os.replace(tmp, path)
+        except Exception as e:
+            logging.warning(f"[PhraseCache] Could not write {path.name}: {e}")
+
+    # ------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+            used = self._bytes
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': used,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            'disk_dir': str(self.disk_dir) if self.disk_dir else None,
+        }
+
+
+def load_phrase_list(path: Optional[Union[str, Path]] = None) -> List[str]:
+    """
+    Phrases to pre-render: one per line from ``path`` (or env
+    SEBAS_TTS_PRERENDER_FILE), else DEFAULT_PHRASES. Lines starting
+    with '#' are ignored.
+    """
+    path = path or os.environ.get("SEBAS_TTS_PRERENDER_FILE")
+    if not path:
+        return list(DEFAULT_PHRASES)
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+        return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    except OSError as e:
+        logging.warning(f"[PhraseCache] Could not read phrase list {path}: {e}")
+        return list(DEFAULT_PHRASES)
@@ -3,11 +3,20 @@ import wave
 import io
 import threading
 import queue
+import os
+from concurrent.futures import Future
+import re
 import time
 from pathlib import Path
-from typing import Optional, Union
+from typing import Optional, Union, List, Iterator
 import numpy as np
 
+from sebas.services.tracing import get_tracer
+from sebas.tts.phrase_cache import PhraseCache, load_phrase_list
+from sebas.tts.audio_output import AudioOutput
+from sebas.tts.voice_pool import VoicePool, PooledVoice
+from sebas.tts.speech_scheduler import SpeechScheduler, SpeechItem, PRIORITY_URGENT, parse_priority
+
 try:
     from piper import PiperVoice
     import sounddevice as sd
@@ -18,6 +27,34 @@ except ImportError:
     logging.warning("Piper TTS not available. Install with: pip install piper-tts sounddevice")
 
 
+# Playback modes (see PiperTTS.speak)
+MODE_PIPELINE = "pipeline"   # synthesize sentence N+1 while sentence N plays
+MODE_STREAM = "stream"       # play Piper chunks as they arrive
+MODE_BUFFERED = "buffered"   # synthesize everything, then play
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence punctuation followed by whitespace."""
+    return [part.strip() for part in _SENTENCE_END.split(text.strip()) if part.strip()]
+
+
+def group_sentences(sentences: List[str], max_chars: int = 160) -> List[str]:
+    """
+    Synthesis chunks for the pipeline: the first sentence alone (time to
+    first audio), later short sentences joined up to ``max_chars`` so
+    coalesced utterances cost few synthesis calls.
+    """
+    chunks = sentences[:1]
+    for sentence in sentences[1:]:
+        if len(chunks) > 1 and len(chunks[-1]) + len(sentence) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {sentence}"
+        else:
+            chunks.append(sentence)
+    return chunks
+
+
 class PiperTTS:
     """Neural TTS using Piper models with enhanced error handling."""
 
@@ -25,7 +62,15 @@ class PiperTTS:
                  model_path: Optional[Union[str, Path]] = None, 
                  config_path: Optional[Union[str, Path]] = None,
                  audio_device: Optional[int] = None,
-                 volume: float = 1.0):
+                 volume: float = 1.0,
+                 cache_mb: Optional[float] = None,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 prerender_phrases: Optional[List[str]] = None,
+                 playback_mode: Optional[str] = None,
+                 pipeline_depth: int = 3,
+                 background_init: Optional[bool] = None,
+                 max_voices: Optional[int] = None,
+                 coalesce_ms: Optional[float] = None):
         """
         Initialize Piper TTS.
         
@@ -34,58 +79,121 @@ class PiperTTS:
             config_path: Path to .json config file (str or Path)
             audio_device: Specific audio device ID to use
             volume: Audio volume (0.0 to 1.0)
+            cache_mb: Phrase cache size in MB, 0 disables it
+                (env SEBAS_TTS_CACHE_MB, default 32)
+            cache_dir: Optional directory to persist cached phrases
+                (env SEBAS_TTS_CACHE_DIR)
+            prerender_phrases: Phrases rendered into the cache at startup
+                (default: see phrase_cache.load_phrase_list)
+            playback_mode: Default for speak(): "pipeline", "stream" or
+                "buffered" (env SEBAS_TTS_MODE, default "pipeline")
+            pipeline_depth: Synthesized sentences buffered ahead of playback
+            background_init: Load the voice on a background thread and
+                return immediately; speech queued meanwhile is held until
+                ``ready`` resolves (env SEBAS_TTS_BACKGROUND_INIT, default on)
+            max_voices: Voices kept loaded for instant switching
+                (env SEBAS_TTS_MAX_VOICES, default 3)
+            coalesce_ms: How long a fresh utterance waits for adjacent ones
+                to merge into one synthesis (env SEBAS_TTS_COALESCE_MS, default 25)
         """
         self.voice: Optional[PiperVoice] = None
-        self._speech_queue = queue.Queue()
+        self._speech_queue = SpeechScheduler(coalesce_ms=coalesce_ms)
+        self._current_item: Optional[SpeechItem] = None
+        self._preempted: Optional[SpeechItem] = None  # Interrupted by urgent speech
+        self.preemptions = 0
+        self.barge_ins = 0
         self._worker_thread: Optional[threading.Thread] = None
         self._stop_worker = False
         self._is_speaking = False
         self._paused = False
         self.audio_device = audio_device
         self.volume = max(0.0, min(1.0, volume))  # Clamp between 0-1
+        self.voice_id = ""
+        self.voice_dir: Optional[Path] = None
+        
+        # Loaded voices (ONNX sessions) kept warm across language switches
+        self.voices = VoicePool(max_voices=max_voices)
+        
+        # Synthesized-phrase cache (volume is applied at playback)
+        cache_mb = float(cache_mb if cache_mb is not None else os.environ.get("SEBAS_TTS_CACHE_MB", 32))
+        cache_dir = cache_dir or os.environ.get("SEBAS_TTS_CACHE_DIR") or None
+        self.cache: Optional[PhraseCache] = (
+            PhraseCache(max_bytes=int(cache_mb * 1024 * 1024), disk_dir=cache_dir) if cache_mb > 0 else None
+        )
+        self._synth_lock = threading.Lock()  # Prerender and worker share the voice
+        
+        # Sentence pipeline: persistent output stream + time-to-first-audio
+        self.playback_mode = (playback_mode or os.environ.get("SEBAS_TTS_MODE", MODE_PIPELINE)).lower()
+        self.pipeline_depth = max(1, pipeline_depth)
+        self._output: Optional[AudioOutput] = None
+        self._ttfa_last_ms: Optional[float] = None
+        self._ttfa_total_ms = 0.0
+        self._ttfa_count = 0
+        
+        # Resolves to True once the voice is loaded and warmed up, False on failure
+        self.ready: Future = Future()
         
         logging.info("[PiperTTS] Initializing...")
         
         if not PIPER_AVAILABLE:
             logging.error("[PiperTTS] piper-tts not installed!")
             logging.error("[PiperTTS] Install with: pip install piper-tts sounddevice")
+            self.ready.set_result(False)
             return
         
         # Convert to Path objects and set default paths
         model_path = Path(model_path) if model_path else Path("sebas/voices/piper/en_US-lessac-medium.onnx")
         config_path = Path(config_path) if config_path else Path("sebas/voices/piper/en_US-lessac-medium.json")
+        self.voice_dir = model_path.parent  # set_voice() looks for other voices here
+        
+        if background_init is None:
+            background_init = os.environ.get("SEBAS_TTS_BACKGROUND_INIT", "1") != "0"
         
+        # The worker starts right away; it holds queued speech until ready
+        self._start_worker_thread()
+        
+        if background_init:
+            threading.Thread(
+                target=self._initialize, args=(model_path, config_path, prerender_phrases),
+                daemon=True, name="PiperInit"
+            ).start()
+            logging.info("[PiperTTS] Loading voice in the background")
+        else:
+            self._initialize(model_path, config_path, prerender_phrases)
+
+    def _initialize(self, model_path: Path, config_path: Path, prerender_phrases: Optional[List[str]]):
+        """Load the voice, open the output stream, warm up, then resolve ``ready``."""
         try:
             # Check if files exist
             if not model_path.exists():
                 logging.error(f"[PiperTTS] Model not found at {model_path}")
                 logging.error(f"[PiperTTS] Please download Piper models to: {model_path.parent}")
+                self.ready.set_result(False)
                 return
             
             if not config_path.exists():
                 logging.error(f"[PiperTTS] Config not found at {config_path}")
+                self.ready.set_result(False)
                 return
             
             logging.info(f"[PiperTTS] Loading model from {model_path}")
+            started = time.perf_counter()
             
-            # Load Piper voice - try different loading methods
+            # Load through the pool: tuned session options, kept for switching back
             try:
-                # Try with config_path parameter
-                self.voice = PiperVoice.load(str(model_path), config_path=str(config_path))
-                logging.info("[PiperTTS] Loaded with config_path parameter")
-            except TypeError:
-                try:
-                    # Try without config_path parameter
-                    self.voice = PiperVoice.load(str(model_path))
-                    logging.info("[PiperTTS] Loaded without config_path parameter")
-                except Exception as e:
-                    logging.error(f"[PiperTTS] Failed to load voice: {e}")
-                    return
+                entry = self.voices.get(model_path, config_path)
+            except Exception as e:
+                logging.error(f"[PiperTTS] Failed to load voice: {e}")
+                self.ready.set_result(False)
+                return
             
-            if not self.voice:
+            if not entry.voice:
                 logging.error("[PiperTTS] Voice object is None after loading")
+                self.ready.set_result(False)
                 return
             
+            self.voice = entry.voice
+            self.voice_id = entry.voice_id
             logging.info(f"[PiperTTS] Voice loaded successfully")
             logging.info(f"[PiperTTS] Sample rate: {self.voice.config.sample_rate} Hz")
             
@@ -93,21 +201,58 @@ class PiperTTS:
             language_info = self._get_language_info()
             logging.info(f"[PiperTTS] Language: {language_info}")
             
-            # Test audio device
+            # Opening the persistent stream doubles as the device check
             try:
-                test_audio = np.zeros(1000, dtype=np.float32)
-                self._play_audio_with_volume(test_audio, self.voice.config.sample_rate)
-                logging.info("[PiperTTS] Audio device test passed")
+                self._get_output(self.voice.config.sample_rate)
+                logging.info("[PiperTTS] Audio output ready")
             except Exception as e:
-                logging.error(f"[PiperTTS] Audio device test failed: {e}")
+                logging.error(f"[PiperTTS] Audio output failed to open: {e}")
                 logging.error("[PiperTTS] Check if audio output is available and not muted")
             
-            # Start worker thread
-            self._start_worker_thread()
+            self._warm_up()
+            logging.info(f"[PiperTTS] Ready in {time.perf_counter() - started:.2f}s")
+            self.ready.set_result(True)
             
         except Exception as e:
             logging.exception(f"[PiperTTS] Initialization failed: {e}")
             self.voice = None
+            if not self.ready.done():
+                self.ready.set_result(False)
+            return
+        
+        # Render common phrases in the background
+        if self.cache is not None:
+            phrases = prerender_phrases if prerender_phrases is not None else load_phrase_list()
+            if phrases:
+                threading.Thread(
+                    target=self.prerender, args=(phrases,), daemon=True, name="PiperPrerender"
+                ).start()
+    
+    def _warm_up(self, voice=None):
+        """
+        One silent synthesis so the first real utterance does not pay
+        ONNX Runtime's first-run graph optimization and allocation cost.
+        """
+        voice = voice or self.voice
+        try:
+            started = time.perf_counter()
+            with self._synth_lock:
+                for _ in voice.synthesize("Warm up."):
+                    pass
+            logging.info(f"[PiperTTS] Warm-up inference took {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logging.warning(f"[PiperTTS] Warm-up failed: {e}")
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.ready.done() and self.ready.result()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the voice is loaded; False on failure or timeout."""
+        try:
+            return bool(self.ready.result(timeout=timeout))
+        except Exception:
+            return False
 
     def _get_language_info(self) -> str:
         """Extract language information from Piper config safely."""
@@ -142,6 +287,9 @@ class PiperTTS:
         """Worker thread that processes queued speech requests."""
         logging.info("[PiperTTS] Speech worker running")
         
+        # Speech queued during start-up waits here instead of being dropped
+        self.ready.result()
+        
         while not self._stop_worker:
             try:
                 item = self._speech_queue.get(timeout=0.5)
@@ -149,11 +297,38 @@ class PiperTTS:
                 if item is None:  # Poison pill
                     break
                 
-                text, stream = item
-                if stream:
-                    self._stream_speech(text)
-                else:
-                    self._do_speak(text)
+                if not self.voice:  # Per item: a voice may be loaded or swapped later
+                    logging.error(f"[PiperTTS] Voice not available, dropping: '{item.text}'")
+                    if item.trace:
+                        item.trace.release()
+                    self._speech_queue.task_done()
+                    continue
+                
+                if item.parts > 1:
+                    logging.info(f"[PiperTTS] Coalesced {item.parts} utterances into one")
+                trace = item.trace
+                if trace:
+                    trace.add_span("tts.queue_wait", item.queued_at, time.perf_counter())
+                self._current_item = item
+                remainder = None
+                try:
+                    if item.mode == MODE_PIPELINE:
+                        remainder = self._pipeline_speech(item.text, item.queued_at, trace)
+                    elif item.mode == MODE_STREAM:
+                        self._stream_speech(item.text, trace)
+                    else:
+                        self._do_speak(item.text, trace)
+                finally:
+                    self._current_item = None
+                    if trace:
+                        trace.release()
+                
+                if self._preempted is item:
+                    # Urgent speech cut in - resume from the interrupted sentence
+                    self._preempted = None
+                    rest = remainder if item.mode == MODE_PIPELINE else item.text
+                    if rest:
+                        self._speech_queue.requeue(SpeechItem(rest, item.mode, item.priority))
                 self._speech_queue.task_done()
                 
             except queue.Empty:
@@ -163,18 +338,22 @@ class PiperTTS:
         
         logging.info("[PiperTTS] Speech worker stopped")
     
-    def _play_audio_with_volume(self, audio_data: np.ndarray, sample_rate: int):
-        """Play audio with volume adjustment."""
-        if self.volume != 1.0:
-            audio_data = audio_data * self.volume
-        
-        if self.audio_device is not None:
-            sd.play(audio_data, sample_rate, device=self.audio_device, blocking=True)
+    def _get_output(self, sample_rate: int) -> AudioOutput:
+        """Persistent output stream, created on first use."""
+        if self._output is None:
+            self._output = AudioOutput(sample_rate, device=self.audio_device, volume=self.volume)
         else:
-            sd.play(audio_data, sample_rate, blocking=True)
-        sd.wait()
+            self._output.set_sample_rate(sample_rate)
+        return self._output
+    
+    def _play_audio_with_volume(self, audio_data: np.ndarray, sample_rate: int):
+        """Play audio on the persistent stream (volume is applied in its callback)."""
+        output = self._get_output(sample_rate)
+        cancelled = lambda: self._paused
+        if output.play(audio_data, sample_rate, cancelled=cancelled):
+            output.wait_until_played(cancelled=cancelled)
     
-    def _do_speak(self, text: str):
+    def _do_speak(self, text: str, trace=None):
         """Synthesize and play speech using the correct Piper API."""
         if not self.voice:
             logging.error("[PiperTTS] Voice not loaded")
@@ -187,37 +366,30 @@ class PiperTTS:
             
             sample_rate = self.voice.config.sample_rate
             
-            # The correct way: synthesize() returns a generator of AudioChunk objects
-            # Each AudioChunk has a .audio_float_array attribute (numpy array of float32)
-            logging.info("[PiperTTS] Calling synthesize()...")
-            audio_chunks = []
+            synth_started = time.perf_counter()
+            cached = self.cache.get(self.voice_id, text) if self.cache is not None else None
             
-            for audio_chunk in self.voice.synthesize(text):
-                if self._paused:
-                    sd.stop()
+            if cached is not None:
+                audio_float, sample_rate = cached
+                logging.info(f"[PiperTTS] ✓ Cached audio ({len(audio_float)} samples)")
+            else:
+                audio_float = self._synthesize(text)
+                if audio_float is None:
                     return
-                # audio_chunk is an AudioChunk object with audio_float_array attribute
-                if hasattr(audio_chunk, 'audio_float_array'):
-                    audio_chunks.append(audio_chunk.audio_float_array)
-                    logging.debug(f"[PiperTTS] Got chunk with {len(audio_chunk.audio_float_array)} samples")
-                else:
-                    logging.warning(f"[PiperTTS] Unknown chunk type: {type(audio_chunk)}")
-            
-            if not audio_chunks:
-                logging.error("[PiperTTS] No audio chunks received!")
-                return
-            
-            # Concatenate all chunks into a single array
-            audio_float = np.concatenate(audio_chunks)
-            logging.info(f"[PiperTTS] ✓ Generated {len(audio_float)} samples")
-            
-            # Ensure it's float32
-            if audio_float.dtype != np.float32:
-                audio_float = audio_float.astype(np.float32)
+                logging.info(f"[PiperTTS] ✓ Generated {len(audio_float)} samples")
+                if self.cache is not None:
+                    self.cache.put(self.voice_id, text, audio_float, sample_rate)
             
             # Play the audio with volume control
             logging.info(f"[PiperTTS] Playing audio at {sample_rate} Hz...")
+            if trace:
+                play_started = time.perf_counter()
+                trace.add_span("tts.synthesis", synth_started, play_started,
+                               chars=len(text), cached=cached is not None)
+                trace.mark("tts.first_sample", play_started)
             self._play_audio_with_volume(audio_float, sample_rate)
+            if trace:
+                trace.add_span("tts.playback", play_started, time.perf_counter())
             logging.info("[PiperTTS] ✓ Speech completed successfully!")
                 
         except Exception as e:
@@ -259,7 +431,280 @@ class PiperTTS:
             self._is_speaking = False
             self._paused = False
 
-    def _stream_speech(self, text: str):
+    def _synthesize(self, text: str) -> Optional[np.ndarray]:
+        """
+        Run Piper synthesis and return float32 samples (no volume applied).
+        
+        Returns None if nothing was produced or speech was paused meanwhile.
+        """
+        # The correct way: synthesize() returns a generator of AudioChunk objects
+        # Each AudioChunk has a .audio_float_array attribute (numpy array of float32)
+        logging.info("[PiperTTS] Calling synthesize()...")
+        audio_chunks = []
+        
+        with self._synth_lock:
+            for audio_chunk in self.voice.synthesize(text):
+                if self._paused:
+                    return None
+                # audio_chunk is an AudioChunk object with audio_float_array attribute
+                if hasattr(audio_chunk, 'audio_float_array'):
+                    audio_chunks.append(audio_chunk.audio_float_array)
+                    logging.debug(f"[PiperTTS] Got chunk with {len(audio_chunk.audio_float_array)} samples")
+                else:
+                    logging.warning(f"[PiperTTS] Unknown chunk type: {type(audio_chunk)}")
+        
+        if not audio_chunks:
+            logging.error("[PiperTTS] No audio chunks received!")
+            return None
+        
+        # Concatenate all chunks into a single float32 array
+        return np.concatenate(audio_chunks).astype(np.float32, copy=False)
+    
+    def prerender(self, phrases: List[str]) -> int:
+        """
+        Synthesize phrases into the cache ahead of time.
+        
+        Returns:
+            Number of phrases rendered (already cached ones are skipped)
+        """
+        if not self.voice or self.cache is None:
+            return 0
+        
+        rendered = 0
+        started = time.perf_counter()
+        sample_rate = self.voice.config.sample_rate
+        for phrase in phrases:
+            if self._stop_worker:
+                break
+            if not phrase or self.cache.contains(self.voice_id, phrase):
+                continue
+            try:
+                chunks = []
+                with self._synth_lock:
+                    for audio_chunk in self.voice.synthesize(phrase):
+                        if hasattr(audio_chunk, 'audio_float_array'):
+                            chunks.append(audio_chunk.audio_float_array)
+                if chunks:
+                    self.cache.put(self.voice_id, phrase, np.concatenate(chunks), sample_rate)
+                    rendered += 1
+            except Exception as e:
+                logging.warning(f"[PiperTTS] Prerender failed for '{phrase}': {e}")
+        
+        logging.info(f"[PiperTTS] Prerendered {rendered} phrases in {time.perf_counter() - started:.2f}s")
+        return rendered
+
+    # ------------------------------------------------------------
+    # Synthesis without playback (API / remote clients)
+    # ------------------------------------------------------------
+    def _sentence_audio(self, sentence: str) -> Optional[np.ndarray]:
+        """Float32 samples for one sentence, from the cache when possible."""
+        with self._synth_lock:  # One consistent voice / id / rate across a voice switch
+            voice, voice_id = self.voice, self.voice_id
+            sample_rate = voice.config.sample_rate
+        
+        cached = self.cache.get(voice_id, sentence) if self.cache is not None else None
+        if cached is not None:
+            return cached[0]
+        
+        chunks = []
+        with self._synth_lock:
+            for audio_chunk in voice.synthesize(sentence):
+                if hasattr(audio_chunk, 'audio_float_array'):
+                    chunks.append(audio_chunk.audio_float_array)
+        if not chunks:
+            return None
+        
+        audio = np.concatenate(chunks).astype(np.float32, copy=False)
+        if self.cache is not None:
+            self.cache.put(voice_id, sentence, audio, sample_rate)
+        return audio
+    
+    @staticmethod
+    def _to_pcm16(audio: np.ndarray) -> bytes:
+        """float32 [-1, 1] -> little-endian int16 bytes."""
+        return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    
+    @staticmethod
+    def wav_header(sample_rate: int, data_bytes: Optional[int] = None) -> bytes:
+        """
+        44-byte mono 16-bit WAV header. Without ``data_bytes`` the sizes
+        are set to 0xFFFFFFFF, the usual marker for a streamed WAV.
+        """
+        data_size = data_bytes if data_bytes is not None else 0xFFFFFFFF
+        riff_size = data_size + 36 if data_bytes is not None else 0xFFFFFFFF
+        return (
+            b"RIFF" + riff_size.to_bytes(4, "little") + b"WAVE"
+            + b"fmt " + (16).to_bytes(4, "little")
+            + (1).to_bytes(2, "little") + (1).to_bytes(2, "little")      # PCM, mono
+            + sample_rate.to_bytes(4, "little")
+            + (sample_rate * 2).to_bytes(4, "little")                    # byte rate
+            + (2).to_bytes(2, "little") + (16).to_bytes(2, "little")     # block align, bits
+            + b"data" + data_size.to_bytes(4, "little")
+        )
+    
+    def iter_synthesis(self, text: str, audio_format: str = "pcm",
+                       timeout: Optional[float] = 30.0) -> Iterator[bytes]:
+        """
+        Yield audio for ``text`` sentence by sentence, without playing it.
+        
+        Args:
+            text: Text to synthesize
+            audio_format: "pcm" (raw int16 mono) or "wav" (streamed header first)
+            timeout: Seconds to wait for the voice to finish loading
+            
+        Raises:
+            RuntimeError: voice not available
+            ValueError: unknown format
+        """
+        if audio_format not in ("pcm", "wav"):
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        if not self.wait_until_ready(timeout) or not self.voice:
+            raise RuntimeError("Piper voice not available")
+        
+        if audio_format == "wav":
+            yield self.wav_header(self.voice.config.sample_rate)
+        
+        for sentence in split_sentences(text) or [text]:
+            audio = self._sentence_audio(sentence)
+            if audio is not None:
+                yield self._to_pcm16(audio)
+    
+    def synthesize_to_buffer(self, text: str, audio_format: str = "wav") -> bytes:
+        """
+        Synthesize ``text`` to a complete in-memory buffer.
+        
+        Returns:
+            WAV file bytes, or raw int16 mono PCM at ``sample_rate`` for "pcm"
+        """
+        pcm = b"".join(self.iter_synthesis(text, "pcm"))
+        if audio_format == "pcm":
+            return pcm
+        if audio_format != "wav":
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        return self.wav_header(self.voice.config.sample_rate, len(pcm)) + pcm
+    
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self.voice.config.sample_rate if self.voice else None
+    
+    # ------------------------------------------------------------
+    # Sentence pipeline
+    # ------------------------------------------------------------
+    def _sentence_producer(self, sentences: List[str], buffer: "queue.Queue", cancelled: threading.Event):
+        """Synthesize sentences in order into the bounded buffer."""
+        try:
+            for index, sentence in enumerate(sentences):
+                if cancelled.is_set() or self._paused:
+                    break
+                audio = self._sentence_audio(sentence)
+                if audio is None or cancelled.is_set():
+                    continue
+                
+                # Blocks while the buffer is full - playback sets the pace
+                while not cancelled.is_set():
+                    try:
+                        buffer.put((index, audio), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception:
+            logging.exception("[PiperTTS] Sentence synthesis failed")
+        finally:
+            # End marker, timed like the audio: a consumer that bailed out sets
+            # cancelled and never reads a full buffer again
+            while not cancelled.is_set():
+                try:
+                    buffer.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    
+    def _pipeline_speech(self, text: str, queued_at: Optional[float] = None, trace=None) -> Optional[str]:
+        """
+        Play sentence N while a producer thread synthesizes sentence N+1.
+        
+        Time to first audio is one sentence of synthesis instead of the
+        whole text.
+        
+        Returns:
+            If stopped: the sentences not yet heard, starting with the one
+            that was playing (used to resume after pre-emption)
+        """
+        if not self.voice:
+            return None
+        
+        sentences = group_sentences(split_sentences(text)) or [text]
+        if len(sentences) > 1 and self.cache is not None and self.cache.contains(self.voice_id, text):
+            # Prerendered as a whole (multi-sentence default phrases): one cached clip
+            sentences = [text]
+        buffer: "queue.Queue" = queue.Queue(maxsize=self.pipeline_depth)
+        cancelled = threading.Event()
+        producer = threading.Thread(
+            target=self._sentence_producer, args=(sentences, buffer, cancelled),
+            daemon=True, name="PiperSynth"
+        )
+        
+        synth_started = time.perf_counter()
+        first_audio = None
+        self._is_speaking = True
+        self._paused = False
+        producer.start()
+        
+        stopped = lambda: cancelled.is_set() or self._paused
+        handed = []  # (sentence index, ring position after it) per played sentence
+        output = None
+        
+        try:
+            output = self._get_output(self.voice.config.sample_rate)
+            output.last_flush_position = None
+            while True:
+                entry = buffer.get()
+                if entry is None:
+                    break
+                if stopped():
+                    cancelled.set()  # producer gives up its pending puts
+                    break
+                index, audio = entry
+                
+                if first_audio is None:
+                    first_audio = time.perf_counter()
+                    self._record_first_audio(queued_at or synth_started, first_audio)
+                    if trace:
+                        trace.add_span("tts.synthesis", synth_started, first_audio,
+                                       chars=len(text), sentences=len(sentences), pipelined=True)
+                        trace.mark("tts.first_sample", first_audio)
+                
+                if output.play(audio, cancelled=stopped):
+                    handed.append((index, output.queued_position))
+            
+            output.wait_until_played(cancelled=stopped)
+            if trace and first_audio is not None:
+                trace.add_span("tts.playback", first_audio, time.perf_counter())
+        except Exception as e:
+            logging.exception(f"[PiperTTS] Pipelined speech failed: {e}")
+            cancelled.set()
+        finally:
+            stopped_early = self._paused
+            cancelled.set()
+            producer.join(timeout=2)
+            self._is_speaking = False
+            self._paused = False
+        
+        if not stopped_early or output is None:
+            return None
+        heard = output.last_flush_position
+        resume = next((index for index, end in handed if heard is None or end > heard),
+                      handed[-1][0] + 1 if handed else 0)
+        return " ".join(sentences[resume:])
+    
+    def _record_first_audio(self, started: float, first_audio: float):
+        ms = (first_audio - started) * 1000
+        self._ttfa_last_ms = ms
+        self._ttfa_total_ms += ms
+        self._ttfa_count += 1
+        logging.debug(f"[PiperTTS] Time to first audio: {ms:.0f} ms")
+    
+    def _stream_speech(self, text: str, trace=None):
         """Stream audio chunks for lower latency."""
         if not self.voice:
             return
@@ -269,29 +714,38 @@ class PiperTTS:
             self._paused = False
             sample_rate = self.voice.config.sample_rate
             
-            # Stream chunks directly to audio device
-            stream = sd.OutputStream(
-                samplerate=sample_rate,
-                channels=1,
-                dtype=np.float32,
-                blocksize=1024,
-                device=self.audio_device
-            )
-            stream.start()
+            # Stream chunks directly to the persistent output
+            output = self._get_output(sample_rate)
+            stopped = lambda: self._paused
+            synth_started = time.perf_counter()
             
-            for audio_chunk in self.voice.synthesize(text):
-                if self._paused:
-                    stream.stop()
-                    stream.close()
-                    return
-                if hasattr(audio_chunk, 'audio_float_array'):
-                    chunk_data = audio_chunk.audio_float_array.astype(np.float32)
-                    if self.volume != 1.0:
-                        chunk_data = chunk_data * self.volume
-                    stream.write(chunk_data)
+            cached = self.cache.get(self.voice_id, text) if self.cache is not None else None
+            if cached is not None:
+                if trace:
+                    trace.mark("tts.first_sample")
+                if output.play(cached[0], cancelled=stopped):
+                    output.wait_until_played(cancelled=stopped)
+                return
+            
+            chunks = []
+            with self._synth_lock:
+                for audio_chunk in self.voice.synthesize(text):
+                    if trace and "tts.first_sample" not in trace.marks:
+                        first_chunk = time.perf_counter()
+                        trace.add_span("tts.synthesis", synth_started, first_chunk, chars=len(text), streamed=True)
+                        trace.mark("tts.first_sample", first_chunk)
+                    if self._paused:
+                        return
+                    if hasattr(audio_chunk, 'audio_float_array'):
+                        chunk_data = audio_chunk.audio_float_array.astype(np.float32)
+                        chunks.append(chunk_data)
+                        if not output.play(chunk_data, cancelled=stopped):
+                            return
             
-            stream.stop()
-            stream.close()
+            if chunks and self.cache is not None:
+                self.cache.put(self.voice_id, text, np.concatenate(chunks), sample_rate)
+            
+            output.wait_until_played(cancelled=stopped)
             
         except Exception as e:
             logging.exception(f"[PiperTTS] Streaming failed: {e}")
@@ -299,14 +753,19 @@ class PiperTTS:
             self._is_speaking = False
             self._paused = False
             
-    def speak(self, text: str, stream: bool = False):
+    def speak(self, text: str, stream: Optional[bool] = None, priority=None):
         """Queue text for speech (thread-safe).
         
         Args:
             text: Text to speak
-            stream: If True, use streaming mode for lower latency
+            stream: None uses the default playback mode (pipelined),
+                True plays Piper chunks as they arrive, False synthesizes
+                everything before playing
+            priority: "urgent" / "normal" (default) / "low" or a
+                speech_scheduler.PRIORITY_* value. Urgent speech interrupts
+                non-urgent playback, which resumes afterwards.
         """
-        if not self.voice:
+        if self.ready.done() and not self.voice:
             logging.error("[PiperTTS] Voice not available")
             return
         
@@ -315,16 +774,84 @@ class PiperTTS:
             return
         
         logging.info(f"[PiperTTS] Queuing text: '{text}'")
-        self._speech_queue.put((text, stream))
+        # Carry the caller's latency trace to the worker thread
+        trace = get_tracer().current()
+        if trace:
+            trace.retain()
+        if stream is None:
+            mode = self.playback_mode
+        else:
+            mode = MODE_STREAM if stream else MODE_BUFFERED
+        item = SpeechItem(text, mode, parse_priority(priority), trace)
+        self._speech_queue.put(item)
+        
+        current = self._current_item
+        if item.urgent and current is not None and not current.urgent and self._is_speaking:
+            self._preempt(current)
+    
+    def _preempt(self, current: SpeechItem):
+        """Cut the current utterance for urgent speech; the worker requeues its rest."""
+        self._preempted = current
+        self.preemptions += 1
+        logging.info("[PiperTTS] Urgent speech - interrupting current utterance")
+        self.stop()
     
-    def preload_voice(self, model_path: Union[str, Path], config_path: Union[str, Path]) -> bool:
-        """Preload a different voice model for quick switching."""
+    def barge_in(self) -> int:
+        """
+        The user started talking (wake word): silence playback within one
+        audio block and drop pending non-urgent speech.
+        
+        Returns:
+            Number of queued utterances dropped
+        """
+        was_speaking = self._is_speaking
+        self._preempted = None  # Nothing resumes after a barge-in
+        self.stop()
+        dropped = self._drop_pending(keep_urgent=True)
+        if was_speaking or dropped:
+            self.barge_ins += 1
+            logging.info(f"[PiperTTS] Barge-in: stopped speech, dropped {dropped} queued")
+        return dropped
+    
+    def _drop_pending(self, keep_urgent: bool = False) -> int:
+        dropped = self._speech_queue.clear(keep_urgent=keep_urgent)
+        for item in dropped:
+            if item.trace:
+                item.trace.release()
+        return len(dropped)
+    
+    def _activate_voice(self, entry: PooledVoice):
+        """Make a pooled voice current; the cache and output follow its id and rate."""
+        if entry.voice is self.voice:
+            return
+        if entry.uses == 1:
+            self._warm_up(entry.voice)  # Fresh load - pay first-run cost now, not on speech
+        with self._synth_lock:  # Not in the middle of another voice's synthesis
+            self.voice = entry.voice
+            self.voice_id = entry.voice_id  # Cache entries are per voice
+        if self._output is not None and not self._is_speaking:
+            # New voice may use another rate - reopen the stream now, not on first speech.
+            # An utterance still winding down keeps its ring; _get_output() reopens next time.
+            self._output.set_sample_rate(entry.sample_rate)
+        logging.info(f"[PiperTTS] Active voice: {entry.voice_id} ({entry.sample_rate} Hz)")
+    
+    def preload_voice(self, model_path: Union[str, Path], config_path: Union[str, Path],
+                      activate: bool = True) -> bool:
+        """
+        Load a voice into the pool for quick switching.
+        
+        Args:
+            activate: Also switch to it (stops current speech)
+        """
         try:
-            new_voice = PiperVoice.load(str(model_path), config_path=str(config_path))
-            # Stop current playback and clear queue
-            self.stop()
-            self._speech_queue.queue.clear()
-            self.voice = new_voice
+            entry = self.voices.get(model_path, config_path, activate=activate)
+            if activate:
+                # Stop current playback and clear queue
+                self.stop()
+                self._drop_pending()
+                self._activate_voice(entry)
+            elif entry.uses == 1:
+                self._warm_up(entry.voice)
             logging.info(f"[PiperTTS] Successfully preloaded voice from {model_path}")
             return True
         except Exception as e:
@@ -332,26 +859,40 @@ class PiperTTS:
             return False
     
     def list_voices(self):
-        """List available voices (returns current voice info)."""
-        if not self.voice:
-            return []
-        
+        """List installed voices; ``loaded`` marks the ones held in the pool."""
         class VoiceInfo:
-            def __init__(self, name: str, id: str, languages: list):
+            def __init__(self, name: str, id: str, languages: list, loaded: bool = False):
                 self.name = name
                 self.id = id
                 self.languages = languages
+                self.loaded = loaded
         
-        language_info = self._get_language_info()
+        voices = []
+        for model in VoicePool.find_models(self.voice_dir) if self.voice_dir else []:
+            language = model.stem.split("-", 1)[0]
+            voices.append(VoiceInfo(
+                name=f"Piper {model.stem}",
+                id=model.stem,
+                languages=[language],
+                loaded=model.stem in self.voices
+            ))
         
-        return [VoiceInfo(
-            name=f"Piper {language_info}",
-            id="piper_default",
-            languages=[language_info]
-        )]
+        if not voices and self.voice:
+            language_info = self._get_language_info()
+            voices.append(VoiceInfo(
+                name=f"Piper {language_info}",
+                id=self.voice_id or "piper_default",
+                languages=[language_info],
+                loaded=True
+            ))
+        return voices
     
     def set_voice(self, voice_hint: str) -> bool:
-        """Set voice by hint - provides better feedback."""
+        """
+        Switch voice by hint: voice id, language code or language name.
+        
+        Voices already in the pool switch without a model load.
+        """
         if not self.voice:
             logging.warning("[PiperTTS] Cannot set voice, no voice loaded")
             return False
@@ -359,19 +900,34 @@ class PiperTTS:
         logging.info(f"[PiperTTS] Voice switch requested to '{voice_hint}'")
         
         current_language = self._get_language_info().lower()
-        
-        if voice_hint.lower() in current_language:
+        if voice_hint.lower() in current_language or voice_hint.lower() == self.voice_id.lower():
             logging.info(f"[PiperTTS] Already using {current_language} voice")
             return True
         
-        logging.warning(f"[PiperTTS] Cannot switch to '{voice_hint}' - only one voice model loaded")
-        return False
+        model_path = self.voices.resolve(voice_hint, self.voice_dir) if self.voice_dir else None
+        if model_path is None:
+            logging.warning(f"[PiperTTS] Cannot switch to '{voice_hint}' - no matching voice in {self.voice_dir}")
+            return False
+        if model_path.stem == self.voice_id:
+            return True
+        
+        try:
+            entry = self.voices.get(model_path)
+            # Same as preload_voice(activate=True): the old voice's speech ends here
+            self.stop()
+            self._drop_pending()
+            self._activate_voice(entry)
+            return True
+        except Exception as e:
+            logging.error(f"[PiperTTS] Failed to switch to '{voice_hint}': {e}")
+            return False
     
     def pause(self):
         """Pause current speech."""
         try:
             self._paused = True
-            sd.stop()
+            if self._output is not None:
+                self._output.flush()
             logging.info("[PiperTTS] Speech paused")
         except Exception as e:
             logging.error(f"[PiperTTS] Failed to pause: {e}")
@@ -405,12 +961,19 @@ class PiperTTS:
     def stop(self):
         """Stop current playback."""
         try:
-            self._paused = False
-            sd.stop()
+            self._paused = self._is_speaking  # Ends the current utterance
+            if self._output is not None:
+                self._output.flush()
             logging.info("[PiperTTS] Playback stopped")
         except Exception as e:
             logging.error(f"[PiperTTS] Failed to stop playback: {e}")
     
+    def set_volume(self, volume: float):
+        """Change volume; applies to audio already queued on the stream."""
+        self.volume = max(0.0, min(1.0, volume))
+        if self._output is not None:
+            self._output.volume = self.volume
+    
     def is_speaking(self) -> bool:
         """Check if currently speaking."""
         return self._is_speaking
@@ -430,13 +993,27 @@ class PiperTTS:
         """Get TTS status information."""
         return {
             'initialized': self.voice is not None,
+            'ready': self.is_ready,
             'speaking': self._is_speaking,
             'paused': self._paused,
             'worker_running': self._worker_thread is not None and self._worker_thread.is_alive(),
             'queue_size': self._speech_queue.qsize(),
+            'scheduler': self._speech_queue.get_stats(),
+            'preemptions': self.preemptions,
+            'barge_ins': self.barge_ins,
             'language': self._get_language_info(),
             'volume': self.volume,
-            'audio_device': self.audio_device
+            'audio_device': self.audio_device,
+            'voice_id': self.voice_id,
+            'voice_pool': self.voices.get_stats(),
+            'phrase_cache': self.cache.get_stats() if self.cache is not None else None,
+            'playback_mode': self.playback_mode,
+            'output': self._output.get_status() if self._output is not None else None,
+            'time_to_first_audio_ms': {
+                'last': round(self._ttfa_last_ms, 1) if self._ttfa_last_ms is not None else None,
+                'avg': round(self._ttfa_total_ms / self._ttfa_count, 1) if self._ttfa_count else None,
+                'count': self._ttfa_count,
+            }
         }
 
     def health_check(self) -> dict:
@@ -447,7 +1024,8 @@ class PiperTTS:
         audio_ok = False
         try:
             test_audio = np.zeros(1000, dtype=np.float32)
-            self._play_audio_with_volume(test_audio, 16000)
+            sample_rate = self.voice.config.sample_rate if self.voice else 16000
+            self._play_audio_with_volume(test_audio, sample_rate)
             audio_ok = True
         except Exception as e:
             status['audio_error'] = str(e)
@@ -474,5 +1052,7 @@ class PiperTTS:
             if self._worker_thread and self._worker_thread.is_alive():
                 self._worker_thread.join(timeout=2)
             self.stop()
+            if self._output is not None:
+                self._output.close()
         except:
             pass  # Ignore errors during cleanup
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Speech Scheduler - Stage 2
+Priority queue for PiperTTS utterances.
+
+Replaces the plain FIFO in front of the speech worker:
+
+    * Priorities: urgent (reminders, errors) is served before normal,
+      normal before low. Within a priority, order is FIFO.
+    * Coalescing: adjacent non-urgent items of the same priority and
+      playback mode are merged into one utterance, so a skill that calls
+      speak() four times in a row costs one synthesis call instead of four.
+      A freshly queued item waits ``coalesce_ms`` for its siblings.
+    * Pre-emption support: requeue() puts the unplayed rest of an
+      interrupted utterance back at the front of its priority, and
+      clear() drops pending items on barge-in.
+
+The interface follows queue.Queue (put/get/task_done/join/qsize/empty) so
+the worker loop keeps its shape.
+"""
+
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Optional, List
+
+PRIORITY_URGENT = 0   # reminders, errors - pre-empt non-urgent speech
+PRIORITY_NORMAL = 1   # answers (default)
+PRIORITY_LOW = 2      # chatter that may wait
+
+PRIORITY_NAMES = {
+    "urgent": PRIORITY_URGENT,
+    "normal": PRIORITY_NORMAL,
+    "low": PRIORITY_LOW,
+}
+
+_SENTENCE_END_CHARS = ".!?;:"
+
+
+def parse_priority(priority) -> int:
+    """Priority from an int or a name ("urgent", "normal", "low")."""
+    if priority is None:
+        return PRIORITY_NORMAL
+    if isinstance(priority, str):
+        return PRIORITY_NAMES.get(priority.lower(), PRIORITY_NORMAL)
+    return max(PRIORITY_URGENT, min(PRIORITY_LOW, int(priority)))
+
+
+class SpeechItem:
+    """One queued utterance."""
+
+    __slots__ = ("text", "mode", "priority", "trace", "queued_at", "parts")
+
+    def __init__(self, text: str, mode: str, priority: int = PRIORITY_NORMAL,
+                 trace=None, queued_at: Optional[float] = None):
+        self.text = text
+        self.mode = mode
+        self.priority = priority
+        self.trace = trace
+        self.queued_at = queued_at if queued_at is not None else time.perf_counter()
+        self.parts = 1  # > 1 once coalesced
+
+    @property
+    def urgent(self) -> bool:
+        return self.priority == PRIORITY_URGENT
+
+    def merge(self, other: "SpeechItem"):
+        """Append another utterance; its trace is released (ours is kept)."""
+        text = self.text.rstrip()
+        if text and text[-1] not in _SENTENCE_END_CHARS:
+            text += "."  # Keep a sentence break so prosody and the pipeline split
+        self.text = f"{text} {other.text.strip()}"
+        self.queued_at = min(self.queued_at, other.queued_at)
+        self.parts += other.parts
+        if other.trace:
+            if self.trace is None:
+                self.trace = other.trace
+            else:
+                other.trace.release()
+            other.trace = None
+
+
+class SpeechScheduler:
+    """Thread-safe priority queue with coalescing of adjacent items."""
+
+    def __init__(self, coalesce_ms: Optional[float] = None, max_coalesce_chars: int = 600):
+        """
+        Args:
+            coalesce_ms: How long a fresh non-urgent item waits for siblings
+                to merge with (env SEBAS_TTS_COALESCE_MS, default 25, 0 = off)
+            max_coalesce_chars: Upper bound on a merged utterance
+        """
+        if coalesce_ms is None:
+            coalesce_ms = float(os.environ.get("SEBAS_TTS_COALESCE_MS", 25))
+        self.coalesce_s = max(0.0, coalesce_ms) / 1000.0
+        self.max_coalesce_chars = max_coalesce_chars
+
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+        self._front = itertools.count(-1, -1)  # requeued items go first
+        self._cond = threading.Condition()
+        self._unfinished = 0
+        self._closed = False
+
+        self.coalesced = 0
+        self.requeued = 0
+        self.dropped = 0
+
+    # ------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------
+    def put(self, item: Optional[SpeechItem]):
+        """Queue an item; None closes the scheduler (worker poison pill)."""
+        with self._cond:
+            if item is None:
+                self._closed = True
+            else:
+                heapq.heappush(self._heap, (item.priority, next(self._order), item))
+                self._unfinished += 1
+            self._cond.notify_all()
+
+    def requeue(self, item: SpeechItem):
+        """Put an interrupted item back ahead of everything of its priority."""
+        with self._cond:
+            heapq.heappush(self._heap, (item.priority, next(self._front), item))
+            self._unfinished += 1
+            self.requeued += 1
+            self._cond.notify_all()
+
+    def clear(self, keep_urgent: bool = False) -> List[SpeechItem]:
+        """
+        Drop pending items.
+
+        Returns:
+            The dropped items (callers release their traces)
+        """
+        with self._cond:
+            kept = [entry for entry in self._heap if keep_urgent and entry[2].urgent]
+            dropped = [entry[2] for entry in self._heap if not (keep_urgent and entry[2].urgent)]
+            self._heap = kept
+            heapq.heapify(self._heap)
+            self._unfinished -= len(dropped)
+            self.dropped += len(dropped)
+            self._cond.notify_all()
+        return dropped
+
+    # ------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------
+    def get(self, timeout: Optional[float] = None) -> Optional[SpeechItem]:
+        """
+        Next utterance, coalesced with its adjacent siblings.
+
+        Returns:
+            SpeechItem, or None once closed
+
+        Raises:
+            queue.Empty: nothing arrived within ``timeout``
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._heap or self._closed, timeout):
+                raise queue.Empty
+            if self._closed:
+                return None
+
+            _, _, item = heapq.heappop(self._heap)
+            if item.urgent:
+                return item
+
+            # Give a burst of speak() calls a moment to arrive
+            deadline = item.queued_at + self.coalesce_s
+            while not self._closed:
+                self._merge_adjacent(item)
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or len(item.text) >= self.max_coalesce_chars:
+                    break
+                if self._heap and self._heap[0][0] < item.priority:
+                    break  # Something more important is waiting - go now
+                self._cond.wait(remaining)
+            return item
+
+    def _merge_adjacent(self, item: SpeechItem):
+        while self._heap:
+            priority, _, nxt = self._heap[0]
+            if (priority != item.priority or nxt.mode != item.mode
+                    or len(item.text) + len(nxt.text) > self.max_coalesce_chars):
+                return
+            heapq.heappop(self._heap)
+            item.merge(nxt)
+            self._unfinished -= 1  # One task now covers both
+            self.coalesced += 1
+
+    def task_done(self):
+        with self._cond:
+            self._unfinished = max(0, self._unfinished - 1)
+            self._cond.notify_all()
+
+    def join(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._unfinished <= 0)
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def peek_priority(self) -> Optional[int]:
+        """Priority of the next item, or None when empty."""
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            pending = {name: sum(1 for entry in self._heap if entry[0] == value)
+                       for name, value in PRIORITY_NAMES.items()}
+        return {
+            'pending': pending,
+            'coalesced': self.coalesced,
+            'requeued': self.requeued,
+            'dropped': self.dropped,
+            'coalesce_ms': round(self.coalesce_s * 1000, 1),
+        }
@@ -14,18 +14,9 @@ class TTSManager:
             logging.info("[TTSManager] Creating PiperTTS instance...")
             self.engine = PiperTTS(model_path=piper_model_path, config_path=piper_config_path)
             
-            # Wait a moment for initialization to complete
-            import time
-            time.sleep(0.2)
-            
-            # Check if engine was created (not None) and has voice loaded
+            # Voice loads in the background - report the outcome when it lands
             if self.engine is not None:
-                if hasattr(self.engine, 'voice') and self.engine.voice is not None:
-                    logging.info("[TTSManager] PiperTTS initialized successfully")
-                    logging.info(f"[TTSManager] Voice available: {self.engine.voice is not None}")
-                else:
-                    logging.error("[TTSManager] PiperTTS created but voice is None!")
-                    logging.error("[TTSManager] Check model paths and files")
+                self.engine.ready.add_done_callback(self._on_engine_ready)
             else:
                 logging.error("[TTSManager] PiperTTS instance is None!")
                 
@@ -33,7 +24,26 @@ class TTSManager:
             logging.exception(f"[TTSManager] Failed to initialize PiperTTS: {e}")
             self.engine = None
 
-    def speak(self, text: str):
+    def _on_engine_ready(self, future):
+        if future.result():
+            logging.info("[TTSManager] PiperTTS initialized successfully")
+        else:
+            logging.error("[TTSManager] PiperTTS failed to load a voice!")
+            logging.error("[TTSManager] Check model paths and files")
+
+    @property
+    def ready(self):
+        """Future resolving to True once the voice is loaded (None without engine)."""
+        return self.engine.ready if self.engine else None
+
+    def wait_until_ready(self, timeout=None) -> bool:
+        """Block until the TTS voice is usable."""
+        if not self.engine:
+            return False
+        return self.engine.wait_until_ready(timeout)
+
+    def speak(self, text: str, priority=None):
+        """Queue text; priority is "urgent", "normal" (default) or "low"."""
         logging.info(f"[TTSManager] speak() called with text: '{text}'")
         
         if self.engine is None:
@@ -44,14 +54,28 @@ class TTSManager:
         logging.info(f"[TTSManager] Has voice attr: {hasattr(self.engine, 'voice')}")
         if hasattr(self.engine, 'voice'):
             logging.info(f"[TTSManager] Voice is not None: {self.engine.voice is not None}")
+            if not self.engine.ready.done():
+                logging.info("[TTSManager] Voice still loading - speech will be held until ready")
         
         logging.info("[TTSManager] Calling self.engine.speak()...")
         try:
-            self.engine.speak(text)
+            self.engine.speak(text, priority=priority)
             logging.info("[TTSManager] self.engine.speak() completed")
         except Exception as e:
             logging.exception(f"[TTSManager] Error during speak: {e}")
 
+    def synthesize_to_buffer(self, text: str, audio_format: str = "wav") -> bytes:
+        """Synthesize without playing - WAV or raw PCM bytes."""
+        if not self.engine:
+            raise RuntimeError("TTS engine not available")
+        return self.engine.synthesize_to_buffer(text, audio_format)
+
+    def iter_synthesis(self, text: str, audio_format: str = "pcm"):
+        """Generator of audio chunks for streaming to remote clients."""
+        if not self.engine:
+            raise RuntimeError("TTS engine not available")
+        return self.engine.iter_synthesis(text, audio_format)
+
     def set_voice(self, voice_hint: str):
         """Set voice - delegates to PiperTTS."""
         if not self.engine:
@@ -71,6 +95,12 @@ class TTSManager:
         if self.engine:
             self.engine.stop()
 
+    def barge_in(self) -> int:
+        """User started talking: cut playback and drop pending speech."""
+        if not self.engine:
+            return 0
+        return self.engine.barge_in()
+
     def get_engine_info(self):
         """Get information about current TTS engine."""
         if not self.engine:
@@ -0,0 +1,357 @@
+"""
+Voice Pool - Stage 2
+Loaded Piper voices (ONNX sessions) kept warm for instant switching.
+
+Language switches used to throw the current PiperVoice away and load the
+next one from disk, paying the full ONNX model load every time. The pool
+keeps up to ``max_voices`` voices loaded, bounded by an estimated memory
+budget, and evicts the least recently used one when either limit is hit.
+The active voice is never evicted.
+
+Sessions are created with tuned options instead of ONNX Runtime's
+defaults (env overrides in brackets):
+    intra-op threads      min(4, CPU count)   [SEBAS_ORT_THREADS]
+    graph optimization    all                 [SEBAS_ORT_OPT_LEVEL: basic|extended|all|off]
+    CPU memory arena      on                  [SEBAS_ORT_CPU_ARENA=0 to disable]
+
+The arena keeps freed inference buffers for reuse (faster, more resident
+memory); disabling it helps when several voices stay loaded on a small
+machine. Memory per voice is the RSS growth measured while loading
+(psutil), or the model file size when psutil is not installed.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union, List, Dict
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ort = None
+    ORT_AVAILABLE = False
+
+try:
+    from piper import PiperVoice
+    PIPER_AVAILABLE = True
+except ImportError:
+    PiperVoice = None
+    PIPER_AVAILABLE = False
+
+try:
+    from piper.config import PiperConfig  # Needed to build voices on our own session
+except ImportError:
+    PiperConfig = None
+
+
+# Language hints (LanguageManager profiles) -> Piper voice file prefixes
+LANGUAGE_PREFIXES = {
+    "english": "en",
+    "russian": "ru",
+    "japanese": "ja",
+    "georgian": "ka",
+}
+
+_OPT_LEVELS = {
+    "off": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+def create_session_options(intra_op_threads: Optional[int] = None,
+                           optimization_level: Optional[str] = None,
+                           cpu_mem_arena: Optional[bool] = None):
+    """
+    Tuned onnxruntime.SessionOptions for Piper voices.
+
+    Args:
+        intra_op_threads: Threads per inference (env SEBAS_ORT_THREADS)
+        optimization_level: off | basic | extended | all (env SEBAS_ORT_OPT_LEVEL)
+        cpu_mem_arena: Keep the CPU arena allocator (env SEBAS_ORT_CPU_ARENA)
+
+    Returns:
+        SessionOptions, or None without onnxruntime
+    """
+    if not ORT_AVAILABLE:
+        return None
+
+    if intra_op_threads is None:
+        intra_op_threads = int(os.environ.get("SEBAS_ORT_THREADS", min(4, os.cpu_count() or 1)))
+    if optimization_level is None:
+        optimization_level = os.environ.get("SEBAS_ORT_OPT_LEVEL", "all")
+    if cpu_mem_arena is None:
+        cpu_mem_arena = os.environ.get("SEBAS_ORT_CPU_ARENA", "1") != "0"
+
+    level_name = _OPT_LEVELS.get(optimization_level.lower())
+    if level_name is None:
+        logging.warning(f"[VoicePool] Unknown optimization level '{optimization_level}', using 'all'")
+        level_name = _OPT_LEVELS["all"]
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = max(1, intra_op_threads)
+    options.inter_op_num_threads = 1  # Piper graphs are sequential
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, level_name)
+    options.enable_cpu_mem_arena = cpu_mem_arena
+    options.enable_mem_pattern = cpu_mem_arena
+    return options
+
+
+def _process_rss() -> Optional[int]:
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class PooledVoice:
+    """One loaded voice and its bookkeeping."""
+
+    __slots__ = ("voice_id", "voice", "model_path", "config_path",
+                 "memory_bytes", "memory_source", "load_ms", "loaded_at", "last_used", "uses")
+
+    def __init__(self, voice_id: str, voice, model_path: Path, config_path: Path,
+                 memory_bytes: int, memory_source: str, load_ms: float):
+        self.voice_id = voice_id
+        self.voice = voice
+        self.model_path = model_path
+        self.config_path = config_path
+        self.memory_bytes = memory_bytes
+        self.memory_source = memory_source
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+    @property
+    def sample_rate(self) -> int:
+        return self.voice.config.sample_rate
+
+    def to_dict(self) -> dict:
+        return {
+            'voice_id': self.voice_id,
+            'model': str(self.model_path),
+            'sample_rate': self.sample_rate,
+            'memory_mb': round(self.memory_bytes / (1024 * 1024), 1),
+            'memory_source': self.memory_source,
+            'load_ms': round(self.load_ms, 1),
+            'uses': self.uses,
+            'idle_s': round(time.time() - self.last_used, 1),
+        }
+
+
+class VoicePool:
+    """LRU of loaded Piper voices, bounded by count and estimated memory."""
+
+    def __init__(self, max_voices: Optional[int] = None, max_mb: Optional[float] = None,
+                 session_options=None, use_cuda: bool = False):
+        """
+        Args:
+            max_voices: Voices kept loaded (env SEBAS_TTS_MAX_VOICES, default 3)
+            max_mb: Memory budget for loaded voices in MB, 0 = unbounded
+                (env SEBAS_TTS_VOICE_POOL_MB, default 0)
+            session_options: onnxruntime.SessionOptions (default: create_session_options())
+            use_cuda: Run sessions on the CUDA provider
+        """
+        self.max_voices = max(1, int(max_voices if max_voices is not None
+                                     else os.environ.get("SEBAS_TTS_MAX_VOICES", 3)))
+        max_mb = float(max_mb if max_mb is not None else os.environ.get("SEBAS_TTS_VOICE_POOL_MB", 0))
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb > 0 else 0
+        self.session_options = session_options if session_options is not None else create_session_options()
+        self.use_cuda = use_cuda
+
+        self._voices: "OrderedDict[str, PooledVoice]" = OrderedDict()
+        self._active: Optional[str] = None
+        self._lock = threading.RLock()  # Held across loads: one model load at a time
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------
+    def _load_voice(self, model_path: Path, config_path: Path):
+        """PiperVoice with tuned session options, plain PiperVoice.load() as fallback."""
+        if self.session_options is not None and PiperConfig is not None:
+            try:
+                providers = (["CUDAExecutionProvider", "CPUExecutionProvider"]
+                             if self.use_cuda else ["CPUExecutionProvider"])
+                with open(config_path, "r", encoding="utf-8") as f:
+                    config = PiperConfig.from_dict(json.load(f))
+                session = ort.InferenceSession(
+                    str(model_path), sess_options=self.session_options, providers=providers
+                )
+                return PiperVoice(session=session, config=config)
+            except Exception as e:
+                logging.warning(f"[VoicePool] Tuned session failed ({e}), using PiperVoice.load()")
+
+        try:
+            return PiperVoice.load(str(model_path), config_path=str(config_path))
+        except TypeError:
+            return PiperVoice.load(str(model_path))
+
+    def get(self, model_path: Union[str, Path], config_path: Optional[Union[str, Path]] = None,
+            activate: bool = True) -> PooledVoice:
+        """
+        Loaded voice for a model, loading it on a miss.
+
+        Args:
+            model_path: Path to the .onnx model
+            config_path: Path to its config (default: <model>.onnx.json)
+            activate: Mark as the active voice (never evicted)
+
+        Raises:
+            RuntimeError: piper-tts is not installed
+            FileNotFoundError: model or config missing
+        """
+        model_path = Path(model_path)
+        voice_id = model_path.stem
+
+        with self._lock:
+            entry = self._voices.get(voice_id)
+            if entry is not None:
+                self._voices.move_to_end(voice_id)
+                self.hits += 1
+            else:
+                entry = self._load(model_path, Path(config_path) if config_path else None)
+
+            entry.last_used = time.time()
+            entry.uses += 1
+            if activate:
+                self._active = voice_id
+            self._evict()
+            return entry
+
+    def _load(self, model_path: Path, config_path: Optional[Path]) -> PooledVoice:
+        if not PIPER_AVAILABLE:
+            raise RuntimeError("piper-tts not installed")
+        if config_path is None:
+            config_path = model_path.with_name(model_path.name + ".json")
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model not found: {model_path}")
+        if not config_path.exists():
+            raise FileNotFoundError(f"Config not found: {config_path}")
+
+        rss_before = _process_rss()
+        started = time.perf_counter()
+        voice = self._load_voice(model_path, config_path)
+        load_ms = (time.perf_counter() - started) * 1000
+        rss_after = _process_rss()
+
+        # RSS growth is noisy (arena, other threads); never report less than the weights
+        file_bytes = model_path.stat().st_size
+        if rss_before is not None and rss_after is not None and rss_after - rss_before > file_bytes:
+            memory_bytes, memory_source = rss_after - rss_before, "rss"
+        else:
+            memory_bytes, memory_source = file_bytes, "model_file"
+
+        entry = PooledVoice(model_path.stem, voice, model_path, config_path,
+                            memory_bytes, memory_source, load_ms)
+        self._voices[entry.voice_id] = entry
+        self.loads += 1
+        logging.info(f"[VoicePool] Loaded {entry.voice_id} in {load_ms:.0f} ms "
+                     f"(~{memory_bytes / (1024 * 1024):.0f} MB, {memory_source})")
+        return entry
+
+    def _evict(self):
+        """Drop least recently used voices until both limits hold."""
+        while len(self._voices) > 1 and (
+                len(self._voices) > self.max_voices
+                or (self.max_bytes and self.memory_bytes > self.max_bytes)):
+            victim = next((vid for vid in self._voices if vid != self._active), None)
+            if victim is None:
+                break
+            self._voices.pop(victim)
+            self.evictions += 1
+            logging.info(f"[VoicePool] Evicted {victim}")
+
+    def unload(self, voice_id: str) -> bool:
+        """Drop a voice (the active one cannot be unloaded)."""
+        with self._lock:
+            if voice_id == self._active or voice_id not in self._voices:
+                return False
+            self._voices.pop(voice_id)
+            return True
+
+    # ------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------
+    @property
+    def active(self) -> Optional[PooledVoice]:
+        with self._lock:
+            return self._voices.get(self._active) if self._active else None
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(entry.memory_bytes for entry in self._voices.values())
+
+    def __contains__(self, voice_id: str) -> bool:
+        return voice_id in self._voices
+
+    @staticmethod
+    def find_models(voice_dir: Union[str, Path]) -> List[Path]:
+        """Piper models (.onnx with a config next to them) in a directory."""
+        voice_dir = Path(voice_dir)
+        if not voice_dir.is_dir():
+            return []
+        return sorted(
+            p for p in voice_dir.glob("*.onnx")
+            if p.with_name(p.name + ".json").exists() or p.with_suffix(".json").exists()
+        )
+
+    def resolve(self, voice_hint: str, voice_dir: Union[str, Path]) -> Optional[Path]:
+        """
+        Model for a hint: a voice id ("en_US-john-medium"), a language
+        code ("ru", "ka_GE") or a language name ("russian"). Loaded voices
+        win over ones that would need a load.
+        """
+        hint = voice_hint.strip().lower()
+        if not hint:
+            return None
+        prefix = LANGUAGE_PREFIXES.get(hint, hint)
+
+        candidates = [p for p in self.find_models(voice_dir)
+                      if p.stem.lower() == hint or p.stem.lower().startswith(prefix)]
+        if not candidates:
+            return None
+        loaded = [p for p in candidates if p.stem in self._voices]
+        return (loaded or candidates)[0]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            voices = [entry.to_dict() for entry in reversed(self._voices.values())]
+            used = self.memory_bytes
+        lookups = self.hits + self.loads
+        return {
+            'active': self._active,
+            'voices': voices,  # most recently used first
+            'max_voices': self.max_voices,
+            'memory_mb': round(used / (1024 * 1024), 1),
+            'max_mb': round(self.max_bytes / (1024 * 1024), 1) if self.max_bytes else None,
+            'hits': self.hits,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'session': {
+                'intra_op_threads': self.session_options.intra_op_num_threads,
+                'cpu_mem_arena': self.session_options.enable_cpu_mem_arena,
+                'graph_optimization_level': str(self.session_options.graph_optimization_level),
+            } if self.session_options is not None else None,
+        }
@@ -82,16 +82,27 @@ function drawWave(){
 }
 drawWave();
 
-// Poll status
-async function poll(){
-  try{
-    const res = await fetch('/api/status');
-    const j = await res.json();
-    setStatus(j);
-  }catch(e){/* ignore */}
-  setTimeout(poll, 800);
+// Live status: the UI server pushes state diffs and command results (no polling)
+const uiState = {};
+// request_ids this tab sent: their results are shown from the POST reply, not the stream
+const ownRequests = new Set();
+function newRequestId(){
+  return (crypto.randomUUID && crypto.randomUUID()) || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
 }
-poll();
+function connectStream(){
+  const source = new EventSource('/api/stream');
+  source.addEventListener('state', (e)=>{
+    Object.assign(uiState, JSON.parse(e.data));
+    setStatus(uiState);
+  });
+  source.addEventListener('result', (e)=>{
+    const data = JSON.parse(e.data);
+    if(data.request_id && ownRequests.has(data.request_id)) return;
+    showResult(data);
+  });
+  // EventSource reconnects by itself; a fresh stream starts with the full state
+}
+connectStream();
 
 function setStatus(s){
   level = Math.max(0, Math.min(1, s.level ?? level));
@@ -118,17 +129,16 @@ if(form){
     const text = (input?.value||'').trim();
     if(!text) return;
     result.textContent = 'Running…';
+    const request_id = newRequestId();
+    ownRequests.add(request_id); // the pushed copy may arrive before or after this reply
+    if(ownRequests.size > 100) ownRequests.delete(ownRequests.values().next().value);
     try{
       const res = await fetch('/api/command', {
         method: 'POST', headers: {'Content-Type':'application/json'},
-        body: JSON.stringify({text})
+        body: JSON.stringify({text, request_id})
       });
       const data = await res.json();
-      // Show info window if display type is specified
-      if (data.display_type && data.display_type !== 'none') {
-          showInfoWindow(data);
-      }
-      result.textContent = data.message || 'Done';
+      showResult(data);
       input.value = '';
     }catch(err){
       result.textContent = 'Network error';
@@ -141,7 +151,17 @@ if(form){
   });
 }
 
-let autoCloseTimer = null;
+function showResult(data){
+  // Prefer the skill's own message over the pipeline status
+  const message = (data.skill_response && data.skill_response.message) || data.message;
+  // Show info window if display type is specified
+  if (data.display_type && data.display_type !== 'none') {
+      showInfoWindow({...data, message});
+  }
+  if (result) result.textContent = message || 'Done';
+}
+
+let autoCloseTimer = null; // pending setTimeout of the auto-close countdown
 function showInfoWindow(response) {
     const infoWindow = document.getElementById('info-window');
     const infoTitle = document.getElementById('info-title');
@@ -150,7 +170,7 @@ function showInfoWindow(response) {
    
     // Clear any existing timer
     if (autoCloseTimer) {
-        clearInterval(autoCloseTimer);
+        clearTimeout(autoCloseTimer);
         autoCloseTimer = null;
     }
    
@@ -173,17 +193,18 @@ function showInfoWindow(response) {
    
     // Setup auto-close if specified
     if (response.auto_close_seconds) {
-        let remaining = response.auto_close_seconds;
-        timerDisplay.textContent = `Auto-closing in ${remaining}s`;
-       
-        autoCloseTimer = setInterval(() => {
-            remaining--;
-            if (remaining <= 0) {
+        // One timeout per displayed second, aligned to the deadline; nothing runs once closed
+        const deadline = performance.now() + response.auto_close_seconds*1000;
+        const tick = () => {
+            const left = deadline - performance.now();
+            if (left <= 0) {
                 closeInfoWindow();
-            } else {
-                timerDisplay.textContent = `Auto-closing in ${remaining}s`;
+                return;
             }
-        }, 1000);
+            timerDisplay.textContent = `Auto-closing in ${Math.ceil(left/1000)}s`;
+            autoCloseTimer = setTimeout(tick, left % 1000 || 1000);
+        };
+        tick();
     } else {
         timerDisplay.textContent = '';
     }
@@ -236,7 +257,7 @@ function closeInfoWindow() {
     infoWindow.classList.add('hidden');
    
     if (autoCloseTimer) {
-        clearInterval(autoCloseTimer);
+        clearTimeout(autoCloseTimer);
         autoCloseTimer = null;
     }
 }
@@ -0,0 +1,476 @@
+"""
+Audio Process - Stage 2
+Microphone capture, VAD and wake word decoding in a dedicated process.
+
+In-process, the capture loop shares the GIL with Flask request threads,
+skills and logging. When it is starved the input buffer overflows, and
+exception_on_overflow=False hides the lost audio. Running capture in its
+own process keeps it isolated:
+
+    child process                           main process
+    -------------                           ------------
+    PyAudio -> VAD -> wake word engine
+        |  raw frames --> shared memory ring --> SharedFrameReader (STT)
+        |  detections/transcripts/stats --> control pipe --> AudioProcessWakeWord
+        <-- commands (stop, grammar) ------ control pipe
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, List
+
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 4000          # 250 ms, same as the in-process detector
+HEADER_BYTES = 64             # write counter, overflow counter, padding
+
+
+# ============================================================
+#                 SHARED MEMORY FRAME RING
+# ============================================================
+
+class SharedFrameRing:
+    """
+    Single-producer ring of fixed-size audio frames in shared memory.
+
+    The producer never blocks: it writes the frame into slot
+    ``write_count % capacity`` and then publishes the new count. Each
+    consumer keeps its own read position. A consumer that falls more than
+    ``capacity`` frames behind skips ahead, and a frame overwritten while
+    it was being copied is detected by re-checking the counter afterwards,
+    so no locks are needed across processes.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, frame_bytes: int, capacity: int, owner: bool):
+        self.shm = shm
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity
+        self.owner = owner
+        self._header = shm.buf[:HEADER_BYTES].cast('q')
+        self._data = shm.buf[HEADER_BYTES:HEADER_BYTES + frame_bytes * capacity]
+
+    @classmethod
+    def create(cls, frame_bytes: int, capacity: int) -> "SharedFrameRing":
+        """Allocate a new ring (main process)."""
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + frame_bytes * capacity)
+        shm.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        return cls(shm, frame_bytes, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, frame_bytes: int, capacity: int) -> "SharedFrameRing":
+        """Attach to an existing ring by name (child process)."""
+        # Children share the parent's resource tracker, so attaching here
+        # does not make the segment disappear when the child exits
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, frame_bytes, capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_count(self) -> int:
+        return self._header[0]
+
+    @property
+    def overflow_count(self) -> int:
+        return self._header[1]
+
+    def add_overflow(self):
+        """Producer side: count an input overflow reported by the device."""
+        self._header[1] = self._header[1] + 1
+
+    def write(self, frame: bytes):
+        """Producer side: append one frame (short frames are zero-padded)."""
+        count = self._header[0]
+        offset = (count % self.capacity) * self.frame_bytes
+        size = min(len(frame), self.frame_bytes)
+        self._data[offset:offset + size] = frame[:size]
+        if size < self.frame_bytes:
+            self._data[offset + size:offset + self.frame_bytes] = bytes(self.frame_bytes - size)
+        # Publish only after the payload is in place
+        self._header[0] = count + 1
+
+    def read(self, index: int) -> Optional[bytes]:
+        """
+        Consumer side: copy frame number ``index``.
+
+        Returns None if the frame is not written yet or was overwritten.
+        """
+        if index >= self._header[0]:
+            return None
+        offset = (index % self.capacity) * self.frame_bytes
+        frame = bytes(self._data[offset:offset + self.frame_bytes])
+        if self._header[0] - index >= self.capacity:
+            return None  # Producer reached this slot again during the copy
+        return frame
+
+    def close(self):
+        """Release views and the mapping; the owner also unlinks it."""
+        try:
+            self._header.release()
+            self._data.release()
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except Exception as e:
+            logging.debug(f"[AudioProcess] Ring close error: {e}")
+
+
+class SharedFrameReader:
+    """
+    Main-process consumer of the audio ring.
+
+    Provides a stream-like read(n_samples) so code written against a
+    PyAudio stream (STTManager) can take its audio from the child
+    process instead of opening the device a second time.
+    """
+
+    def __init__(self, ring: SharedFrameRing):
+        self.ring = ring
+        self.index = ring.write_count
+        self.skipped_frames = 0
+        self._pending = b""
+
+    def skip_to_latest(self):
+        """Drop buffered audio; the next read starts with fresh frames."""
+        self.index = self.ring.write_count
+        self._pending = b""
+
+    def read(self, n_samples: int, timeout: float = 2.0) -> bytes:
+        """
+        Read exactly ``n_samples`` int16 samples (blocking).
+
+        Raises:
+            TimeoutError: if the capture process stops producing frames
+        """
+        needed = n_samples * 2
+        deadline = time.monotonic() + timeout
+
+        while len(self._pending) < needed:
+            behind = self.ring.write_count - self.index
+            if behind >= self.ring.capacity:
+                # Too slow - jump to the oldest frame that is safe to copy
+                self.skipped_frames += behind - self.ring.capacity + 1
+                self.index = self.ring.write_count - self.ring.capacity + 1
+
+            frame = self.ring.read(self.index)
+            if frame is None:
+                if self.ring.write_count > self.index:
+                    continue  # Lapped during copy; re-sync above
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Audio process stopped producing frames")
+                time.sleep(0.01)
+                continue
+
+            self.index += 1
+            self._pending += frame
+
+        data, self._pending = self._pending[:needed], self._pending[needed:]
+        return data
+
+
+# ============================================================
+#                     CHILD PROCESS
+# ============================================================
+
+class _PipeEventBus:
+    """EventBus stand-in for the child: forwards emits over the pipe."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def emit(self, event_name: str, data: Any = None):
+        try:
+            self.conn.send(("event", event_name, data))
+        except Exception:
+            pass
+
+
+def _audio_process_main(ring_name: str, frame_samples: int, capacity: int, conn, config: Dict[str, Any]):
+    """
+    Entry point of the audio process.
+
+    Loop: read a frame -> publish it in the ring -> VAD gate -> decode.
+    Frames that are clearly silence (below the VAD threshold for longer
+    than the hangover) are not decoded, which saves most of the CPU while
+    the room is quiet.
+    """
+    logging.basicConfig(level=config.get("log_level", logging.INFO),
+                        format='%(asctime)s [%(levelname)s] audio-process: %(message)s')
+
+    ring = SharedFrameRing.attach(ring_name, frame_samples * 2, capacity)
+    pa = None
+    stream = None
+
+    try:
+        import numpy as np
+        import pyaudio
+        from sebas.wakeword.backend import create_wakeword_backend
+
+        detector = create_wakeword_backend(
+            config.get("engine"),
+            keyword=config.get("keyword", "sebas"),
+            event_bus=_PipeEventBus(conn),
+            grammar=config.get("grammar"),
+            open_stream=False
+        )
+
+        pa = pyaudio.PyAudio()
+        stream = pa.open(
+            rate=SAMPLE_RATE,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            frames_per_buffer=frame_samples
+        )
+    except Exception as e:
+        logging.exception("Audio process initialization failed")
+        conn.send(("error", str(e)))
+        ring.close()
+        return
+
+    vad_threshold = float(config.get("vad_threshold", 200))
+    hangover_frames = max(1, int(config.get("vad_hangover_ms", 1500) * SAMPLE_RATE / 1000 / frame_samples))
+    stats_every = max(1, int(config.get("stats_interval_s", 5) * SAMPLE_RATE / frame_samples))
+
+    # Engines with a different frame size (Porcupine: 512) get sub-frames
+    engine_bytes = detector.frame_length * 2
+    pending = b""
+
+    conn.send(("ready", {"pid": os.getpid(), "engine": detector.name}))
+    logging.info(f"Capturing {frame_samples}-sample frames, VAD threshold {vad_threshold}")
+
+    frames = 0
+    decoded = 0
+    quiet_frames = hangover_frames  # Start gated until someone speaks
+    running = True
+    paused = False  # capture continues (STT reads the ring), decoding stops
+    generation = 0  # stamped on detections; the parent drops stale ones
+
+    while running:
+        # ----- control messages -----
+        while conn.poll():
+            msg = conn.recv()
+            if msg[0] == "stop":
+                running = False
+            elif msg[0] == "set_grammar" and hasattr(detector, 'set_grammar'):
+                detector.set_grammar(msg[1])
+            elif msg[0] == "pause":
+                paused = True
+            elif msg[0] == "resume":
+                paused = False
+                generation = msg[1]
+                pending = b""
+                detector.reset()  # nothing heard while paused may complete a match
+
+        if not running:
+            break
+
+        # ----- capture -----
+        try:
+            data = stream.read(frame_samples, exception_on_overflow=True)
+        except IOError as e:
+            # Overflow: the frame is lost, but now we know about it
+            ring.add_overflow()
+            logging.debug(f"Input overflow: {e}")
+            continue
+
+        ring.write(data)
+        frames += 1
+
+        # ----- VAD gate -----
+        level = float(np.abs(np.frombuffer(data, dtype=np.int16)).mean())
+        quiet_frames = 0 if level >= vad_threshold else quiet_frames + 1
+
+        if paused:
+            pending = b""
+        elif quiet_frames <= hangover_frames:
+            decoded += 1
+            pending += data
+            while len(pending) >= engine_bytes:
+                result = detector.process(pending[:engine_bytes])
+                pending = pending[engine_bytes:]
+                if result and result.get('detected'):
+                    conn.send(("detected", result, generation))
+        elif pending:
+            pending = b""
+
+        if frames % stats_every == 0:
+            conn.send(("stats", {
+                "frames": frames,
+                "decoded_frames": decoded,
+                "overflows": ring.overflow_count,
+                "level": level,
+            }))
+
+    try:
+        stream.stop_stream()
+        stream.close()
+        pa.terminate()
+    except Exception:
+        pass
+    ring.close()
+    logging.info("Audio process stopped")
+
+
+# ============================================================
+#                     MAIN PROCESS SIDE
+# ============================================================
+
+class AudioProcessWakeWord:
+    """
+    Wake word engine backed by the audio process.
+
+    Drop-in for the in-process engines: detect() returns the same dict/False
+    contract, so WakeWordDetector does not need to know where decoding
+    happens.
+    """
+
+    def __init__(self, keyword="sebas", event_bus=None, grammar=None,
+                 frame_samples: int = FRAME_SAMPLES, capacity: int = 64,
+                 vad_threshold: float = 200, vad_hangover_ms: int = 1500,
+                 startup_timeout: float = 30.0, engine: Optional[str] = None):
+        """
+        Args:
+            keyword: Primary wake word
+            event_bus: Optional EventBus; transcripts from the child are re-emitted on it
+            grammar: Optional wake phrase list (see VoskWakeWord)
+            frame_samples: Samples per captured frame
+            capacity: Frames kept in the shared ring (64 x 250 ms = 16 s)
+            vad_threshold: Mean absolute level below which a frame is silence
+            vad_hangover_ms: Keep decoding this long after the last voiced frame
+            startup_timeout: Seconds to wait for the child to load the model
+            engine: Wake word engine to run in the child (see backend.py)
+        """
+        self.keyword = keyword.lower()
+        self.event_bus = event_bus
+        self.stats: Dict[str, Any] = {}
+
+        ctx = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing.create(frame_samples * 2, capacity)
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+
+        config = {
+            "engine": engine,
+            "keyword": keyword,
+            "grammar": list(grammar) if grammar else None,
+            "vad_threshold": vad_threshold,
+            "vad_hangover_ms": vad_hangover_ms,
+            "log_level": logging.getLogger().getEffectiveLevel(),
+        }
+
+        self.process = ctx.Process(
+            target=_audio_process_main,
+            args=(self.ring.name, frame_samples, capacity, child_conn, config),
+            daemon=True,
+            name="SebasAudioProcess"
+        )
+        self.process.start()
+        logging.info(f"[AudioProcess] Started capture process (pid {self.process.pid})")
+        self.generation = 0  # detections from older generations are stale
+
+        # Wait for the model to load in the child
+        if not self.conn.poll(startup_timeout):
+            self.cleanup()
+            raise RuntimeError("Audio process did not start in time")
+
+        msg = self.conn.recv()
+        if msg[0] != "ready":
+            self.cleanup()
+            raise RuntimeError(f"Audio process failed: {msg[1] if len(msg) > 1 else msg}")
+
+        logging.info("[AudioProcess] Capture process ready")
+
+    def detect(self, timeout: float = 0.1):
+        """
+        Wait briefly for the next detection from the child.
+
+        Returns:
+            dict with 'detected' and 'text' keys, or False
+        """
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    return False
+
+                msg = self.conn.recv()
+                kind = msg[0]
+
+                if kind == "detected":
+                    if msg[2] != self.generation:
+                        continue  # decoded before the last resume (SEBAS's own reply etc.)
+                    return msg[1]
+                if kind == "event" and self.event_bus:
+                    self.event_bus.emit(msg[1], msg[2])
+                elif kind == "stats":
+                    self.stats = msg[1]
+                    if self.stats.get("overflows"):
+                        logging.debug(f"[AudioProcess] Stats: {self.stats}")
+                elif kind == "error":
+                    logging.error(f"[AudioProcess] Child error: {msg[1]}")
+        except (EOFError, OSError):
+            logging.error("[AudioProcess] Capture process exited")
+            time.sleep(timeout)
+            return False
+
+    def pause(self):
+        """
+        Stop wake word decoding while a detection is being handled.
+
+        The child keeps filling the ring (command capture reads it); it just
+        stops matching, so the reply and the command cannot re-trigger.
+        """
+        self.generation += 1
+        try:
+            self.conn.send(("pause",))
+        except Exception as e:
+            logging.error(f"[AudioProcess] Failed to pause: {e}")
+
+    def resume(self):
+        """Resume decoding from fresh audio; anything decoded before is dropped."""
+        self.generation += 1
+        try:
+            self.conn.send(("resume", self.generation))
+        except Exception as e:
+            logging.error(f"[AudioProcess] Failed to resume: {e}")
+
+    def set_grammar(self, phrases: List[str]):
+        """Forward a new wake phrase list to the child."""
+        try:
+            self.conn.send(("set_grammar", list(phrases)))
+        except Exception as e:
+            logging.error(f"[AudioProcess] Failed to send grammar: {e}")
+
+    def create_reader(self) -> SharedFrameReader:
+        """New consumer positioned at the newest frame."""
+        return SharedFrameReader(self.ring)
+
+    def get_status(self) -> dict:
+        return {
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "frames_written": self.ring.write_count,
+            "overflows": self.ring.overflow_count,
+            "stats": self.stats,
+        }
+
+    def cleanup(self):
+        """Stop the child process and release the shared memory."""
+        try:
+            self.conn.send(("stop",))
+        except Exception:
+            pass
+
+        if self.process:
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+
+        self.ring.close()
+        logging.info("[AudioProcess] Cleaned up")
@@ -0,0 +1,153 @@
+"""
+Wake Word Backends - Stage 2
+Common frame-based interface and config-driven factory for wake word engines.
+
+Every engine implements process(frame) on raw 16-bit mono PCM of
+``frame_length`` samples at ``sample_rate`` and returns either None or a
+detection dict:
+
+    {'detected': True, 'text': 'sebas open notepad', 'engine': 'vosk'}
+
+Engines that spot a fixed keyword without transcribing (Porcupine) also
+set 'spotted': True, so the caller skips the text variation check.
+
+detect() is kept for the in-process loop: it reads one frame from the
+engine's own microphone stream and returns the dict or False.
+"""
+
+import importlib
+import inspect
+import logging
+import os
+import time
+from typing import Optional, Dict, Any, Tuple
+
+
+class WakeWordBackend:
+    """Base class for wake word engines."""
+
+    name = "base"
+    sample_rate = 16000
+    frame_length = 4000  # samples per process() call
+
+    stream = None
+    pa = None
+
+    def process(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Decode one frame of audio.
+
+        Args:
+            frame: int16 mono PCM, ``frame_length`` samples
+
+        Returns:
+            Detection dict or None
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} must implement process()")
+
+    def open_stream(self):
+        """Open a microphone stream matching this engine's frame format."""
+        import pyaudio
+
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(
+            rate=self.sample_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            frames_per_buffer=self.frame_length
+        )
+
+    def detect(self):
+        """
+        Read one frame from the engine's stream and process it.
+
+        Returns:
+            Detection dict, or False if nothing was detected
+        """
+        if self.stream is None:
+            # No microphone: pace the caller's loop at real-time frame rate
+            time.sleep(self.frame_length / self.sample_rate)
+            return False
+
+        try:
+            frame = self.stream.read(self.frame_length, exception_on_overflow=False)
+            return self.process(frame) or False
+        except Exception as e:
+            logging.error(f"[{self.__class__.__name__}] Detection error: {e}")
+            import traceback
+            logging.error(traceback.format_exc())
+            return False
+
+    def reset(self):
+        """Forget any partially decoded audio."""
+        pass
+
+    def cleanup(self):
+        """Release audio resources."""
+        try:
+            if self.stream:
+                self.stream.stop_stream()
+                self.stream.close()
+                self.stream = None
+            if self.pa:
+                self.pa.terminate()
+                self.pa = None
+        except Exception as e:
+            logging.error(f"[{self.__class__.__name__}] Cleanup error: {e}")
+
+
+# ============================================================
+#                       FACTORY
+# ============================================================
+
+# name -> (module, class). Imported lazily: each engine has its own
+# optional dependency (vosk, pvporcupine).
+_BACKENDS: Dict[str, Tuple[str, str]] = {
+    "vosk": ("sebas.wakeword.wakeword_vosk", "VoskWakeWord"),
+    "porcupine": ("sebas.wakeword.wakeword_porcupine", "PorcupineWakeWord"),
+    "dummy": ("sebas.wakeword.wakeword_dummy", "DummyWakeWord"),
+}
+
+
+def register_backend(name: str, module: str, class_name: str):
+    """Register an additional wake word engine for the factory."""
+    _BACKENDS[name.lower()] = (module, class_name)
+
+
+def available_backends() -> list:
+    """Names the factory knows about (installed or not)."""
+    return sorted(_BACKENDS.keys())
+
+
+def get_configured_backend_name() -> str:
+    """Engine selected by config (env SEBAS_WAKEWORD_ENGINE, default vosk)."""
+    return os.environ.get("SEBAS_WAKEWORD_ENGINE", "vosk").lower()
+
+
+def create_wakeword_backend(name: Optional[str] = None, **kwargs) -> WakeWordBackend:
+    """
+    Create a wake word engine by name.
+
+    Keyword arguments the engine's constructor does not accept are
+    dropped, so callers can pass one common set (keyword, event_bus,
+    grammar, open_stream) regardless of the engine.
+
+    Raises:
+        ValueError: unknown engine name
+        ImportError: engine dependency not installed
+    """
+    name = (name or get_configured_backend_name()).lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown wake word engine '{name}'. Available: {available_backends()}")
+
+    module_name, class_name = _BACKENDS[name]
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+
+    params = inspect.signature(backend_class.__init__).parameters
+    accepts_any = any(p.kind == p.VAR_KEYWORD for p in params.values())
+    if not accepts_any:
+        kwargs = {k: v for k, v in kwargs.items() if k in params}
+
+    logging.info(f"[WakeWord] Creating '{name}' engine")
+    return backend_class(**kwargs)
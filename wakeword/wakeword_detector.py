@@ -4,10 +4,86 @@ Enhanced with wake word variations support
 """
 
 import logging
+import os
 from pathlib import Path
 import threading
 import time
 
+from sebas.services.tracing import get_tracer
+from sebas.wakeword.backend import create_wakeword_backend, get_configured_backend_name
+
+
+# Default comprehensive variations for "sebas"
+DEFAULT_VARIATIONS = [
+    # Direct variations
+    "sebas",
+    "sebus",
+    "sebass",
+    "sebbas",
+    
+    # Phonetic variations
+    "see bass",
+    "see bus",
+    "see boss",
+    "sea bass",
+    "sea bus",
+    "sea boss",
+    "c bass",
+    "c bus", 
+    "c boss",
+    
+    # "So" variations (common misrecognitions from logs)
+    "so bass",
+    "so bus",
+    "so boss",
+    "so bas",
+    
+    # Common misrecognitions
+    "cebas",
+    "cebus",
+    "seavas",
+    "sevas",
+    "sabres",
+    "sabers",
+    
+    # With spacing variations
+    "se bas",
+    "se bus",
+    "se boss",
+    
+    # Partial matches
+    "seba",
+    "sebba",
+    
+    # Other phonetic possibilities
+    "say bass",
+    "say bus",
+    "say boss",
+    "seabus",
+    "seabass",
+    "cbass",
+]
+
+
+def match_variation(text: str, variations) -> tuple[bool, str]:
+    """
+    Check if any wake word variation is present in the text.
+    
+    Args:
+        text: Recognized text
+        variations: Lower-case variations to look for
+        
+    Returns:
+        Tuple of (detected: bool, matched_variation: str)
+    """
+    text_lower = text.lower()
+    
+    for variation in variations:
+        if variation in text_lower:
+            return True, variation
+    
+    return False, ""
+
 
 class WakeWordDetector:
     """
@@ -15,7 +91,8 @@ class WakeWordDetector:
     Listens for wake word (and its variations), then triggers callback with recognized text.
     """
     
-    def __init__(self, callback, keyword="sebas", variations=None):
+    def __init__(self, callback, keyword="sebas", variations=None, event_bus=None,
+                 recognizer_mode=None, use_audio_process=None, engine=None):
         """
         Initialize wake word detector.
         
@@ -23,8 +100,23 @@ class WakeWordDetector:
             callback: Function to call when wake word detected
             keyword: Primary wake word to listen for
             variations: List of acceptable variations (optional)
+            event_bus: Optional EventBus that receives live transcript events
+            recognizer_mode: "open" (full vocabulary decoding, default) or
+                "grammar" (keyword-restricted recognizer, full decoding only
+                for the command). Defaults to env SEBAS_WAKEWORD_MODE.
+            use_audio_process: Run capture, VAD and decoding in a separate
+                process (env SEBAS_AUDIO_PROCESS=1). Falls back to in-process
+                detection if the process cannot start.
+            engine: Wake word engine name ("vosk", "porcupine", "dummy").
+                Defaults to env SEBAS_WAKEWORD_ENGINE, then "vosk".
         """
         self.callback = callback
+        self.event_bus = event_bus
+        self.recognizer_mode = (recognizer_mode or os.environ.get("SEBAS_WAKEWORD_MODE", "open")).lower()
+        if use_audio_process is None:
+            use_audio_process = os.environ.get("SEBAS_AUDIO_PROCESS", "0") == "1"
+        self.use_audio_process = use_audio_process
+        self.engine = (engine or get_configured_backend_name()).lower()
         self.keyword = keyword.lower()
         self.running = False
         self.mode = "manual"  # Start with manual, change to audio if successful
@@ -34,56 +126,7 @@ class WakeWordDetector:
         
         # Setup wake word variations
         if variations is None:
-            # Default comprehensive variations for "sebas"
-            self.variations = [
-                # Direct variations
-                "sebas",
-                "sebus",
-                "sebass",
-                "sebbas",
-                
-                # Phonetic variations
-                "see bass",
-                "see bus",
-                "see boss",
-                "sea bass",
-                "sea bus",
-                "sea boss",
-                "c bass",
-                "c bus", 
-                "c boss",
-                
-                # "So" variations (common misrecognitions from logs)
-                "so bass",
-                "so bus",
-                "so boss",
-                "so bas",
-                
-                # Common misrecognitions
-                "cebas",
-                "cebus",
-                "seavas",
-                "sevas",
-                "sabres",
-                "sabers",
-                
-                # With spacing variations
-                "se bas",
-                "se bus",
-                "se boss",
-                
-                # Partial matches
-                "seba",
-                "sebba",
-                
-                # Other phonetic possibilities
-                "say bass",
-                "say bus",
-                "say boss",
-                "seabus",
-                "seabass",
-                "cbass",
-            ]
+            self.variations = list(DEFAULT_VARIATIONS)
         else:
             self.variations = [v.lower() for v in variations]
         
@@ -94,12 +137,26 @@ class WakeWordDetector:
         logging.info(f"[WakeWord] Configured with {len(self.variations)} variations")
         logging.debug(f"[WakeWord] Variations: {self.variations}")
                 
-        # Try to initialize Vosk wake word detection
+        # Try to initialize the configured wake word engine
         try:
-            logging.info("[WakeWord] Attempting to initialize Vosk...")
-            from .wakeword_vosk import VoskWakeWord
+            grammar = self.variations if self.recognizer_mode == "grammar" else None
+            
+            if self.use_audio_process:
+                try:
+                    logging.info("[WakeWord] Starting dedicated audio process...")
+                    from .audio_process import AudioProcessWakeWord
+                    self.detector = AudioProcessWakeWord(
+                        keyword=keyword, event_bus=event_bus, grammar=grammar, engine=self.engine
+                    )
+                except Exception as e:
+                    logging.error(f"[WakeWord] Audio process unavailable ({e}) - decoding in-process")
+                    self.use_audio_process = False
             
-            self.detector = VoskWakeWord(keyword=keyword)
+            if self.detector is None:
+                logging.info(f"[WakeWord] Attempting to initialize '{self.engine}' engine...")
+                self.detector = create_wakeword_backend(
+                    self.engine, keyword=keyword, event_bus=event_bus, grammar=grammar
+                )
             
             # Verify detector was created successfully
             if self.detector is not None:
@@ -111,7 +168,7 @@ class WakeWordDetector:
                 self.mode = "manual"
                 
         except ImportError as e:
-            logging.warning(f"[WakeWord] Cannot import VoskWakeWord: {e}")
+            logging.warning(f"[WakeWord] Cannot import '{self.engine}' engine: {e}")
             logging.info("[WakeWord] Falling back to MANUAL mode")
             self.mode = "manual"
             self.detector = None
@@ -131,13 +188,7 @@ class WakeWordDetector:
         Returns:
             Tuple of (detected: bool, matched_variation: str)
         """
-        text_lower = text.lower()
-        
-        for variation in self.variations:
-            if variation in text_lower:
-                return True, variation
-        
-        return False, ""
+        return match_variation(text, self.variations)
     
     def start(self):
         """Start wake word detection"""
@@ -181,6 +232,7 @@ class WakeWordDetector:
         while self.running:
             try:
                 # Get detection result with text
+                detect_started = time.perf_counter()
                 result = self.detector.detect()
                 
                 if isinstance(result, dict) and result.get('detected'):
@@ -188,18 +240,18 @@ class WakeWordDetector:
                     detected_text = result.get('text', '')
                     self.last_recognized_text = detected_text
                     
-                    # Check for variations in the detected text
-                    is_match, matched_variation = self._check_variations(detected_text)
+                    # Keyword spotters already matched; transcribers need the variation check
+                    if result.get('spotted'):
+                        is_match, matched_variation = True, self.keyword
+                        detected_text = self.keyword
+                    else:
+                        is_match, matched_variation = self._check_variations(detected_text)
                     
                     if is_match:
                         logging.info(f"[WakeWord] ✓ Wake word detected! Matched '{matched_variation}' in: '{detected_text}'")
                         
                         # Trigger callback with the recognized text
-                        if self.callback:
-                            try:
-                                self.callback(detected_text)
-                            except Exception as e:
-                                logging.exception(f"[WakeWord] Callback error: {e}")
+                        self._fire_callback(detect_started, result, detected_text)
                         
                         # Small delay to avoid multiple triggers
                         time.sleep(1)
@@ -211,11 +263,7 @@ class WakeWordDetector:
                     # Old format: just boolean (backward compatibility)
                     logging.info(f"[WakeWord] ✓ '{self.keyword}' detected!")
                     
-                    if self.callback:
-                        try:
-                            self.callback()
-                        except Exception as e:
-                            logging.exception(f"[WakeWord] Callback error: {e}")
+                    self._fire_callback(detect_started, {})
                     
                     time.sleep(1)
                     
@@ -227,6 +275,38 @@ class WakeWordDetector:
         
         logging.info("[WakeWord] Detection loop stopped")
     
+    def _fire_callback(self, detect_started: float, result: dict, *args):
+        """
+        Run the callback inside a new latency trace.
+        
+        The trace starts when the detect() call that fired began and is
+        current for this thread while the callback runs. Detectors that
+        decode out of process are paused meanwhile, so the reply and the
+        command do not queue up new detections.
+        """
+        if not self.callback:
+            return
+        
+        pausable = hasattr(self.detector, 'pause')
+        if pausable:
+            self.detector.pause()
+        
+        tracer = get_tracer()
+        trace = tracer.start_trace("voice_command", start=detect_started)
+        if trace:
+            trace.add_span("wakeword.detect", detect_started, time.perf_counter(),
+                           engine=result.get('engine', self.engine))
+        try:
+            with tracer.activate(trace):
+                self.callback(*args)
+        except Exception as e:
+            logging.exception(f"[WakeWord] Callback error: {e}")
+        finally:
+            if pausable:
+                self.detector.resume()
+            if trace:
+                trace.release()
+    
     def stop(self):
         """Stop wake word detection"""
         self.running = False
@@ -270,11 +350,16 @@ class WakeWordDetector:
             'mode': self.mode,
             'running': self.running,
             'keyword': self.keyword,
+            'engine': self.engine,
+            'recognizer_mode': self.recognizer_mode,
+            'audio_process': self.detector.get_status() if self.use_audio_process and self.detector else None,
             'variations_count': len(self.variations),
             'audio_available': self.mode == "audio",
             'detector_active': self.detection_thread and self.detection_thread.is_alive() if self.detection_thread else False,
             'last_recognized_text': self.last_recognized_text,
-            'detector_present': self.detector is not None
+            'detector_present': self.detector is not None,
+            'preprocessing': self.detector.preprocessor.get_status()
+                             if getattr(self.detector, 'preprocessor', None) else None
         }
     
     def get_last_recognized_text(self) -> str:
@@ -295,6 +380,7 @@ class WakeWordDetector:
         variation_lower = variation.lower()
         if variation_lower not in self.variations:
             self.variations.append(variation_lower)
+            self._sync_grammar()
             logging.info(f"[WakeWord] Added new variation: '{variation}'")
         else:
             logging.debug(f"[WakeWord] Variation '{variation}' already exists")
@@ -309,8 +395,14 @@ class WakeWordDetector:
         variation_lower = variation.lower()
         if variation_lower in self.variations and variation_lower != self.keyword:
             self.variations.remove(variation_lower)
+            self._sync_grammar()
             logging.info(f"[WakeWord] Removed variation: '{variation}'")
         elif variation_lower == self.keyword:
             logging.warning(f"[WakeWord] Cannot remove primary keyword '{self.keyword}'")
         else:
             logging.debug(f"[WakeWord] Variation '{variation}' not found")
+    
+    def _sync_grammar(self):
+        """Rebuild the keyword grammar after the variation list changed."""
+        if self.recognizer_mode == "grammar" and hasattr(self.detector, 'set_grammar'):
+            self.detector.set_grammar(self.variations)
@@ -1,5 +1,17 @@
-class DummyWakeWord:
+from sebas.wakeword.backend import WakeWordBackend
+
+
+class DummyWakeWord(WakeWordBackend):
     """Always silent wake-word engine (fallback)."""
 
-    def detect(self):
-        return False
+    name = "dummy"
+
+    def __init__(self, open_stream=False):
+        # Nothing to listen to; the stream is only opened for in-process
+        # capture (the audio process and the benchmark pass open_stream=False).
+        # In the benchmark the dummy is the per-frame overhead baseline.
+        if open_stream:
+            self.open_stream()
+
+    def process(self, frame):
+        return None
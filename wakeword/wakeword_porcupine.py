@@ -1,12 +1,17 @@
 import logging
 import pvporcupine
-import pyaudio
 import struct
 import os
 
+from sebas.wakeword.backend import WakeWordBackend
 
-class PorcupineWakeWord:
-    def __init__(self, keyword="Alfred"):
+
+class PorcupineWakeWord(WakeWordBackend):
+    """Picovoice Porcupine engine: spots a single custom keyword model."""
+
+    name = "porcupine"
+
+    def __init__(self, keyword="Alfred", open_stream=True):
         access_key = os.getenv("PICOVOICE_ACCESS_KEY")
 
         if not access_key:
@@ -18,26 +23,26 @@ class PorcupineWakeWord:
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Wake-word model not found: {model_path}")
 
+        self.keyword = keyword.lower()
         self.porcupine = pvporcupine.create(
             access_key=access_key,
             keyword_paths=[model_path]
         )
+        self.sample_rate = self.porcupine.sample_rate
+        self.frame_length = self.porcupine.frame_length
+        self._unpack_format = "h" * self.frame_length
 
-        self.pa = pyaudio.PyAudio()
-        self.stream = self.pa.open(
-            rate=self.porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=self.porcupine.frame_length
-        )
+        if open_stream:
+            self.open_stream()
 
         logging.info(f"PorcupineWakeWord initialized with custom '{keyword}.ppn'")
 
-    def detect(self):
-        pcm = self.stream.read(
-            self.porcupine.frame_length,
-            exception_on_overflow=False
-        )
-        pcm = struct.unpack_from("h" * self.porcupine.frame_length, pcm)
-        return self.porcupine.process(pcm) >= 0
+    def process(self, frame: bytes):
+        pcm = struct.unpack_from(self._unpack_format, frame)
+        if self.porcupine.process(pcm) >= 0:
+            return {'detected': True, 'text': self.keyword, 'engine': self.name, 'spotted': True}
+        return None
+
+    def cleanup(self):
+        super().cleanup()
+        self.porcupine.delete()
@@ -1,13 +1,42 @@
 import logging
+import time
 from pathlib import Path
 import vosk
 import pyaudio
 import json
 import numpy as np
 
-class VoskWakeWord:
-    def __init__(self, keyword="sebas"):
+from sebas.stt.audio_preprocessor import create_preprocessor
+from sebas.wakeword.backend import WakeWordBackend
+
+
+class VoskWakeWord(WakeWordBackend):
+    """Vosk engine: open-vocabulary decoding or grammar keyword spotting."""
+    
+    name = "vosk"
+    sample_rate = 16000
+    frame_length = 4000
+    
+    def __init__(self, keyword="sebas", event_bus=None, grammar=None,
+                 command_timeout_ms=1500, max_command_ms=8000, open_stream=True):
+        """
+        Args:
+            keyword: Primary wake word
+            event_bus: Optional EventBus for live transcripts
+            grammar: Optional list of wake phrases. When given, wake word
+                spotting runs on a recognizer restricted to these phrases
+                plus [unk], and only switches to the full recognizer to
+                capture the command that follows.
+            command_timeout_ms: Grammar mode - give up waiting for a command
+                if nothing is said this long after the wake word
+            max_command_ms: Grammar mode - hard cap on command capture
+            open_stream: Open the microphone here. Pass False when frames
+                are captured elsewhere and fed through process().
+        """
         self.keyword = keyword.lower()
+        self.event_bus = event_bus  # Optional EventBus for live transcripts
+        self.command_timeout_ms = command_timeout_ms
+        self.max_command_ms = max_command_ms
         
         logging.info("[VoskWakeWord] Initializing...")
         
@@ -22,6 +51,36 @@ class VoskWakeWord:
         self.recog = vosk.KaldiRecognizer(self.model, 16000)
         self.recog.SetWords(True)
         
+        # Optional noise suppression / high-pass / AGC (SEBAS_AUDIO_PREPROCESS)
+        self.preprocessor = create_preprocessor()
+        
+        # Grammar-constrained keyword spotting (optional)
+        self.keyword_recog = None
+        self.grammar: list = []
+        self._wake_prefixes: list = []  # grammar phrases as word lists, longest first
+        self._phase = "keyword"  # keyword | command (grammar mode only)
+        self._command_ms = 0
+        self._command_heard = False
+        if grammar:
+            self.set_grammar(grammar)
+        
+        self.pa = None
+        self.stream = None
+        if open_stream:
+            self.open_stream()
+        
+        # Track state
+        self.last_detection_text = ""
+        self.silence_counter = 0
+        self.total_checks = 0
+        self.audio_level_checks = 0
+        self.last_partial_text = ""
+        
+        logging.info(f"[VoskWakeWord] Ready! Listening for '{keyword}'...")
+        logging.info("[VoskWakeWord] Speak into your microphone to test...")
+
+    def open_stream(self):
+        """List input devices and open the microphone stream."""
         # List available audio devices
         self.pa = pyaudio.PyAudio()
         logging.info("[VoskWakeWord] Available audio input devices:")
@@ -51,31 +110,19 @@ class VoskWakeWord:
         except Exception as e:
             logging.error(f"[VoskWakeWord] Failed to open audio stream: {e}")
             raise
-        
-        # Track state
-        self.last_detection_text = ""
-        self.silence_counter = 0
-        self.total_checks = 0
-        self.audio_level_checks = 0
-        
-        logging.info(f"[VoskWakeWord] Ready! Listening for '{keyword}'...")
-        logging.info("[VoskWakeWord] Speak into your microphone to test...")
 
-    def detect(self):
+    def process(self, data: bytes):
         """
-        Check if any speech is detected and return it.
+        Decode one frame of 16 kHz mono int16 audio.
         
         Returns:
-            dict with 'detected' (bool) and 'text' (str) keys if speech detected,
-            False otherwise
+            dict with 'detected' (bool) and 'text' (str) keys if speech
+            was recognized, None otherwise
             
-        Note: This returns ALL recognized speech. The WakeWordDetector 
-        will check for wake word variations.
+        Note: In open-vocabulary mode this returns ALL recognized speech.
+        The WakeWordDetector will check for wake word variations.
         """
         try:
-            # Read audio data
-            data = self.stream.read(4000, exception_on_overflow=False)
-            
             # Calculate audio level for debugging
             self.total_checks += 1
             audio_array = np.frombuffer(data, dtype=np.int16)
@@ -87,23 +134,36 @@ class VoskWakeWord:
                 logging.info(f"[VoskWakeWord] Audio level check #{self.audio_level_checks}: {audio_level:.1f} "
                            f"(threshold ~500 for speech)")
                 if audio_level < 100:
-                    logging.warning("[VoskWakeWord] Audio level very low - check microphone!")
+                    if self.preprocessor is None or not self.preprocessor.agc:
+                        logging.warning("[VoskWakeWord] Audio level very low - check microphone "
+                                        "or enable gain control (SEBAS_AUDIO_PREPROCESS=on)")
+                    else:
+                        logging.debug(f"[VoskWakeWord] Low input level, AGC gain {self.preprocessor.gain:.2f}")
+            
+            if self.preprocessor is not None:
+                data = self.preprocessor.process(data)
+            
+            if self.keyword_recog is not None:
+                return self._detect_with_grammar(data)
             
             # Process with Vosk
             if self.recog.AcceptWaveform(data):
                 result = json.loads(self.recog.Result())
                 text = result.get("text", "").lower()
                 
+                self.last_partial_text = ""
+                
                 if text:
                     # Log what we recognized
                     logging.info(f"[VoskWakeWord] 🎤 RECOGNIZED: '{text}'")
+                    self._publish_transcript(text, final=True)
                     
                     # Return ALL recognized text - let WakeWordDetector check for variations
                     if text != self.last_detection_text:
                         self.last_detection_text = text
                         self.silence_counter = 0
                         # Always return dict with detected flag and full text
-                        return {'detected': True, 'text': text}
+                        return {'detected': True, 'text': text, 'engine': self.name}
                     else:
                         logging.debug("[VoskWakeWord] Duplicate detection, ignoring")
                     
@@ -118,6 +178,10 @@ class VoskWakeWord:
                     if self.total_checks % 10 == 0:
                         logging.debug(f"[VoskWakeWord] Partial: '{partial_text}'")
                     
+                    if partial_text != self.last_partial_text:
+                        self.last_partial_text = partial_text
+                        self._publish_transcript(partial_text, final=False)
+                    
                     self.silence_counter = 0
                 else:
                     self.silence_counter += 1
@@ -129,22 +193,150 @@ class VoskWakeWord:
                         self.last_detection_text = ""
                         self.silence_counter = 0
             
-            return False
+            return None
             
         except Exception as e:
             logging.error(f"[VoskWakeWord] Detection error: {e}")
             import traceback
             logging.error(traceback.format_exc())
+            return None
+    
+    # ------------------------------------------------------------
+    # Grammar-constrained mode
+    # ------------------------------------------------------------
+    def set_grammar(self, phrases):
+        """
+        (Re)build the keyword recognizer from a list of wake phrases.
+        
+        Phrases with words missing from the model vocabulary are skipped,
+        Vosk would otherwise drop them with a warning per word.
+        """
+        usable = []
+        for phrase in phrases:
+            phrase = phrase.lower().strip()
+            words = phrase.split()
+            if not words or phrase in usable:
+                continue
+            if hasattr(self.model, 'find_word') and any(self.model.find_word(w) < 0 for w in words):
+                logging.debug(f"[VoskWakeWord] Skipping out-of-vocabulary phrase: '{phrase}'")
+                continue
+            usable.append(phrase)
+        
+        if not usable:
+            logging.warning("[VoskWakeWord] No usable grammar phrases - staying in open-vocabulary mode")
+            self.keyword_recog = None
+            self.grammar = []
+            self._wake_prefixes = []
+            return
+        
+        self.grammar = usable
+        self._wake_prefixes = sorted((phrase.split() for phrase in usable), key=len, reverse=True)
+        self.keyword_recog = vosk.KaldiRecognizer(
+            self.model, 16000, json.dumps(usable + ["[unk]"])
+        )
+        self._phase = "keyword"
+        logging.info(f"[VoskWakeWord] Grammar mode: {len(usable)} of {len(phrases)} phrases usable")
+    
+    def _match_grammar(self, text: str) -> bool:
+        """True if a grammar phrase appears in the keyword recognizer output."""
+        if not text:
             return False
+        return any(phrase in text for phrase in self.grammar)
+    
+    def _strip_wake_phrase(self, text: str) -> str:
+        """
+        Drop the wake phrase picked up from the pre-roll chunk.
+        
+        Only a whole grammar phrase that prefixes the text is removed
+        (longest first, once): single words of variations ("say", "see")
+        are ordinary command words.
+        """
+        words = text.split()
+        for prefix in self._wake_prefixes:
+            if words[:len(prefix)] == prefix:
+                return " ".join(words[len(prefix):])
+        return text
+    
+    def _detect_with_grammar(self, data: bytes):
+        """
+        Two-phase detection: spot the keyword with the small grammar,
+        then hand the following audio to the full recognizer.
+        """
+        if self._phase == "keyword":
+            if self.keyword_recog.AcceptWaveform(data):
+                text = json.loads(self.keyword_recog.Result()).get("text", "")
+            else:
+                text = json.loads(self.keyword_recog.PartialResult()).get("partial", "")
+            
+            if not self._match_grammar(text):
+                return None
+            
+            logging.info(f"[VoskWakeWord] 🎤 KEYWORD: '{text}' - capturing command")
+            self.keyword_recog.Reset()
+            self.recog.Reset()
+            self._phase = "command"
+            self._command_ms = 0
+            self._command_heard = False
+            self.last_partial_text = ""
+            # The command may already start in this chunk
+            self.recog.AcceptWaveform(data)
+            return None
+        
+        # Command phase
+        self._command_ms += len(data) // 2 * 1000 // 16000
+        command = None
+        
+        if self.recog.AcceptWaveform(data):
+            text = self._strip_wake_phrase(json.loads(self.recog.Result()).get("text", "").lower())
+            if text:
+                command = text
+        else:
+            partial = self._strip_wake_phrase(json.loads(self.recog.PartialResult()).get("partial", "").lower())
+            if partial:
+                self._command_heard = True
+                if partial != self.last_partial_text:
+                    self.last_partial_text = partial
+                    self._publish_transcript(partial, final=False)
+        
+        if command is None:
+            if not self._command_heard and self._command_ms >= self.command_timeout_ms:
+                command = ""  # Wake word alone - caller will ask for the command
+            elif self._command_ms >= self.max_command_ms:
+                command = self._strip_wake_phrase(json.loads(self.recog.FinalResult()).get("text", "").lower())
+            else:
+                return None
+        
+        self._phase = "keyword"
+        self.last_partial_text = ""
+        text = f"{self.keyword} {command}".strip()
+        logging.info(f"[VoskWakeWord] 🎤 RECOGNIZED: '{text}'")
+        if command:
+            self._publish_transcript(command, final=True)
+        return {'detected': True, 'text': text, 'engine': self.name, 'mode': 'grammar'}
+    
+    def _publish_transcript(self, text: str, final: bool):
+        """Publish a live transcript update on the EventBus (if bound)."""
+        if not self.event_bus or not text:
+            return
+        
+        event_name = "stt.final_transcript" if final else "stt.partial_transcript"
+        self.event_bus.emit(event_name, {
+            'text': text,
+            'final': final,
+            'source': 'wakeword',
+            'timestamp': time.time()
+        })
+    
+    def reset(self):
+        """Drop partially decoded audio and return to keyword spotting."""
+        self.recog.Reset()
+        if self.keyword_recog is not None:
+            self.keyword_recog.Reset()
+        self._phase = "keyword"
+        self.last_partial_text = ""
+        self.last_detection_text = ""
     
     def cleanup(self):
         """Clean up audio resources"""
-        try:
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-            if self.pa:
-                self.pa.terminate()
-            logging.info("[VoskWakeWord] Cleaned up")
-        except Exception as e:
-            logging.error(f"[VoskWakeWord] Cleanup error: {e}")
+        super().cleanup()
+        logging.info("[VoskWakeWord] Cleaned up")